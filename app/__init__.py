@@ -1,3 +1,9 @@
+import os
+# Intel OpenMP aborts when a second copy of its runtime is loaded (torch and
+# CTranslate2 can each bring one); the check runs when the runtime starts, so
+# this has to be set before either is imported, here and in spawned workers
+os.environ.setdefault("KMP_DUPLICATE_LIB_OK", "TRUE")
+
 from app.main import create_app
 # Initialize the application
 app = create_app()
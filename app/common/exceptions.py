@@ -46,6 +46,9 @@ class NotFoundException(HTTPException):
 class UnsupportedMediaException(BaseHTTPException):
     status_code = status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
 
+class PayloadTooLargeException(BaseHTTPException):
+    status_code = status.HTTP_413_CONTENT_TOO_LARGE
+
 class ForbiddenException(HTTPException):
     def __init__(self, message: str):
 
@@ -1,7 +1,9 @@
 """HTTP response wrapper."""
 from fastapi import status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import TypeVar, Generic
+from starlette.types import Receive, Scope, Send
+from typing import Any, Callable, TypeVar, Generic
 
 T = TypeVar("T")
 
@@ -10,3 +12,22 @@ class HttpResponse(BaseModel, Generic[T]):
     message: str
     data: T
     status_code: int = status.HTTP_200_OK
+
+
+class CleanupStreamingResponse(StreamingResponse):
+    """A streaming response that calls ``on_close`` however sending it ends.
+
+    Unlike a background task, which is skipped when the client disconnects,
+    ``on_close`` also runs after a disconnect or a cancelled request, even if
+    the body iterator was never started.
+    """
+
+    def __init__(self, content: Any, on_close: Callable[[], None], **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
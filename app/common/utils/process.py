@@ -0,0 +1,15 @@
+import os
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether a process with this id is running on this machine (signal 0 only checks for it)."""
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, but owned by another user
+        return True
+    return True
@@ -0,0 +1,103 @@
+from typing import Callable, Optional
+from python_multipart.multipart import MultipartParser, parse_options_header  # type: ignore
+from app.common.exceptions import BadRequestException
+
+# Non-file form fields are small option values; anything larger is rejected
+MAX_FIELD_SIZE = 64 * 1024
+
+
+class MultipartStream:
+    """Incremental multipart/form-data parser for a single file field.
+
+    ``feed`` takes raw request body chunks and returns the bytes of the file
+    part that arrived with them, so the caller can write them out before
+    reading more of the body. All other parts are collected as text fields,
+    each passed to ``on_field`` once complete.
+    """
+
+    def __init__(self, boundary: bytes, file_field: str, on_field: Optional[Callable[[str, str], None]] = None):
+        self.file_field = file_field
+        self.on_field = on_field
+        self.fields: dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.file_received = False
+
+        self._file_chunks: list[bytes] = []
+        self._headers: dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name: Optional[str] = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, data: bytes) -> list[bytes]:
+        self._parser.write(data)
+        chunks, self._file_chunks = self._file_chunks, []
+        return chunks
+
+    def finish(self) -> None:
+        self._parser.finalize()
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._part_name = None
+        self._part_is_file = False
+        self._field_value = bytearray()
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name")
+        if name is None:
+            raise BadRequestException("Multipart part without a field name")
+
+        self._part_name = name.decode("utf-8", errors="replace")
+        if self._part_name != self.file_field:
+            return
+
+        if self.file_received:
+            raise BadRequestException(f"Only one '{self.file_field}' file may be uploaded")
+
+        self._part_is_file = True
+        self.file_received = True
+        filename = options.get(b"filename")
+        self.filename = filename.decode("utf-8", errors="replace") if filename else None
+        content_type = self._headers.get(b"content-type")
+        self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part_is_file:
+            self._file_chunks.append(bytes(data[start:end]))
+            return
+
+        self._field_value += data[start:end]
+        if len(self._field_value) > MAX_FIELD_SIZE:
+            raise BadRequestException(f"Form field '{self._part_name}' is too large")
+
+    def _on_part_end(self) -> None:
+        if not self._part_is_file and self._part_name is not None:
+            value = self._field_value.decode("utf-8", errors="replace")
+            self.fields[self._part_name] = value
+            if self.on_field is not None:
+                self.on_field(self._part_name, value)
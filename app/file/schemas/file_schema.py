@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class File(BaseModel):
@@ -9,4 +9,10 @@ class File(BaseModel):
 
     content_type: Optional[str] = None
 
-    size: Optional[int] = None
\ No newline at end of file
+    size: Optional[int] = None
+
+    # Hex sha256 of the file contents, computed while the bytes are written
+    sha256: Optional[str] = None
+
+    # Contents of small files kept in memory instead of at ``path``
+    data: Optional[bytes] = Field(default=None, exclude=True, repr=False)
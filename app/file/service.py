@@ -1,32 +1,82 @@
 import os
+import time
+import shutil
+import asyncio
+import hashlib
 import aiofiles
 from uuid import uuid4
-from fastapi import UploadFile
+from pathlib import Path
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, NamedTuple, Optional, Tuple
+from fastapi import Request
 import httpx
+from python_multipart.multipart import parse_options_header  # type: ignore
+from .multipart_stream import MAX_FIELD_SIZE, MultipartStream
 from .schemas.file_schema import File
-from settings.config import SettingsDep
+from app.common.exceptions import BadRequestException, PayloadTooLargeException
+from settings.config import ConfigType, SettingsDep
+from app.whisper.audio import PCM_SUFFIX, TARGET_SAMPLE_RATE
 
-class FileService:
-    def __init__(self, settings: SettingsDep):
-        self.settings = settings
+# Scratch directories of jobs running in this process; the janitor never touches them
+_active_scratch_dirs: set[Path] = set()
 
-    async def upload_file(self, file: UploadFile) -> File:
+# One pooled client for the application's lifetime: connections and TLS sessions are reused across downloads
+_http_client: Optional[httpx.AsyncClient] = None
 
-        key = str(uuid4())
 
-        if not os.path.exists(self.settings.UPLOAD_DIR):
-            os.mkdir(self.settings.UPLOAD_DIR)
+def get_http_client(settings: ConfigType) -> httpx.AsyncClient:
+    global _http_client
 
-        new_file_path = self.settings.UPLOAD_DIR / key
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.DOWNLOAD_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.DOWNLOAD_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(settings.DOWNLOAD_TIMEOUT_SECONDS),
+            follow_redirects=True,
+        )
 
-        async with aiofiles.open(new_file_path, mode="wb") as buffer:
-            # read file to memory 1MB at a time
-            while chunk := await file.read(1024 * 1024):  
-                await buffer.write(chunk)
-        
-        new_file = File(name=file.filename, path=str(new_file_path), content_type=file.content_type, size=file.size)
-        
-        return new_file
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _decoder_log_path(pcm_path) -> Path:
+    return Path(f"{pcm_path}.log")
+
+
+def _read_decoder_log(pcm_path, max_bytes: int = 4096) -> str:
+    """The end of the streaming decoder's log, which is removed."""
+    log_path = _decoder_log_path(pcm_path)
+    try:
+        with open(log_path, "rb") as f:
+            f.seek(max(0, os.path.getsize(log_path) - max_bytes))
+            return f.read().decode(errors="replace").strip()
+    except FileNotFoundError:
+        return ""
+    finally:
+        if os.path.exists(log_path):
+            os.remove(log_path)
+
+
+class _Spooled(NamedTuple):
+    sha256: str
+    size: int
+    # The bytes themselves when they stayed below SCRATCH_IN_MEMORY_MAX_BYTES, else None (on disk)
+    data: Optional[bytes]
+    decoder: Optional[asyncio.subprocess.Process]
+
+
+class FileService:
+    def __init__(self, settings: SettingsDep):
+        self.settings = settings
 
     async def delete_file(self, file: File) -> None:        
         file_path = file.path
@@ -35,6 +85,63 @@ class FileService:
         if os.path.exists(file_path):
             os.remove(file_path)
 
+    def create_scratch_dir(self) -> Path:
+        """Create a private directory for one job's files under ``UPLOAD_DIR``."""
+        path = self.settings.UPLOAD_DIR / f"job-{uuid4()}"
+        path.mkdir(parents=True)
+        _active_scratch_dirs.add(path)
+        return path
+
+    def remove_scratch_dir(self, path: Path) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+        _active_scratch_dirs.discard(path)
+
+    @asynccontextmanager
+    async def scratch_dir(self) -> AsyncIterator[Path]:
+        """A job's scratch directory, removed with everything in it however the job ends."""
+        path = self.create_scratch_dir()
+        try:
+            yield path
+        finally:
+            self.remove_scratch_dir(path)
+
+    def remove_orphans(self) -> int:
+        """Remove entries of ``UPLOAD_DIR`` left behind by crashed or abandoned jobs.
+
+        Anything older than ``SCRATCH_ORPHAN_MAX_AGE_SECONDS`` that does not belong
+        to a job running in this process is deleted.
+        """
+        if not os.path.exists(self.settings.UPLOAD_DIR):
+            return 0
+
+        cutoff = time.time() - self.settings.SCRATCH_ORPHAN_MAX_AGE_SECONDS
+        removed = 0
+
+        for entry in os.scandir(self.settings.UPLOAD_DIR):
+            path = Path(entry.path)
+            if path in _active_scratch_dirs:
+                continue
+
+            try:
+                if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+
+        return removed
+
+    async def remove_orphans_periodically(self) -> None:
+        while True:
+            removed = await asyncio.to_thread(self.remove_orphans)
+            if removed:
+                print(f"[Files] removed {removed} orphaned scratch entr{'y' if removed == 1 else 'ies'}")
+            await asyncio.sleep(self.settings.SCRATCH_JANITOR_INTERVAL_SECONDS)
+
     _AUDIO_MIME_EXTENSIONS = {
         "audio/mpeg": ".mp3",
         "audio/mp3": ".mp3",
@@ -53,45 +160,208 @@ class FileService:
         "video/webm": ".webm",
     }
 
-    async def download_file(self, url: str) -> File:
+    async def download_file(self, url: str, directory: Path) -> File:
         from urllib.parse import urlparse
 
         key = str(uuid4())
 
-        if not os.path.exists(self.settings.UPLOAD_DIR):
-            os.mkdir(self.settings.UPLOAD_DIR)
+        client = get_http_client(self.settings)
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+
+            content_type = response.headers.get("content-type", "application/octet-stream")
+            content_length = response.headers.get("content-length")
+
+            # Try URL extension first, then content-type map, then Content-Disposition
+            url_path = urlparse(url).path
+            ext = os.path.splitext(url_path)[1].lower()
+
+            if not ext or ext == ".bin":
+                mime = content_type.split(";")[0].strip().lower()
+                ext = self._AUDIO_MIME_EXTENSIONS.get(mime, "")
+
+            if not ext or ext == ".bin":
+                disposition = response.headers.get("content-disposition", "")
+                if "filename=" in disposition:
+                    fname = disposition.split("filename=")[-1].strip().strip('"')
+                    ext = os.path.splitext(fname)[1].lower()
+
+            if not ext or ext == ".bin":
+                print(f"WARNING: Could not determine audio format for content-type '{content_type}', defaulting to .mp3")
+                ext = ".mp3"
+
+            new_file_path = directory / f"{key}{ext}"
+            pcm_path = directory / f"{key}{PCM_SUFFIX}"
+
+            spooled = await self._spool(response.aiter_bytes(chunk_size=self.settings.DOWNLOAD_CHUNK_SIZE), new_file_path, pcm_path)
+
+        new_file = File(name=f"{key}{ext}", path=str(new_file_path), content_type=content_type, size=spooled.size, sha256=spooled.sha256, data=spooled.data)
+
+        if spooled.decoder is not None:
+            return await self._finish_decoder(spooled.decoder, new_file, pcm_path)
+
+        return new_file
+
+    async def receive_upload(self, request: Request, file_field: str, directory: Path, on_field: Optional[Callable[[str, str], None]] = None) -> Tuple[File, dict[str, str]]:
+        """Stream a multipart/form-data body to disk as it is received.
+
+        Unlike ``UploadFile`` (which buffers the whole body before the handler
+        runs), the body is only read as fast as the file part is written, and
+        an upload over ``UPLOAD_MAX_BYTES`` is rejected as soon as it crosses
+        the limit. ``on_field`` is called with each other form field as soon as
+        it is parsed and may raise to reject the upload; fields sent before the
+        file are checked before any of it is stored. Returns the stored file
+        and the remaining form fields.
+        """
+        max_bytes = self.settings.UPLOAD_MAX_BYTES
+
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        boundary = options.get(b"boundary")
+        if content_type != b"multipart/form-data" or not boundary:
+            raise BadRequestException("Expected a multipart/form-data request")
+
+        # Reject early when the client announces the size; form fields add a little overhead
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes + MAX_FIELD_SIZE:
+            raise PayloadTooLargeException(f"Upload exceeds the maximum size of {max_bytes} bytes")
+
+        key = str(uuid4())
+        new_file_path = directory / key
+        pcm_path = directory / f"{key}{PCM_SUFFIX}"
+
+        stream = MultipartStream(boundary, file_field, on_field)
+
+        async def file_chunks() -> AsyncIterator[bytes]:
+            async for data in request.stream():
+                for chunk in stream.feed(data):
+                    yield chunk
+            stream.finish()
+
+        spooled = await self._spool(file_chunks(), new_file_path, pcm_path, max_bytes)
+
+        if not stream.file_received:
+            if spooled.decoder is not None:
+                await self._abort_decoder(spooled.decoder, pcm_path)
+            if os.path.exists(new_file_path):
+                os.remove(new_file_path)
+            raise BadRequestException(f"Missing '{file_field}' file")
+
+        new_file = File(name=stream.filename, path=str(new_file_path), content_type=stream.content_type, size=spooled.size, sha256=spooled.sha256, data=spooled.data)
+
+        if spooled.decoder is not None:
+            return await self._finish_decoder(spooled.decoder, new_file, pcm_path), stream.fields
+
+        return new_file, stream.fields
+
+    async def _spool(self, chunks: AsyncIterator[bytes], file_path, pcm_path, max_bytes: Optional[int] = None) -> _Spooled:
+        """Collect an incoming byte stream without blocking the loop.
+
+        Streams up to ``SCRATCH_IN_MEMORY_MAX_BYTES`` stay in memory and never
+        touch disk; larger ones are written to ``file_path`` once they cross the
+        threshold. The bytes are hashed on the way (the result cache keys on the
+        content) and, with ``DOWNLOAD_DECODE_WHILE_STREAMING``, also fed to the
+        streaming decoder. A failed or oversized transfer leaves nothing behind.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        memory_limit = self.settings.SCRATCH_IN_MEMORY_MAX_BYTES
+        buffer: Optional[bytearray] = bytearray() if memory_limit > 0 else None
+        f = None
+
+        decoder = await self._start_decoder(pcm_path) if self.settings.DOWNLOAD_DECODE_WHILE_STREAMING else None
+
+        try:
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise PayloadTooLargeException(f"Upload exceeds the maximum size of {max_bytes} bytes")
+
+                    digest.update(chunk)
+
+                    if buffer is not None and size <= memory_limit:
+                        buffer += chunk
+                    else:
+                        if f is None:
+                            f = await aiofiles.open(file_path, mode="wb")
+                            if buffer:
+                                await f.write(bytes(buffer))
+                            buffer = None
+                        await f.write(chunk)
+
+                    if decoder is not None and not await self._feed_decoder(decoder, chunk):
+                        await self._abort_decoder(decoder, pcm_path)
+                        decoder = None
+            finally:
+                if f is not None:
+                    await f.close()
+        except BaseException:
+            if decoder is not None:
+                await self._abort_decoder(decoder, pcm_path)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+
+        return _Spooled(digest.hexdigest(), size, bytes(buffer) if buffer is not None else None, decoder)
 
-        async with httpx.AsyncClient() as client:
-            async with client.stream("GET", url) as response:
-                response.raise_for_status()
+    async def _start_decoder(self, pcm_path) -> Optional[asyncio.subprocess.Process]:
+        """Start ffmpeg decoding stdin to mono 16 kHz float32 PCM while the download runs.
 
-                content_type = response.headers.get("content-type", "application/octet-stream")
-                content_length = response.headers.get("content-length")
+        Its messages go to a log file next to the output rather than a pipe: a
+        damaged stream can log an error per frame, and a full stderr pipe would
+        stall ffmpeg and with it the download feeding its stdin.
+        """
+        try:
+            with open(_decoder_log_path(pcm_path), "wb") as log:
+                return await asyncio.create_subprocess_exec(
+                    "ffmpeg", "-hide_banner", "-loglevel", "error",
+                    "-i", "pipe:0",
+                    "-f", "f32le", "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE),
+                    "-y", str(pcm_path),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=log,
+                )
+        except OSError as e:
+            _read_decoder_log(pcm_path)
+            print(f"WARNING: Could not start ffmpeg for streaming decode, decoding after download instead: {e}")
+            return None
 
-                # Try URL extension first, then content-type map, then Content-Disposition
-                url_path = urlparse(url).path
-                ext = os.path.splitext(url_path)[1].lower()
+    async def _feed_decoder(self, decoder: asyncio.subprocess.Process, chunk: bytes) -> bool:
+        try:
+            decoder.stdin.write(chunk)  # type: ignore
+            # Waiting for the pipe to drain keeps the download from outrunning the decoder
+            await decoder.stdin.drain()  # type: ignore
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            return False
 
-                if not ext or ext == ".bin":
-                    mime = content_type.split(";")[0].strip().lower()
-                    ext = self._AUDIO_MIME_EXTENSIONS.get(mime, "")
+    async def _abort_decoder(self, decoder: asyncio.subprocess.Process, pcm_path) -> None:
+        if decoder.returncode is None:
+            decoder.kill()
+        await decoder.wait()
+        print(f"WARNING: Streaming decode failed, falling back to decoding the downloaded file: {_read_decoder_log(pcm_path)}")
 
-                if not ext or ext == ".bin":
-                    disposition = response.headers.get("content-disposition", "")
-                    if "filename=" in disposition:
-                        fname = disposition.split("filename=")[-1].strip().strip('"')
-                        ext = os.path.splitext(fname)[1].lower()
+        if os.path.exists(pcm_path):
+            os.remove(pcm_path)
 
-                if not ext or ext == ".bin":
-                    print(f"WARNING: Could not determine audio format for content-type '{content_type}', defaulting to .mp3")
-                    ext = ".mp3"
+    async def _finish_decoder(self, decoder: asyncio.subprocess.Process, downloaded: File, pcm_path) -> File:
+        """Return the decoded PCM file, or the downloaded file if ffmpeg could not decode the stream.
 
-                new_file_path = self.settings.UPLOAD_DIR / f"{key}{ext}"
+        Containers that need seeking (e.g. MP4 with the index at the end) cannot be
+        decoded from a pipe; those are decoded from the downloaded file as usual.
+        """
+        # End of input lets ffmpeg flush
+        decoder.stdin.close()  # type: ignore
+        await decoder.wait()
+        errors = _read_decoder_log(pcm_path)
 
-                with open(new_file_path, "wb") as f:
-                    async for chunk in response.aiter_bytes(chunk_size=8192):
-                        f.write(chunk)
+        if decoder.returncode != 0:
+            print(f"WARNING: Streaming decode failed, falling back to decoding the downloaded file: {errors}")
+            if os.path.exists(pcm_path):
+                os.remove(pcm_path)
+            return downloaded
 
-        new_file = File(name=f"{key}{ext}", path=str(new_file_path), content_type=content_type, size=content_length)
+        await self.delete_file(downloaded)
 
-        return new_file
\ No newline at end of file
+        return File(name=downloaded.name, path=str(pcm_path), content_type=downloaded.content_type, size=downloaded.size, sha256=downloaded.sha256)
@@ -1,8 +1,29 @@
+from fastapi import Response, status as HttpStatus
 from app.common.router import VersionRouter
 from app.common.response import HttpResponse
+from app.whisper.model_status import model_status
+from app.whisper.process_pool import worker_model_status
+from app.whisper.warmup import is_ready
+from settings.config import SettingsDep
+from .schemas.readiness_schema import ModelStatusSchema, ReadinessSchema
 
 router = VersionRouter(version="1", path="health", tags=["Health"])
 
 @router.get("/")
 async def health_check() -> HttpResponse[None]:
     return HttpResponse(message="Health check", data=None)
+
+
+@router.get("/ready", response_model=HttpResponse[ReadinessSchema])
+async def readiness_check(response: Response, settings: SettingsDep) -> HttpResponse[ReadinessSchema]:
+    """503 until the models warmed up at startup are loaded and have run once."""
+    ready = is_ready(settings)
+    statuses = worker_model_status() if settings.EXECUTION_BACKEND == "process" else model_status()
+    readiness = ReadinessSchema(
+        ready=ready,
+        models={name: ModelStatusSchema(**status) for name, status in statuses.items()},
+    )
+
+    response.status_code = HttpStatus.HTTP_200_OK if ready else HttpStatus.HTTP_503_SERVICE_UNAVAILABLE
+
+    return HttpResponse(message="Ready" if ready else "Models are not ready", data=readiness, status_code=response.status_code)
@@ -0,0 +1,15 @@
+from typing import Optional
+from pydantic import BaseModel
+from app.whisper.model_status import ModelState
+
+
+class ModelStatusSchema(BaseModel):
+    state: ModelState
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ReadinessSchema(BaseModel):
+    ready: bool
+    models: dict[str, ModelStatusSchema]
@@ -0,0 +1 @@
+# app.jobs
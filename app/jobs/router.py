@@ -0,0 +1,31 @@
+from typing import Annotated
+from fastapi import status as HttpStatus, Depends
+from app.common.router import VersionRouter
+from app.common.response import HttpResponse
+from app.whisper.schemas.process_audio_schema import ProcessAudioSchema
+from .service import JobService
+from .schemas.job_schema import JobSchema
+
+
+router = VersionRouter(version="1", path="jobs", tags=["Jobs"])
+
+@router.post("/", status_code=HttpStatus.HTTP_202_ACCEPTED, response_model=HttpResponse[JobSchema])
+async def submit_job(
+    process_audio_schema: ProcessAudioSchema,
+    job_service: Annotated[JobService, Depends(JobService)],
+) -> HttpResponse[JobSchema]:
+
+    job = await job_service.submit(process_audio_schema)
+
+    return HttpResponse(message="Job Submitted Successfully", data=job, status_code=HttpStatus.HTTP_202_ACCEPTED)
+
+
+@router.get("/{job_id}", status_code=HttpStatus.HTTP_200_OK, response_model=HttpResponse[JobSchema])
+async def get_job(
+    job_id: str,
+    job_service: Annotated[JobService, Depends(JobService)],
+) -> HttpResponse[JobSchema]:
+
+    job = await job_service.get(job_id)
+
+    return HttpResponse(message="Job Fetched Successfully", data=job, status_code=HttpStatus.HTTP_200_OK)
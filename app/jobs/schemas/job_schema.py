@@ -0,0 +1,22 @@
+from enum import Enum
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+from app.whisper.schemas.process_audio_response_schema import ProcessAudioResponseSchema
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobSchema(BaseModel):
+    id: str
+    status: JobStatus
+    created_at: datetime
+    updated_at: datetime
+    expires_at: Optional[datetime] = None
+    result: Optional[ProcessAudioResponseSchema] = None
+    error: Optional[str] = None
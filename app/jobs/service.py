@@ -0,0 +1,102 @@
+import asyncio
+from uuid import uuid4
+from functools import lru_cache
+from typing import Annotated, Optional
+from fastapi import Depends
+from fastapi.exceptions import HTTPException
+from settings.config import SettingsDep, ConfigType, settings
+from app.common.exceptions import ErrorResponse, NotFoundException
+from app.file.service import FileService
+from app.whisper.service import WhisperService
+from app.whisper.schemas.process_audio_schema import ProcessAudioSchema
+from .store import JobStore
+from .schemas.job_schema import JobSchema
+
+# Strong references to running job tasks so they are not garbage collected
+_job_tasks: set[asyncio.Task] = set()
+_job_semaphore: Optional[asyncio.Semaphore] = None
+
+
+@lru_cache()
+def get_job_store() -> JobStore:
+    return JobStore(settings.JOB_STORE_PATH)
+
+
+def _get_job_semaphore(max_concurrency: int) -> asyncio.Semaphore:
+    global _job_semaphore
+    if _job_semaphore is None:
+        _job_semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    return _job_semaphore
+
+
+class JobService:
+    def __init__(self, settings: SettingsDep, whisper_service: Annotated[WhisperService, Depends(WhisperService)]):
+        self.settings = settings
+        self.whisper_service = whisper_service
+        self.store = get_job_store()
+
+    @classmethod
+    def create(cls, settings: ConfigType) -> "JobService":
+        """Build the service outside of a request (application startup)."""
+        return cls(settings, WhisperService(settings, FileService(settings)))
+
+    async def submit(self, process_audio_schema: ProcessAudioSchema) -> JobSchema:
+        # Reject an unknown model or unsupported options now rather than failing the job later
+        self.whisper_service.validate_options(process_audio_schema)
+        job = await asyncio.to_thread(self.store.create, str(uuid4()), process_audio_schema.model_dump_json())
+        self._schedule(job.id, process_audio_schema)
+        return job
+
+    async def get(self, job_id: str) -> JobSchema:
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            raise NotFoundException(message=f"Job '{job_id}' not found")
+        return job
+
+    async def resume_pending(self) -> int:
+        """Re-schedule jobs left queued or running by processes that have stopped."""
+        job_ids = await asyncio.to_thread(self.store.requeue_orphaned)
+
+        for job_id in job_ids:
+            request_json = await asyncio.to_thread(self.store.get_request, job_id)
+            if request_json is not None:
+                self._schedule(job_id, ProcessAudioSchema.model_validate_json(request_json))
+
+        if job_ids:
+            print(f"[Jobs] resumed {len(job_ids)} unfinished job(s)")
+        return len(job_ids)
+
+    async def purge_expired_periodically(self) -> None:
+        while True:
+            purged = await asyncio.to_thread(self.store.purge_expired)
+            if purged:
+                print(f"[Jobs] purged {purged} expired job(s)")
+            await asyncio.sleep(self.settings.JOB_PURGE_INTERVAL_SECONDS)
+
+    def _schedule(self, job_id: str, process_audio_schema: ProcessAudioSchema) -> None:
+        task = asyncio.create_task(self._run(job_id, process_audio_schema))
+        _job_tasks.add(task)
+        task.add_done_callback(_job_tasks.discard)
+
+    async def _run(self, job_id: str, process_audio_schema: ProcessAudioSchema) -> None:
+        # Bursts wait here instead of all downloading at once; the whisper
+        # thread pool still bounds how many transcriptions actually run.
+        async with _get_job_semaphore(self.settings.JOB_MAX_CONCURRENCY):
+            await asyncio.to_thread(self.store.mark_running, job_id)
+            print(f"[Jobs] running {job_id}")
+
+            try:
+                result = await self.whisper_service.process_audio(process_audio_schema)
+            except Exception as e:
+                if isinstance(e, HTTPException) and isinstance(e.detail, ErrorResponse):
+                    error = e.detail.message
+                elif isinstance(e, HTTPException):
+                    error = str(e.detail)
+                else:
+                    error = str(e) or type(e).__name__
+                print(f"[Jobs] failed {job_id}: {error}")
+                await asyncio.to_thread(self.store.mark_failed, job_id, error, self.settings.JOB_RESULT_TTL_SECONDS)
+                return
+
+            await asyncio.to_thread(self.store.mark_completed, job_id, result.model_dump_json(), self.settings.JOB_RESULT_TTL_SECONDS)
+            print(f"[Jobs] completed {job_id}")
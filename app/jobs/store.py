@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from app.common.utils.process import pid_alive
+from app.whisper.schemas.process_audio_response_schema import ProcessAudioResponseSchema
+from .schemas.job_schema import JobSchema, JobStatus
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    expires_at TEXT,
+    owner_pid INTEGER
+)
+"""
+
+
+class JobStore:
+    """SQLite-backed job table, so queued jobs and results survive restarts.
+
+    Every call opens a short-lived connection; a lock serializes writers from
+    the worker threads the job service calls in from. Several server workers
+    can share the file: each unfinished job records the pid of the process
+    that queued it or took it over, its owner.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # Workers open the store together; the migration check runs in one of them at a time
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner_pid" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, job_id: str, request_json: str) -> JobSchema:
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at, owner_pid) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, JobStatus.QUEUED.value, request_json, now, now, os.getpid()),
+            )
+        job = self.get(job_id)
+        assert job is not None
+        return job
+
+    def get(self, job_id: str) -> Optional[JobSchema]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_schema(row) if row else None
+
+    def get_request(self, job_id: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT request FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["request"] if row else None
+
+    def mark_running(self, job_id: str) -> None:
+        self._update(job_id, status=JobStatus.RUNNING.value)
+
+    def mark_completed(self, job_id: str, result_json: str, ttl_seconds: int) -> None:
+        expires_at = (datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)).isoformat()
+        self._update(job_id, status=JobStatus.COMPLETED.value, result=result_json, expires_at=expires_at)
+
+    def mark_failed(self, job_id: str, error: str, ttl_seconds: int) -> None:
+        expires_at = (datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)).isoformat()
+        self._update(job_id, status=JobStatus.FAILED.value, error=error, expires_at=expires_at)
+
+    def requeue_orphaned(self) -> list[str]:
+        """Take over the unfinished jobs of processes that are gone; returns their ids, oldest first.
+
+        Jobs whose owner no longer runs (a crashed worker, or the previous run
+        of the server) are reset to queued and owned by this process. Jobs of
+        live workers are left to them. The check and the takeover are one
+        transaction, so workers starting together never resume the same job.
+        Meant for startup, when this process owns no jobs yet: a job recorded
+        under its pid belonged to an earlier process that had the same pid.
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        pid = os.getpid()
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            ).fetchall()
+            orphaned = [
+                row["id"] for row in rows
+                if row["owner_pid"] is None or row["owner_pid"] == pid or not pid_alive(row["owner_pid"])
+            ]
+            conn.executemany(
+                "UPDATE jobs SET status = ?, owner_pid = ?, updated_at = ? WHERE id = ?",
+                [(JobStatus.QUEUED.value, pid, now, job_id) for job_id in orphaned],
+            )
+        return orphaned
+
+    def purge_expired(self) -> int:
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        return cursor.rowcount
+
+    def _update(self, job_id: str, **fields: Optional[str]) -> None:
+        fields["updated_at"] = datetime.now(timezone.utc).isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _to_schema(self, row: sqlite3.Row) -> JobSchema:
+        return JobSchema(
+            id=row["id"],
+            status=JobStatus(row["status"]),
+            created_at=datetime.fromisoformat(row["created_at"]),
+            updated_at=datetime.fromisoformat(row["updated_at"]),
+            expires_at=datetime.fromisoformat(row["expires_at"]) if row["expires_at"] else None,
+            result=ProcessAudioResponseSchema.model_validate_json(row["result"]) if row["result"] else None,
+            error=row["error"],
+        )
@@ -1,26 +1,52 @@
+import asyncio
 from fastapi import FastAPI
 from typing import AsyncGenerator
 from settings.config import settings
 from contextlib import asynccontextmanager
 from app.health.router import router as health_router
 from app.whisper.router import router as whisper_router
+from app.jobs.router import router as jobs_router
+from app.jobs.service import JobService
+from app.file.service import FileService, close_http_client
+from app.whisper.warmup import warm_up_models
+from app.whisper.process_pool import shutdown_process_pool, start_process_pool
 from app.common.handlers import configure_error_middleware
 
 @asynccontextmanager
 async def lifespan(application: FastAPI) -> AsyncGenerator[None, None]:
+    # Pick up jobs interrupted by the last shutdown and expire old results
+    job_service = JobService.create(settings)
+    if settings.JOB_RESUME_ON_STARTUP:
+        await job_service.resume_pending()
+    purge_task = asyncio.create_task(job_service.purge_expired_periodically())
+    # Remove scratch files orphaned by crashes, now and periodically
+    janitor_task = asyncio.create_task(FileService(settings).remove_orphans_periodically())
+    # Load and warm the models without delaying startup; readiness reports progress.
+    # With the process backend the workers own the models and warm up their own.
+    warmup_task = None
+    if settings.EXECUTION_BACKEND == "process":
+        warmup_task = asyncio.create_task(asyncio.to_thread(start_process_pool, settings))
+    elif settings.MODEL_WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(asyncio.to_thread(warm_up_models, settings))
     try:
         # Only should be used in development, most preferred to use alembic to track migrations
         # await create_db_and_tables()
         yield
         print("Shutting Down Server")
     finally:
-        pass
+        purge_task.cancel()
+        janitor_task.cancel()
+        if warmup_task is not None:
+            warmup_task.cancel()
+        await close_http_client()
+        shutdown_process_pool()
 
 
 def register_routers(app: FastAPI) -> None:
     """Register all application routers/controllers"""
     app.include_router(health_router)
     app.include_router(whisper_router)
+    app.include_router(jobs_router)
 
 def create_app() -> FastAPI:
     app = FastAPI(
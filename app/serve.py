@@ -0,0 +1,156 @@
+"""Preload-then-fork server for running several workers on one machine.
+
+``uvicorn --workers N`` starts N fresh interpreters that each load every
+model. Here the torch models (pyannote diarization, AST) are loaded once in
+this parent process, then the workers are forked from it: the weights live in
+pages shared copy-on-write between all workers, since inference never writes
+to them, so RAM no longer grows with the worker count. Each worker runs its
+own uvicorn server on the shared listening socket with a 1/N slice of the
+CPUs as its thread budget.
+
+The CTranslate2 Whisper model is not fork-safe (its thread pool and
+allocator state do not survive a fork) and is loaded by each worker's own
+warm-up instead. CUDA cannot be used across a fork either, so nothing is
+preloaded when a GPU is present.
+
+Usage: python -m app.serve --port 8000 --workers 4
+"""
+import gc
+import os
+import time
+import signal
+import argparse
+import torch
+import uvicorn
+from settings.config import settings
+from app.whisper.service import get_ast_model, get_diarization_pipeline
+
+# Seconds to wait before replacing a worker that exited unexpectedly
+RESTART_DELAY_SECONDS = 1.0
+
+
+def preload_models() -> None:
+    if torch.cuda.is_available():
+        print("[Serve] CUDA is available; models are loaded per worker instead of preloaded")
+        return
+
+    # With a single intra-op thread torch never starts its OpenMP pool here,
+    # which the forked workers could not use anyway
+    torch.set_num_threads(1)
+
+    for name in settings.SERVE_PRELOAD_MODELS:
+        print(f"[Serve] Preloading {name} model...")
+        if name == "diarization":
+            get_diarization_pipeline(settings.HF_TOKEN)
+        elif name == "ast":
+            get_ast_model()
+
+
+def worker_threads(workers: int) -> int:
+    if settings.SERVE_WORKER_THREADS > 0:
+        return settings.SERVE_WORKER_THREADS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def run_worker(config: uvicorn.Config, sock, threads: int) -> None:
+    """Body of a forked worker; never returns."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    # Explicit budgets take precedence over the per-worker share
+    if settings.WHISPER_CPU_THREADS == 0:
+        settings.WHISPER_CPU_THREADS = max(1, threads // max(1, settings.WHISPER_REPLICAS))
+    if settings.DIARIZATION_TORCH_THREADS == 0:
+        settings.DIARIZATION_TORCH_THREADS = threads
+    # The diarization pipeline may already be loaded, so apply the torch budget directly
+    torch.set_num_threads(settings.DIARIZATION_TORCH_THREADS)
+
+    exit_code = 0
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        print(f"[Serve] worker {os.getpid()} crashed: {e}")
+        exit_code = 1
+    finally:
+        os._exit(exit_code)
+
+
+def serve(host: str, port: int, workers: int, timeout_keep_alive: int, log_level: str) -> None:
+    preload_models()
+
+    config = uvicorn.Config(
+        "app.main:create_app",
+        factory=True,
+        host=host,
+        port=port,
+        timeout_keep_alive=timeout_keep_alive,
+        log_level=log_level,
+    )
+    sock = config.bind_socket()
+    threads = worker_threads(workers)
+
+    # Move everything allocated so far out of the collector's reach, so that
+    # collections in the workers don't write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    children: dict[int, int] = {}
+    stopping = False
+
+    # Every worker takes over the unfinished jobs of workers that are gone when
+    # it starts (see JobStore.requeue_orphaned), including those of the worker it replaces
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            run_worker(config, sock, threads)
+        children[pid] = slot
+        print(f"[Serve] started worker {pid} (slot {slot}, {threads} threads)")
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for slot in range(workers):
+        spawn(slot)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+
+        print(f"[Serve] worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting")
+        time.sleep(RESTART_DELAY_SECONDS)
+        if not stopping:
+            spawn(slot)
+
+    sock.close()
+    print("[Serve] all workers stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Preload models, then fork uvicorn workers sharing them")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout-keep-alive", type=int, default=60)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, max(1, args.workers), args.timeout_keep_alive, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import av  # type: ignore
+import gc
+import io
+import os
+import numpy as np
+import torch
+from typing import BinaryIO, Iterator, Optional, Union
+
+TARGET_SAMPLE_RATE = 16000
+# Raw mono float32 PCM at TARGET_SAMPLE_RATE, as written by the streaming download decoder
+PCM_SUFFIX = ".f32"
+# Next to a PCM file whose zero padding was appended to it: the number of decoded samples
+SAMPLES_SUFFIX = ".samples"
+
+_SAMPLE_BYTES = np.dtype(np.float32).itemsize
+
+
+class DecodedAudio:
+    """Mono 16 kHz float32 PCM for one job, decoded once.
+
+    Whisper, the diarization pipeline and the AST event stages all read from
+    ``samples`` (or zero-copy slices of it) instead of re-decoding the file.
+    ``samples`` may be a view into a larger zero-filled ``buffer`` (typically a
+    memory-mapped file), which lets ``padded`` hand out padded audio without
+    copying.
+    """
+
+    def __init__(self, samples: np.ndarray, sample_rate: int = TARGET_SAMPLE_RATE, buffer: Optional[np.ndarray] = None):
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.buffer = buffer if buffer is not None else samples
+
+    @property
+    def num_samples(self) -> int:
+        return int(self.samples.shape[0])
+
+    @property
+    def duration(self) -> float:
+        return self.num_samples / self.sample_rate
+
+    def frame(self, seconds: float) -> int:
+        """Convert a timestamp to a sample index clamped to the buffer."""
+        return min(max(0, int(seconds * self.sample_rate)), self.num_samples)
+
+    def slice(self, start: float, end: float) -> np.ndarray:
+        """Return a view (no copy) of the samples between two timestamps."""
+        return self.samples[self.frame(start):self.frame(end)]
+
+    def padded(self, multiple: int) -> np.ndarray:
+        """The samples zero-padded to a multiple of ``multiple`` samples.
+
+        A view of ``buffer`` when it reserves enough zeroed tail, else a copy.
+        """
+        length = padded_length(self.num_samples, multiple)
+        if length <= self.buffer.shape[0]:
+            return self.buffer[:length]
+
+        return np.pad(self.samples, (0, length - self.num_samples))
+
+    def as_tensor(self, samples: Optional[np.ndarray] = None) -> torch.Tensor:
+        """Return the samples (or the given view of them) as a (1, n) tensor sharing the same memory."""
+        return torch.from_numpy(self.samples if samples is None else samples).unsqueeze(0)
+
+
+def padded_length(num_samples: int, multiple: int) -> int:
+    return -(-num_samples // multiple) * multiple if multiple > 1 else num_samples
+
+
+def _decoded_chunks(source: Union[str, BinaryIO], sample_rate: int, mono: bool) -> Iterator[np.ndarray]:
+    """Resampled float32 chunks of shape ``(channels, n)``, in stream order."""
+    with av.open(source, mode="r", metadata_errors="ignore") as container:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="fltp", layout="mono" if mono else stream.layout.name, rate=sample_rate)
+
+        for frame in _valid_frames(container.decode(stream)):
+            for resampled in resampler.resample(frame):
+                yield resampled.to_ndarray()
+
+        # Flush the samples still buffered in the resampler
+        for resampled in resampler.resample(None):
+            yield resampled.to_ndarray()
+
+    # The resampler's native objects are only freed by a collection pass
+    # (same workaround as faster_whisper.decode_audio)
+    del resampler
+    gc.collect()
+
+
+def _valid_frames(frames: Iterator[av.AudioFrame]) -> Iterator[av.AudioFrame]:
+    """Skip frames FFmpeg reports as invalid instead of failing the whole file."""
+    while True:
+        try:
+            frame = next(frames)
+        except StopIteration:
+            break
+        except av.error.InvalidDataError:
+            continue
+
+        yield frame
+
+
+def decode_audio(source: Union[str, BinaryIO], sample_rate: int = TARGET_SAMPLE_RATE, mono: bool = True) -> np.ndarray:
+    """Decode any container FFmpeg can read straight to float32 PCM at ``sample_rate``.
+
+    Frames are resampled (and downmixed when ``mono``) by PyAV as they are
+    demuxed, so the input is probed and read once and nothing is written to
+    disk. Returns shape ``(num_samples,)`` when ``mono``, else
+    ``(channels, num_samples)``.
+    """
+    chunks = list(_decoded_chunks(source, sample_rate, mono))
+
+    if not chunks:
+        return np.zeros(0, dtype=np.float32) if mono else np.zeros((0, 0), dtype=np.float32)
+
+    samples = np.concatenate(chunks, axis=1)
+
+    return samples[0] if mono else samples
+
+
+def decode_audio_to_file(source: Union[str, BinaryIO], pcm_path: str, sample_rate: int = TARGET_SAMPLE_RATE) -> None:
+    """Decode to mono float32 PCM written chunk by chunk to ``pcm_path``; memory use stays flat."""
+    with open(pcm_path, "wb") as f:
+        for chunk in _decoded_chunks(source, sample_rate, mono=True):
+            f.write(chunk[0].tobytes())
+
+
+def map_pcm_file(pcm_path: str, pad_multiple: int = 1) -> DecodedAudio:
+    """Memory-map a raw PCM file, reserving a zeroed tail up to a multiple of ``pad_multiple``.
+
+    The tail is appended to the file with ``truncate``, as sparse zeros, so
+    padded views cost neither a copy nor extra resident memory. The decoded
+    length is first recorded next to the file (``SAMPLES_SUFFIX``), so
+    mapping it again, with any ``pad_multiple``, gives the same samples. The
+    map is copy-on-write: the samples are never modified through it.
+    """
+    samples_path = pcm_path + SAMPLES_SUFFIX
+    file_samples = os.path.getsize(pcm_path) // _SAMPLE_BYTES
+    recorded = os.path.exists(samples_path)
+    if recorded:
+        with open(samples_path) as f:
+            num_samples = int(f.read())
+    else:
+        num_samples = file_samples
+    length = padded_length(num_samples, pad_multiple)
+
+    if length == 0:
+        return DecodedAudio(np.zeros(0, dtype=np.float32), TARGET_SAMPLE_RATE)
+
+    if length > file_samples:
+        if not recorded:
+            with open(samples_path + ".tmp", "w") as f:
+                f.write(str(num_samples))
+            os.replace(samples_path + ".tmp", samples_path)
+        os.truncate(pcm_path, length * _SAMPLE_BYTES)
+        file_samples = length
+    buffer = np.memmap(pcm_path, dtype=np.float32, mode="c", shape=(file_samples,))
+
+    return DecodedAudio(buffer[:num_samples], TARGET_SAMPLE_RATE, buffer)
+
+
+def load_audio(source: Union[str, bytes], pad_multiple: int = 1) -> DecodedAudio:
+    """Decode a file (or in-memory file contents) once to mono 16 kHz float32.
+
+    Files are decoded to a ``PCM_SUFFIX`` file next to them and memory-mapped,
+    so even hours of audio are paged in on demand rather than held in RSS;
+    in-memory sources are decoded in memory. Either way the buffer reserves
+    zeros up to a multiple of ``pad_multiple`` for ``DecodedAudio.padded``.
+    """
+    if isinstance(source, bytes):
+        chunks = list(_decoded_chunks(io.BytesIO(source), TARGET_SAMPLE_RATE, mono=True))
+        num_samples = sum(chunk.shape[1] for chunk in chunks)
+
+        buffer = np.zeros(padded_length(num_samples, pad_multiple), dtype=np.float32)
+        offset = 0
+        for chunk in chunks:
+            buffer[offset:offset + chunk.shape[1]] = chunk[0]
+            offset += chunk.shape[1]
+
+        return DecodedAudio(buffer[:num_samples], TARGET_SAMPLE_RATE, buffer)
+
+    if not source.endswith(PCM_SUFFIX):
+        # Not decoded while it was downloaded; decode next to the file once
+        pcm_path = source + PCM_SUFFIX
+        decode_audio_to_file(source, pcm_path)
+        source = pcm_path
+
+    return map_pcm_file(source, pad_multiple)
@@ -0,0 +1,293 @@
+import time
+import threading
+import dataclasses
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Hashable, Iterator, Optional
+from faster_whisper.tokenizer import Tokenizer  # type: ignore
+from faster_whisper.transcribe import BatchedInferencePipeline, Segment, TranscriptionOptions, Word  # type: ignore
+from .audio import DecodedAudio
+from .long_audio import find_split_points
+from .whisper_pool import WhisperReplicaPool
+
+# Without VAD, cuts between chunks aim for this length and move to the quietest moment within
+# SPLIT_SEARCH_SECONDS of it, so no chunk is longer than Whisper's 30 s window
+CHUNK_SECONDS = 24.0
+SPLIT_SEARCH_SECONDS = 6.0
+
+# One scheduler per loaded Whisper model, by model size or path
+_schedulers: dict[str, "WhisperBatchScheduler"] = {}
+_scheduler_lock = threading.Lock()
+
+
+class _ChunkRequest:
+    def __init__(self, features: np.ndarray, metadata: dict, deadline: float):
+        self.features = features
+        self.metadata = metadata
+        self.deadline = deadline
+        self.future: "Future[list[dict]]" = Future()
+
+
+def _batch_key(tokenizer: Tokenizer, options: TranscriptionOptions) -> Hashable:
+    """Chunks can share a batch when they decode with the same prompt and options.
+
+    ``clip_timestamps`` only describes where a job's chunks came from and the
+    no-speech thresholds are applied to each job's results afterwards, so
+    they do not split batches.
+    """
+    return tokenizer.language_code, tokenizer.task, repr(dataclasses.replace(options, clip_timestamps=[], no_speech_threshold=None, log_prob_threshold=None))
+
+
+def _is_silence(chunk: list[dict], options: TranscriptionOptions) -> bool:
+    """Whether a decoded chunk is dropped as silence, by the rule ``WhisperModel.transcribe`` skips windows with.
+
+    The stock batched pipeline keeps every chunk, hallucinations on silence included.
+    """
+    if not chunk or options.no_speech_threshold is None:
+        return False
+    # All segments of a chunk carry the chunk's probabilities
+    silent = chunk[0]["no_speech_prob"] > options.no_speech_threshold
+    if options.log_prob_threshold is not None and chunk[0]["avg_logprob"] > options.log_prob_threshold:
+        silent = False
+    return silent
+
+
+class WhisperBatchScheduler:
+    """Decodes 30 s chunks submitted by any number of jobs in shared batches.
+
+    One decoding thread runs per replica of the pool, each with its own
+    batched pipeline and checking out a replica per batch, so up to
+    ``replicas`` batches are in flight. Chunks are grouped by decoding
+    options; a group is decoded once it holds ``max_batch_size`` chunks or its
+    oldest chunk has waited ``max_wait_seconds``, whichever comes first, and
+    each chunk's future receives that chunk's decoded segments.
+    """
+
+    def __init__(self, whisper_pool: WhisperReplicaPool, max_batch_size: int, max_wait_seconds: float):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self.batches = 0
+        self.chunks = 0
+
+        self._whisper_pool = whisper_pool
+        self._condition = threading.Condition()
+        self._closed = False
+        self._pending: dict[Hashable, tuple[Tokenizer, TranscriptionOptions, "deque[_ChunkRequest]"]] = {}
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"whisper-batcher-{i}", daemon=True)
+            for i in range(whisper_pool.replicas)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, features: np.ndarray, tokenizer: Tokenizer, metadata: dict, options: TranscriptionOptions) -> "Future[list[dict]]":
+        request = _ChunkRequest(features, metadata, time.monotonic() + self.max_wait_seconds)
+
+        with self._condition:
+            group = self._pending.setdefault(_batch_key(tokenizer, options), (tokenizer, options, deque()))
+            group[2].append(request)
+            self._condition.notify()
+
+        return request.future
+
+    def close(self) -> None:
+        """Stop the decoding threads once the chunks already submitted are decoded."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def status(self) -> dict:
+        with self._condition:
+            pending = sum(len(group[2]) for group in self._pending.values())
+            batches, chunks = self.batches, self.chunks
+        return {
+            "batches": batches,
+            "chunks": chunks,
+            "average_batch_size": round(chunks / batches, 2) if batches else 0.0,
+            "pending_chunks": pending,
+        }
+
+    def _next_batch(self) -> Optional[tuple[Tokenizer, TranscriptionOptions, list[_ChunkRequest]]]:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                due = [
+                    key for key, (_, _, queue) in self._pending.items()
+                    if len(queue) >= self.max_batch_size or queue[0].deadline <= now or self._closed
+                ]
+
+                if due:
+                    # Of the groups that are full or out of time, the one waiting longest goes first
+                    key = min(due, key=lambda key: self._pending[key][2][0].deadline)
+                    tokenizer, options, queue = self._pending[key]
+                    batch = [queue.popleft() for _ in range(min(len(queue), self.max_batch_size))]
+                    if not queue:
+                        del self._pending[key]
+                    if self._pending:
+                        # Another decoding thread may be able to take what is left
+                        self._condition.notify()
+                    return tokenizer, options, batch
+
+                if self._pending:
+                    self._condition.wait(min(queue[0].deadline for _, _, queue in self._pending.values()) - now)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self) -> None:
+        # The word-timing heuristics keep state on the pipeline, so each thread has its own
+        pipeline = BatchedInferencePipeline(self._whisper_pool.model)
+
+        while (next_batch := self._next_batch()) is not None:
+            tokenizer, options, batch = next_batch
+
+            # Chunks of jobs that have gone away were cancelled while they waited
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                # The word-timing heuristics carry the last speech time from chunk to
+                # chunk; chunks of different jobs are unrelated, so start each batch fresh
+                pipeline.last_speech_timestamp = 0.0
+                with self._whisper_pool.checkout():
+                    outputs = pipeline.forward(
+                        np.stack([request.features for request in batch]),
+                        tokenizer,
+                        [request.metadata for request in batch],
+                        options,
+                    )
+            except BaseException as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            with self._condition:
+                self.batches += 1
+                self.chunks += len(batch)
+            for request, output in zip(batch, outputs):
+                request.future.set_result(output)
+
+
+class _CheckedOutModel:
+    """The pool's model, with language detection (an encoder pass) run on a checked-out replica.
+
+    Everything else the pipeline reads from it (feature extractor, tokenizer
+    settings, ...) is passed through.
+    """
+
+    def __init__(self, whisper_pool: WhisperReplicaPool):
+        self._whisper_pool = whisper_pool
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._whisper_pool.model, name)
+
+    def detect_language(self, *args: Any, **kwargs: Any) -> Any:
+        with self._whisper_pool.checkout() as model:
+            return model.detect_language(*args, **kwargs)
+
+
+class ScheduledBatchPipeline(BatchedInferencePipeline):
+    """faster-whisper's batched pipeline with decoding handed to a shared scheduler.
+
+    VAD chunking, feature extraction and language detection still happen per
+    job in ``transcribe`` (language detection on a replica checked out for
+    it); only the chunk decoding is batched, together with the chunks of
+    every other job using the scheduler. At most two batches' worth of a
+    job's chunks are queued at once, so one long file cannot hold back jobs
+    that arrive after it. Chunks the model finds silent are dropped by
+    ``no_speech_threshold`` as in sequential decoding.
+    """
+
+    def __init__(self, whisper_pool: WhisperReplicaPool, scheduler: WhisperBatchScheduler):
+        super().__init__(_CheckedOutModel(whisper_pool))
+        self.scheduler = scheduler
+
+    # Replaces a private method of faster-whisper 1.1.0's pipeline (also relying on ``forward`` and
+    # ``last_speech_timestamp``); tests/test_batching.py checks it against the stock one
+    def _batched_segments_generator(self, features: np.ndarray, tokenizer: Tokenizer, chunks_metadata: list[dict], batch_size: int, options: TranscriptionOptions, log_progress: bool) -> Iterator[Segment]:
+        window = 2 * self.scheduler.max_batch_size
+        futures: "deque[Future[list[dict]]]" = deque()
+        chunks = iter(zip(features, chunks_metadata))
+        seg_idx = 0
+
+        def submit_next() -> None:
+            chunk = next(chunks, None)
+            if chunk is not None:
+                futures.append(self.scheduler.submit(chunk[0], tokenizer, chunk[1], options))
+
+        try:
+            for _ in range(window):
+                submit_next()
+
+            while futures:
+                output = futures.popleft().result()
+                submit_next()
+                if _is_silence(output, options):
+                    continue
+
+                for segment in output:
+                    seg_idx += 1
+                    yield Segment(
+                        seek=segment["seek"],
+                        id=seg_idx,
+                        text=segment["text"],
+                        start=round(segment["start"], 3),
+                        end=round(segment["end"], 3),
+                        words=None if not options.word_timestamps else [Word(**word) for word in segment["words"]],
+                        tokens=segment["tokens"],
+                        avg_logprob=segment["avg_logprob"],
+                        no_speech_prob=segment["no_speech_prob"],
+                        compression_ratio=segment["compression_ratio"],
+                        temperature=options.temperatures[0],
+                    )
+        finally:
+            # The job failed or stopped reading; drop its chunks still waiting for a batch
+            for future in futures:
+                future.cancel()
+
+
+def pause_clip_timestamps(audio: DecodedAudio) -> list[dict]:
+    """Consecutive chunks of at most 30 s covering the whole audio, cut at pauses, for batched decoding without VAD."""
+    bounds = [0, *find_split_points(audio, CHUNK_SECONDS, SPLIT_SEARCH_SECONDS), audio.num_samples]
+    return [{"start": start, "end": end} for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def get_batch_scheduler(model_size_or_path: str, whisper_pool: WhisperReplicaPool, max_batch_size: int, max_wait_seconds: float) -> WhisperBatchScheduler:
+    with _scheduler_lock:
+        scheduler = _schedulers.get(model_size_or_path)
+        if scheduler is None:
+            print(f"Starting Whisper batch scheduler for {model_size_or_path} (batch size {max_batch_size}, max wait {max_wait_seconds * 1000:.0f} ms)...")
+            scheduler = _schedulers[model_size_or_path] = WhisperBatchScheduler(whisper_pool, max_batch_size, max_wait_seconds)
+
+    return scheduler
+
+
+def close_batch_scheduler(model_size_or_path: str) -> None:
+    """Stop the scheduler of a model that is being unloaded, if it has one."""
+    with _scheduler_lock:
+        scheduler = _schedulers.pop(model_size_or_path, None)
+
+    if scheduler is not None:
+        scheduler.close()
+
+
+def batch_scheduler_status() -> Optional[dict[str, Any]]:
+    """Totals over the schedulers of all loaded models; None before batched decoding has run."""
+    with _scheduler_lock:
+        schedulers = list(_schedulers.values())
+    if not schedulers:
+        return None
+
+    statuses = [scheduler.status() for scheduler in schedulers]
+    batches = sum(status["batches"] for status in statuses)
+    chunks = sum(status["chunks"] for status in statuses)
+    return {
+        "batches": batches,
+        "chunks": chunks,
+        "average_batch_size": round(chunks / batches, 2) if batches else 0.0,
+        "pending_chunks": sum(status["pending_chunks"] for status in statuses),
+    }
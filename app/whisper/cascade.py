@@ -0,0 +1,126 @@
+import itertools
+import threading
+import dataclasses
+from typing import Any, Iterable, Iterator, Tuple
+from faster_whisper.transcribe import Segment, TranscriptionInfo  # type: ignore
+from .audio import DecodedAudio
+from .long_audio import keep_owned_words, shift_segment
+from .whisper_pool import WhisperReplicaPool
+
+# Audio decoded around an escalated range so the large model has context; words there stay the fast model's
+ESCALATION_PADDING_SECONDS = 1.0
+
+_stats_lock = threading.Lock()
+_stats = {"jobs": 0, "segments": 0, "escalated_segments": 0, "audio_seconds": 0.0, "escalated_seconds": 0.0}
+
+
+@dataclasses.dataclass
+class CascadeTranscriptionInfo(TranscriptionInfo):
+    # Share of the audio's duration re-decoded with the large model
+    escalated_fraction: float = 0.0
+
+
+def needs_escalation(segment: Segment, min_avg_logprob: float, min_word_probability: float, max_compression_ratio: float) -> bool:
+    """A segment the fast model is unsure of: low average log-probability, a low-probability word, or repetitive text."""
+    return (
+        segment.avg_logprob < min_avg_logprob
+        or segment.compression_ratio > max_compression_ratio
+        or any(word.probability < min_word_probability for word in segment.words or ())
+    )
+
+
+def _escalated_runs(segments: list[Segment], *thresholds: float) -> list[Tuple[int, int]]:
+    """Index ranges ``[first, last]`` of consecutive segments that need escalation."""
+    runs: list[Tuple[int, int]] = []
+    for index, segment in enumerate(segments):
+        if not needs_escalation(segment, *thresholds):
+            continue
+        if runs and runs[-1][1] == index - 1:
+            runs[-1] = (runs[-1][0], index)
+        else:
+            runs.append((index, index))
+    return runs
+
+
+def _redecode(whisper_pool: WhisperReplicaPool, audio: DecodedAudio, start: float, end: float, options: dict[str, Any]) -> list[Segment]:
+    """Decode ``[start, end)`` seconds with the large model, keeping the words whose midpoint lies inside."""
+    decode_start = max(0, int((start - ESCALATION_PADDING_SECONDS) * audio.sample_rate))
+    decode_end = min(audio.num_samples, int((end + ESCALATION_PADDING_SECONDS) * audio.sample_rate))
+    offset = decode_start / audio.sample_rate
+
+    kept = []
+    with whisper_pool.checkout() as model:
+        segments, _ = model.transcribe(audio.samples[decode_start:decode_end], **options)
+
+        for segment in segments:
+            owned = keep_owned_words(shift_segment(segment, offset), start, end)
+            if owned is not None:
+                kept.append(owned)
+
+    return kept
+
+
+def transcribe_cascade(fast_pool: WhisperReplicaPool, large_pool: WhisperReplicaPool, audio: DecodedAudio, min_avg_logprob: float, min_word_probability: float, max_compression_ratio: float, **options: Any) -> Tuple[Iterator[Segment], CascadeTranscriptionInfo]:
+    """Transcribe with the fast model, re-decoding only the segments it is unsure of with the large one.
+
+    The fast model transcribes the whole recording first. Runs of consecutive
+    segments that cross any threshold are decoded again by the large model on
+    just their time range (plus ``ESCALATION_PADDING_SECONDS`` of context),
+    and its words replace the fast model's there. Segments are yielded in
+    order while the escalated ranges are decoded. The large model decodes in
+    the language the fast model detected, since short ranges say little about
+    the language.
+    """
+    with fast_pool.checkout() as model:
+        segments, fast_info = model.transcribe(audio.samples, **options)
+        segments = list(segments)
+
+    runs = _escalated_runs(segments, min_avg_logprob, min_word_probability, max_compression_ratio)
+    escalated_seconds = sum(segments[last].end - segments[first].start for first, last in runs)
+    escalated_segments = sum(last - first + 1 for first, last in runs)
+    print(f"Cascade: escalating {escalated_segments}/{len(segments)} segments ({escalated_seconds:.1f}s of {audio.duration:.1f}s)")
+
+    with _stats_lock:
+        _stats["jobs"] += 1
+        _stats["segments"] += len(segments)
+        _stats["escalated_segments"] += escalated_segments
+        _stats["audio_seconds"] += audio.duration
+        _stats["escalated_seconds"] += escalated_seconds
+
+    info = CascadeTranscriptionInfo(
+        **{field.name: getattr(fast_info, field.name) for field in dataclasses.fields(TranscriptionInfo)},
+        escalated_fraction=round(escalated_seconds / audio.duration, 4) if audio.duration else 0.0,
+    )
+    large_options = dict(options, language=fast_info.language)
+
+    def merged() -> Iterator[Segment]:
+        segment_ids = itertools.count(1)
+
+        def renumbered(run: Iterable[Segment]) -> Iterator[Segment]:
+            for segment in run:
+                yield dataclasses.replace(segment, id=next(segment_ids))
+
+        position = 0
+        for first, last in runs:
+            yield from renumbered(segments[position:first])
+            redecoded = _redecode(large_pool, audio, segments[first].start, segments[last].end, large_options)
+            if not redecoded:
+                # The large model found no words there; an unsure transcript beats a silent gap
+                print(f"Cascade: nothing re-decoded for {segments[first].start:.2f}s-{segments[last].end:.2f}s, keeping the fast model's segments")
+                redecoded = segments[first:last + 1]
+            yield from renumbered(redecoded)
+            position = last + 1
+        yield from renumbered(segments[position:])
+
+    return merged(), info
+
+
+def cascade_status() -> dict:
+    """Totals over the cascade transcriptions run in this process."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    stats["escalated_fraction"] = round(stats["escalated_seconds"] / stats["audio_seconds"], 4) if stats["audio_seconds"] else 0.0
+    stats["audio_seconds"] = round(stats["audio_seconds"], 3)
+    stats["escalated_seconds"] = round(stats["escalated_seconds"], 3)
+    return stats
@@ -0,0 +1,106 @@
+import copy
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+from pyannote.audio import Pipeline  # type: ignore
+
+# (min_duration_off, clustering_threshold, min_cluster_size)
+DiarizationParams = Tuple[float, float, int]
+
+
+class DiarizationPipelinePool:
+    """Instantiated copies of the diarization pipeline, keyed by hyper-parameters.
+
+    ``Pipeline.instantiate`` mutates the pipeline in place, so a single shared
+    pipeline cannot serve concurrent jobs with different parameters. Each copy
+    here shares the loaded segmentation and embedding models with the base
+    pipeline and only owns its parameter state. A copy is checked out by one
+    job at a time and at most ``max_size`` copies exist: checkouts wait while
+    that many are in use, idle copies are kept for reuse and the least
+    recently used ones are evicted to make room for new ones.
+    """
+
+    def __init__(self, base_pipeline: Pipeline, max_size: int = 4):
+        self._base_pipeline = base_pipeline
+        self._max_size = max(1, max_size)
+        self._idle: "OrderedDict[DiarizationParams, list[Pipeline]]" = OrderedDict()
+        self._in_use = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def checkout(self, min_duration_off: float, clustering_threshold: float, min_cluster_size: int) -> Iterator[Pipeline]:
+        key: DiarizationParams = (min_duration_off, clustering_threshold, min_cluster_size)
+        pipeline = self._acquire(key)
+        try:
+            yield pipeline
+        finally:
+            self._release(key, pipeline)
+
+    def _acquire(self, key: DiarizationParams) -> Pipeline:
+        with self._condition:
+            while self._in_use >= self._max_size:
+                self._condition.wait()
+
+            self._in_use += 1
+            idle = self._idle.get(key)
+            if idle:
+                self._idle.move_to_end(key)
+                pipeline = idle.pop()
+                if not idle:
+                    del self._idle[key]
+                return pipeline
+
+            # Make room for the copy about to be built
+            self._evict()
+
+        # Building a copy is cheap compared to a diarization run, but keep it
+        # outside the lock so other jobs can check out meanwhile.
+        try:
+            return self._create(key)
+        except BaseException:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, key: DiarizationParams, pipeline: Pipeline) -> None:
+        with self._condition:
+            self._in_use -= 1
+            self._idle.setdefault(key, []).append(pipeline)
+            self._idle.move_to_end(key)
+            self._evict()
+            self._condition.notify()
+
+    def _evict(self) -> None:
+        # Only idle copies are evicted; copies checked out by running jobs
+        # count towards the limit until they are returned.
+        while self._idle and self._idle_count() + self._in_use > self._max_size:
+            key, idle = next(iter(self._idle.items()))
+            idle.pop(0)
+            if not idle:
+                del self._idle[key]
+
+    def _idle_count(self) -> int:
+        return sum(len(idle) for idle in self._idle.values())
+
+    def _create(self, key: DiarizationParams) -> Pipeline:
+        min_duration_off, clustering_threshold, min_cluster_size = key
+
+        # Pre-seeding the deepcopy memo with the models makes the copy reference
+        # the already loaded weights instead of duplicating them.
+        base = self._base_pipeline
+        shared = {id(obj): obj for obj in (*base._models.values(), *base._inferences.values())}
+        pipeline = copy.deepcopy(base, memo=shared)
+
+        pipeline.instantiate({
+            "segmentation": {
+                "min_duration_off": min_duration_off,
+            },
+            "clustering": {
+                "threshold": clustering_threshold,
+                "method": "centroid",
+                "min_cluster_size": min_cluster_size,
+            }
+        })
+        return pipeline
@@ -0,0 +1,61 @@
+import numpy as np
+from typing import Tuple
+
+
+class EventTimeline:
+    """AST window scores for a whole file, sorted by window centre time.
+
+    Built once per job; turns look up their windows with a binary search on
+    ``mids`` instead of re-running the model on their own audio.
+    """
+
+    def __init__(self, mids: np.ndarray, scores: np.ndarray, labels: list[str]):
+        self.mids = mids
+        self.scores = scores
+        self.labels = labels
+
+    def __len__(self) -> int:
+        return int(self.mids.shape[0])
+
+    def window_range(self, start: float, end: float, max_distance: float = 0.0) -> Tuple[int, int]:
+        """Index range of the windows centred inside [start, end].
+
+        A turn shorter than the window hop may contain no centre at all; it then
+        falls back to the single nearest window if that one is within
+        ``max_distance`` seconds of the turn's centre.
+        """
+        lo = int(np.searchsorted(self.mids, start, side="left"))
+        hi = int(np.searchsorted(self.mids, end, side="right"))
+
+        if lo == hi and len(self):
+            centre = (start + end) / 2
+            candidates = [idx for idx in (lo - 1, lo) if 0 <= idx < len(self)]
+            nearest = min(candidates, key=lambda idx: abs(self.mids[idx] - centre))
+            if abs(self.mids[nearest] - centre) <= max_distance:
+                return nearest, nearest + 1
+
+        return lo, hi
+
+    def pooled_labels(self, lo: int, hi: int, threshold: float, allowed_labels: set[str], pooling: str = "max") -> set[str]:
+        """Labels whose max- or mean-pooled score over windows [lo, hi) reaches ``threshold``."""
+        if hi <= lo:
+            return set()
+
+        window_scores = self.scores[lo:hi]
+        pooled = window_scores.mean(axis=0) if pooling == "mean" else window_scores.max(axis=0)
+
+        return {
+            self.labels[idx]
+            for idx in np.flatnonzero(pooled >= threshold).tolist()
+            if self.labels[idx] in allowed_labels
+        }
+
+    def detections(self, lo: int, hi: int, threshold: float, allowed_labels: set[str]) -> list[tuple[float, str]]:
+        """(window centre, label) pairs over windows [lo, hi), in window-then-label order."""
+        if hi <= lo:
+            return []
+
+        allowed = np.array([label in allowed_labels for label in self.labels], dtype=bool)
+        hits = np.argwhere((self.scores[lo:hi] >= threshold) & allowed)
+
+        return [(float(self.mids[lo + window_idx]), self.labels[label_idx]) for window_idx, label_idx in hits.tolist()]
@@ -0,0 +1,158 @@
+import threading
+import dataclasses
+import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterator, Optional, Tuple
+from faster_whisper.transcribe import Segment, TranscriptionInfo  # type: ignore
+from .audio import DecodedAudio
+from .whisper_pool import WhisperReplicaPool
+
+# A cut point is moved to the quietest moment within this distance of its target
+SPLIT_SEARCH_SECONDS = 30.0
+# Context decoded past each cut on both sides; words there belong to the neighbouring chunk
+BOUNDARY_OVERLAP_SECONDS = 2.0
+# Energy is measured over frames of this length and smoothed over the quiet window
+_FRAME_SECONDS = 0.02
+_QUIET_WINDOW_SECONDS = 0.5
+
+_chunk_executor: Optional[ThreadPoolExecutor] = None
+_chunk_executor_lock = threading.Lock()
+
+
+def get_chunk_executor(max_workers: int) -> ThreadPoolExecutor:
+    global _chunk_executor
+
+    if _chunk_executor is None:
+        with _chunk_executor_lock:
+            if _chunk_executor is None:
+                _chunk_executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="long-audio")
+
+    return _chunk_executor
+
+
+def find_split_points(audio: DecodedAudio, chunk_seconds: float, search_seconds: float = SPLIT_SEARCH_SECONDS) -> list[int]:
+    """Sample indices splitting the audio into chunks of about ``chunk_seconds``.
+
+    Each cut is placed at the lowest short-term energy within
+    ``search_seconds`` of its target, i.e. in a pause rather than
+    mid-word. Only the samples around each target are read. No chunk is
+    longer than ``chunk_seconds + search_seconds``, nor the last one than
+    1.25 × ``chunk_seconds``.
+    """
+    sample_rate = audio.sample_rate
+    step = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    frame = int(_FRAME_SECONDS * sample_rate)
+    quiet_frames = max(1, int(_QUIET_WINDOW_SECONDS / _FRAME_SECONDS))
+    smoothing = np.full(quiet_frames, 1.0 / quiet_frames, dtype=np.float32)
+
+    points: list[int] = []
+    last = 0
+    # A short final remainder stays attached to the last chunk
+    while last + step + step // 4 < audio.num_samples:
+        target = last + step
+        lo = max(last + step // 2, target - search)
+        hi = min(audio.num_samples, target + search)
+
+        window = audio.samples[lo:hi]
+        frames = window[:len(window) // frame * frame].reshape(-1, frame)
+        energy = np.convolve(np.square(frames, dtype=np.float32).mean(axis=1), smoothing, mode="same")
+
+        cut = lo + int(np.argmin(energy)) * frame + frame // 2
+        points.append(cut)
+        last = cut
+
+    return points
+
+
+def shift_segment(segment: Segment, offset: float) -> Segment:
+    words = None
+    if segment.words is not None:
+        words = [dataclasses.replace(word, start=round(word.start + offset, 3), end=round(word.end + offset, 3)) for word in segment.words]
+    return dataclasses.replace(segment, start=round(segment.start + offset, 3), end=round(segment.end + offset, 3), words=words)
+
+
+def keep_owned_words(segment: Segment, owned_start: float, owned_end: float) -> Optional[Segment]:
+    """Trim a segment to the words whose midpoint lies in ``[owned_start, owned_end)``.
+
+    Chunks overlap, so the same speech is decoded twice near every cut; each
+    word is kept only by the chunk that owns its midpoint.
+    """
+    if not segment.words:
+        mid = (segment.start + segment.end) / 2
+        return segment if owned_start <= mid < owned_end else None
+
+    words = [word for word in segment.words if owned_start <= (word.start + word.end) / 2 < owned_end]
+    if not words:
+        return None
+    if len(words) == len(segment.words):
+        return segment
+
+    return dataclasses.replace(segment, start=words[0].start, end=words[-1].end, text="".join(word.word for word in words), words=words)
+
+
+def _transcribe_chunk(whisper_pool: WhisperReplicaPool, audio: DecodedAudio, start: int, end: int, overlap: int, options: dict[str, Any]) -> Tuple[list[Segment], TranscriptionInfo]:
+    decode_start = max(0, start - overlap)
+    decode_end = min(audio.num_samples, end + overlap)
+    offset = decode_start / audio.sample_rate
+    owned_start, owned_end = start / audio.sample_rate, end / audio.sample_rate
+
+    kept = []
+    with whisper_pool.checkout() as model:
+        segments, info = model.transcribe(audio.samples[decode_start:decode_end], **options)
+
+        for segment in segments:
+            owned = keep_owned_words(shift_segment(segment, offset), owned_start, owned_end)
+            if owned is not None:
+                kept.append(owned)
+
+    return kept, info
+
+
+def transcribe_long_audio(whisper_pool: WhisperReplicaPool, audio: DecodedAudio, split_points: list[int], executor: ThreadPoolExecutor, overlap_seconds: float = BOUNDARY_OVERLAP_SECONDS, **options: Any) -> Tuple[Iterator[Segment], TranscriptionInfo]:
+    """Transcribe the chunks between ``split_points`` in parallel and stitch them back together.
+
+    Chunks are independent (``condition_on_previous_text`` is off), so each is
+    a separate ``transcribe`` call on ``executor``; how many actually decode at
+    once is bounded by the replicas in ``whisper_pool``. Every chunk is decoded with
+    ``overlap_seconds`` of context on both sides, timestamps are shifted to
+    the full recording, and duplicates from the overlaps are dropped.
+    Segments are yielded in order as soon as the chunks before them are done.
+    The language is detected once on the start of the recording so that all
+    chunks agree.
+    """
+    language_probability = 1.0
+    if options.get("language") is None:
+        with whisper_pool.checkout() as model:
+            options["language"], language_probability, _ = model.detect_language(audio.samples)
+
+    bounds = [0, *split_points, audio.num_samples]
+    overlap = int(overlap_seconds * audio.sample_rate)
+    futures: list["Future[Tuple[list[Segment], TranscriptionInfo]]"] = [
+        executor.submit(_transcribe_chunk, whisper_pool, audio, start, end, overlap, options)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    # The first chunk's info stands for the whole recording, with its full duration
+    try:
+        _, first_info = futures[0].result()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    info = dataclasses.replace(first_info, language_probability=language_probability, duration=audio.duration)
+
+    def stitched() -> Iterator[Segment]:
+        segment_id = 0
+        try:
+            for future in futures:
+                segments, _ = future.result()
+                for segment in segments:
+                    segment_id += 1
+                    yield dataclasses.replace(segment, id=segment_id)
+        finally:
+            # Nothing left to wait for if the consumer stopped early or a chunk failed
+            for future in futures:
+                future.cancel()
+
+    return stitched(), info
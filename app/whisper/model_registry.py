@@ -0,0 +1,166 @@
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Tuple
+from .whisper_pool import WhisperReplicaPool
+
+
+class _LoadedModel:
+    def __init__(self, pool: WhisperReplicaPool, size_bytes: int, load_seconds: float):
+        self.pool = pool
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.users = 0
+        self.uses = 0
+        self.last_used = time.time()
+
+
+class WhisperModelRegistry:
+    """Whisper models loaded on demand, keyed by size or path, kept resident under a memory budget.
+
+    A job holds a model between entering and leaving ``use``; models held by
+    running jobs are never evicted. Idle models stay loaded for the next job,
+    and the least recently used ones are unloaded once the loaded models
+    exceed ``max_bytes`` (0 = no limit). The ``resident`` model, the default
+    one that is warmed up at startup, is never evicted.
+
+    ``load`` returns the replica pool of a model; ``size_bytes`` its memory
+    footprint, 0 while unknown (e.g. not downloaded yet); ``unload`` is called
+    with the pool of every evicted model.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], WhisperReplicaPool],
+        size_bytes: Callable[[str], int],
+        resident: str,
+        max_bytes: int = 0,
+        unload: Optional[Callable[[str, WhisperReplicaPool], None]] = None,
+    ):
+        self._load = load
+        self._size_bytes = size_bytes
+        self._unload = unload
+        self.resident = resident
+        self.max_bytes = max_bytes
+
+        self._models: "OrderedDict[str, _LoadedModel]" = OrderedDict()
+        self._load_locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.loads = 0
+        self.evictions = 0
+        self.hits = 0
+
+    @contextmanager
+    def use(self, model_size_or_path: str) -> Iterator[WhisperReplicaPool]:
+        entry = self._acquire(model_size_or_path)
+        try:
+            yield entry.pool
+        finally:
+            self._release(entry)
+
+    def _acquire(self, key: str) -> _LoadedModel:
+        with self._lock:
+            entry = self._hold(key)
+            if entry is not None:
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # One load per model at a time; jobs for other models are not held up
+        with load_lock:
+            with self._lock:
+                entry = self._hold(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry
+
+            # Make room first, so the budget also holds while the new model loads
+            incoming_bytes = self._size_bytes(key)
+            with self._lock:
+                evicted = self._evict(incoming_bytes)
+            self._unload_evicted(evicted)
+
+            print(f"[ModelRegistry] loading {key}")
+            start = time.perf_counter()
+            pool = self._load(key)
+            entry = _LoadedModel(pool, self._size_bytes(key), time.perf_counter() - start)
+
+            with self._lock:
+                self._models[key] = entry
+                self.loads += 1
+                entry.users += 1
+                entry.uses += 1
+                evicted = self._evict()
+
+        self._unload_evicted(evicted)
+        return entry
+
+    def _hold(self, key: str) -> Optional[_LoadedModel]:
+        entry = self._models.get(key)
+        if entry is not None:
+            self._models.move_to_end(key)
+            entry.users += 1
+            entry.uses += 1
+            entry.last_used = time.time()
+        return entry
+
+    def _release(self, entry: _LoadedModel) -> None:
+        with self._lock:
+            entry.users -= 1
+            entry.last_used = time.time()
+            evicted = self._evict()
+
+        self._unload_evicted(evicted)
+
+    def _evict(self, incoming_bytes: int = 0) -> list[Tuple[str, _LoadedModel]]:
+        # Only idle models are evicted; a budget overrun caused by models in use
+        # is trimmed when they are released
+        evicted = []
+        while self.max_bytes > 0 and self._resident_bytes() + incoming_bytes > self.max_bytes:
+            key = next((key for key, entry in self._models.items() if entry.users == 0 and key != self.resident), None)
+            if key is None:
+                break
+            evicted.append((key, self._models.pop(key)))
+            self.evictions += 1
+        return evicted
+
+    def _unload_evicted(self, evicted: list[Tuple[str, _LoadedModel]]) -> None:
+        for key, entry in evicted:
+            print(f"[ModelRegistry] evicting {key} ({entry.size_bytes / 1024 ** 2:.0f} MB)")
+            if self._unload is not None:
+                self._unload(key, entry.pool)
+
+    def loaded_pool(self, model_size_or_path: str) -> Optional[WhisperReplicaPool]:
+        """The replica pool of a model if it is loaded, without loading or holding it."""
+        with self._lock:
+            entry = self._models.get(model_size_or_path)
+            return entry.pool if entry is not None else None
+
+    def _resident_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._models.values())
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self._resident_bytes(),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "models": [
+                    {
+                        "model": key,
+                        "size_bytes": entry.size_bytes,
+                        "load_seconds": round(entry.load_seconds, 3),
+                        "in_use": entry.users,
+                        "uses": entry.uses,
+                        "last_used": entry.last_used,
+                        "pinned": key == self.resident,
+                        "replicas": entry.pool.status(),
+                    }
+                    # Most recently used first
+                    for key, entry in reversed(self._models.items())
+                ],
+            }
@@ -0,0 +1,45 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Literal
+
+ModelState = Literal["not_loaded", "loading", "loaded", "warming", "ready", "failed"]
+MODEL_NAMES = ("whisper", "diarization", "ast")
+
+_status_lock = threading.Lock()
+_status: dict[str, dict] = {
+    name: {"state": "not_loaded", "load_seconds": None, "warmup_seconds": None, "error": None}
+    for name in MODEL_NAMES
+}
+
+
+@contextmanager
+def _tracking(name: str, running: ModelState, done: ModelState, duration_field: str) -> Iterator[None]:
+    with _status_lock:
+        _status[name].update(state=running, error=None)
+
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        with _status_lock:
+            _status[name].update(state="failed", error=str(e))
+        raise
+
+    with _status_lock:
+        _status[name].update({"state": done, duration_field: round(time.perf_counter() - start, 3)})
+
+
+def tracking_load(name: str):
+    """Record a model load: ``loading`` while it runs, then ``loaded`` (or ``failed``) with its duration."""
+    return _tracking(name, "loading", "loaded", "load_seconds")
+
+
+def tracking_warmup(name: str):
+    """Record a warm-up inference: ``warming`` while it runs, then ``ready`` (or ``failed``) with its duration."""
+    return _tracking(name, "warming", "ready", "warmup_seconds")
+
+
+def model_status() -> dict[str, dict]:
+    with _status_lock:
+        return {name: dict(status) for name, status in _status.items()}
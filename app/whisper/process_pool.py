@@ -0,0 +1,254 @@
+import os
+import queue
+import asyncio
+import threading
+import multiprocessing
+from functools import partial
+from multiprocessing.managers import SyncManager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+import torch
+from settings.config import ConfigType, settings as worker_settings
+from .model_status import MODEL_NAMES, model_status
+
+# Worker processes start from a fresh interpreter: torch, CTranslate2 and CUDA state must not be forked
+_mp_context = multiprocessing.get_context("spawn")
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+# Workers put (pid, model status) here once they have started and warmed up
+_status_queue: Any = None
+_segment_manager: Optional[SyncManager] = None
+_process_pool_lock = threading.Lock()
+
+# Model status reported by each worker once it has started (and warmed up), by pid
+_worker_statuses: dict[int, dict[str, dict]] = {}
+
+# Least to most ready; the pool reports each model at its least ready worker's state
+_STATE_ORDER = ("failed", "not_loaded", "loading", "loaded", "warming", "ready")
+
+
+def worker_cpu_sets(workers: int) -> list[list[int]]:
+    """Split the CPUs this process may run on into ``workers`` contiguous slices."""
+    cpus = sorted(os.sched_getaffinity(0))
+    return [cpus[i * len(cpus) // workers:(i + 1) * len(cpus) // workers] or cpus for i in range(workers)]
+
+
+def worker_thread_count(settings: ConfigType) -> int:
+    """Intra-op threads per worker process (PROCESS_POOL_WORKER_THREADS, else an even share of the CPUs)."""
+    if settings.PROCESS_POOL_WORKER_THREADS > 0:
+        return settings.PROCESS_POOL_WORKER_THREADS
+    return max(1, len(os.sched_getaffinity(0)) // max(1, settings.PROCESS_POOL_WORKERS))
+
+
+def _init_worker(threads: int, cpu_sets: Optional[list[list[int]]], slot_counter: Any, status_queue: Any) -> None:
+    """Runs once in every worker process before it accepts jobs."""
+    with slot_counter.get_lock():
+        slot = slot_counter.value
+        slot_counter.value += 1
+
+    if cpu_sets:
+        os.sched_setaffinity(0, cpu_sets[slot % len(cpu_sets)])
+
+    # For native libraries that read their pool size when first used; torch and
+    # CTranslate2 are already imported, so they are configured explicitly below
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS"):
+        os.environ[name] = str(threads)
+
+    torch.set_num_threads(threads)
+    try:
+        # The two torch models run one after the other within a job
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    # Explicit budgets take precedence; models are loaded with these values
+    if worker_settings.WHISPER_CPU_THREADS == 0:
+        worker_settings.WHISPER_CPU_THREADS = max(1, threads // max(1, worker_settings.WHISPER_REPLICAS))
+    if worker_settings.DIARIZATION_TORCH_THREADS == 0:
+        worker_settings.DIARIZATION_TORCH_THREADS = threads
+
+    cpus = f"CPUs {cpu_sets[slot % len(cpu_sets)]}" if cpu_sets else "unpinned"
+    print(f"[ProcessPool] worker {os.getpid()} started (slot {slot}, {threads} threads, {cpus})")
+
+    if worker_settings.MODEL_WARMUP_ENABLED:
+        # Imported here: warmup imports the service module, which imports this one
+        from .warmup import warm_up_models
+        warm_up_models(worker_settings)
+
+    status_queue.put((os.getpid(), model_status()))
+
+
+def get_process_pool(settings: ConfigType) -> ProcessPoolExecutor:
+    global _process_pool, _status_queue
+
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                workers = max(1, settings.PROCESS_POOL_WORKERS)
+                threads = worker_thread_count(settings)
+                cpu_sets = worker_cpu_sets(workers) if settings.PROCESS_POOL_PIN_CPUS else None
+                _status_queue = _mp_context.Queue()
+                print(f"Creating process pool: {workers} workers x {threads} threads{' (pinned)' if cpu_sets else ''}")
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=_mp_context,
+                    initializer=_init_worker,
+                    initargs=(threads, cpu_sets, _mp_context.Value("i", 0), _status_queue),
+                )
+
+    return _process_pool
+
+
+def _get_segment_manager() -> SyncManager:
+    global _segment_manager
+
+    if _segment_manager is None:
+        with _process_pool_lock:
+            if _segment_manager is None:
+                _segment_manager = _mp_context.Manager()
+
+    return _segment_manager
+
+
+def start_process_pool(settings: ConfigType) -> None:
+    """Start every worker now (each warms up its models before taking a job) and record their status.
+
+    Blocking; one trivial task per worker makes the pool spawn all of them,
+    since a new worker is started for every submission while none is idle.
+    """
+    pool = get_process_pool(settings)
+    futures = [pool.submit(os.getpid) for _ in range(pool._max_workers)]
+
+    while len(_worker_statuses) < pool._max_workers:
+        if _process_pool is not pool:
+            # Broken (and being replaced) or shut down while starting
+            return
+        if not _collect_worker_statuses(timeout=1.0):
+            failed = [future for future in futures if future.done() and future.exception() is not None]
+            if failed:
+                print(f"ERROR: Process pool failed to start: {failed[0].exception()}")
+                return
+
+    print(f"Process pool started: {len(_worker_statuses)} workers")
+
+
+def _collect_worker_statuses(timeout: float = 0) -> bool:
+    """Record the statuses workers of the current pool have reported, waiting up to ``timeout`` for one.
+
+    Called by the status readers as well, so workers that report after
+    ``start_process_pool`` returned are still picked up. Returns whether any
+    status was received.
+    """
+    status_queue = _status_queue
+    if status_queue is None:
+        return False
+
+    received = False
+    try:
+        pid, status = status_queue.get(timeout=timeout) if timeout > 0 else status_queue.get_nowait()
+        while True:
+            with _process_pool_lock:
+                # Reported by a pool that has broken since
+                if status_queue is not _status_queue:
+                    return received
+                _worker_statuses[pid] = status
+            received = True
+            pid, status = status_queue.get_nowait()
+    except queue.Empty:
+        return received
+
+
+def _replace_broken_pool(pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool and its workers' statuses, and start a replacement in the background."""
+    global _process_pool, _status_queue
+
+    with _process_pool_lock:
+        if _process_pool is not pool:
+            # Already replaced by another job that saw the pool break
+            return
+        _process_pool = None
+        _status_queue = None
+        _worker_statuses.clear()
+
+    # Readiness reports false until every replacement worker has warmed up;
+    # without this, workers would only be started one by one as jobs arrive
+    threading.Thread(target=start_process_pool, args=(worker_settings,), name="process-pool-restart", daemon=True).start()
+
+
+def worker_model_status() -> dict[str, dict]:
+    """Model status across the workers, each model reported at its least ready worker's state."""
+    _collect_worker_statuses()
+    if not _worker_statuses:
+        return model_status()
+
+    return {
+        name: min((status[name] for status in _worker_statuses.values()), key=lambda s: _STATE_ORDER.index(s["state"]))
+        for name in MODEL_NAMES
+    }
+
+
+def process_pool_ready(settings: ConfigType) -> bool:
+    _collect_worker_statuses()
+    if len(_worker_statuses) < max(1, settings.PROCESS_POOL_WORKERS):
+        return False
+    if not settings.MODEL_WARMUP_ENABLED:
+        return True
+
+    status = worker_model_status()
+    return all(status[name]["state"] == "ready" for name in settings.MODEL_WARMUP_MODELS)
+
+
+def _call_with_segment_queue(fn: Callable[..., Any], segment_queue: Any, args: tuple, kwargs: dict) -> Any:
+    # Runs in the worker: segments go through the managed queue instead of a callback
+    return fn(*args, on_segment=segment_queue.put, **kwargs)
+
+
+def _forward_segments(segment_queue: Any, on_segment: Callable[[dict], None]) -> None:
+    while (segment := segment_queue.get()) is not None:
+        on_segment(segment)
+
+
+async def run_in_process_pool(pool: ProcessPoolExecutor, fn: Callable[..., Any], *args: Any, on_segment: Optional[Callable[[dict], None]] = None, **kwargs: Any) -> Any:
+    """Run ``fn(*args, on_segment=..., **kwargs)`` in a worker process.
+
+    Callbacks cannot cross the process boundary, so when ``on_segment`` is given
+    the worker puts segments on a managed queue and a thread here forwards them
+    to the callback as they arrive.
+    """
+    loop = asyncio.get_running_loop()
+
+    segment_queue = None
+    forwarder = None
+    if on_segment is not None:
+        segment_queue = _get_segment_manager().Queue()
+        forwarder = loop.run_in_executor(None, _forward_segments, segment_queue, on_segment)
+        call = partial(_call_with_segment_queue, fn, segment_queue, args, kwargs)
+    else:
+        call = partial(fn, *args, **kwargs)
+
+    try:
+        return await loop.run_in_executor(pool, call)
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); later jobs get a fresh pool
+        _replace_broken_pool(pool)
+        raise
+    finally:
+        if segment_queue is not None and forwarder is not None:
+            # Everything the worker put is already queued ahead of this
+            segment_queue.put(None)
+            await forwarder
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool, _segment_manager, _status_queue
+
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+            _process_pool = None
+            _status_queue = None
+        if _segment_manager is not None:
+            _segment_manager.shutdown()
+            _segment_manager = None
+        _worker_statuses.clear()
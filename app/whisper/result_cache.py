@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+from app.common.utils.process import pid_alive
+
+# Part of every key; bump it when a change to the pipeline changes what cached entries would hold
+CACHE_VERSION = 1
+
+# Temp files of a write are renamed within milliseconds; older ones were left by a crashed writer
+STALE_TMP_SECONDS = 3600
+
+_cache: Optional["DiskCache"] = None
+_cache_lock = threading.Lock()
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable sha256 over JSON-serialisable key parts (audio hash, parameters, ...) and ``CACHE_VERSION``."""
+    encoded = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+_COUNTERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS counters (
+    namespace TEXT PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0,
+    misses INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class DiskCache:
+    """Size-bounded on-disk cache with least-recently-used eviction.
+
+    Entries are pickled to one file per ``namespace``/``key`` pair ("result",
+    "whisper", "diarization", ...). Sizes, recency and the hit/miss counters
+    per namespace live in a SQLite index next to the files, so every process
+    using the directory (forked server workers, the CPU process pool) sees
+    the others' entries, the budget holds for all of them together, and the
+    LRU order survives a restart.
+
+    Like ``JobStore``, every call opens a short-lived connection. Writes take
+    the database lock up front, so an insert and the eviction it triggers are
+    one step for all processes.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / "index.sqlite3"
+
+        self._remove_stale_tmp_files()
+
+        with self._connect(write=True) as conn:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            conn.execute(_COUNTERS_SCHEMA)
+            self._reconcile(conn)
+            evicted = self._evict(conn)
+
+        self._remove_files(evicted)
+
+    @contextmanager
+    def _connect(self, write: bool = False) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with conn:
+                if write:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+        finally:
+            conn.close()
+
+    def _reconcile(self, conn: sqlite3.Connection) -> None:
+        """Index entry files written before the index existed and drop rows whose file is gone."""
+        on_disk = {}
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            on_disk[path.name] = (stat.st_size, stat.st_mtime)
+
+        indexed = {name for (name,) in conn.execute("SELECT name FROM entries")}
+        conn.executemany(
+            "INSERT OR IGNORE INTO entries (name, size, last_used) VALUES (?, ?, ?)",
+            [(name, size, mtime) for name, (size, mtime) in on_disk.items() if name not in indexed],
+        )
+        conn.executemany("DELETE FROM entries WHERE name = ?", [(name,) for name in indexed - on_disk.keys()])
+
+    def _file_name(self, namespace: str, key: str) -> str:
+        return f"{namespace}-{key}.pkl"
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        name = self._file_name(namespace, key)
+        path = self.directory / name
+
+        with self._connect() as conn:
+            indexed = conn.execute("SELECT 1 FROM entries WHERE name = ?", (name,)).fetchone() is not None
+
+        value = None
+        if indexed:
+            try:
+                value = pickle.loads(path.read_bytes())
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                # A missing file was evicted by another process since the lookup
+                if not isinstance(e, FileNotFoundError):
+                    print(f"WARNING: Dropping unreadable cache entry {name}: {e}")
+                indexed = False
+                with self._connect(write=True) as conn:
+                    conn.execute("DELETE FROM entries WHERE name = ?", (name,))
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        with self._connect(write=True) as conn:
+            if indexed:
+                conn.execute("UPDATE entries SET last_used = ? WHERE name = ?", (time.time(), name))
+            counter = "hits" if indexed else "misses"
+            conn.execute(
+                f"INSERT INTO counters (namespace, {counter}) VALUES (?, 1) "
+                f"ON CONFLICT (namespace) DO UPDATE SET {counter} = {counter} + 1",
+                (namespace,),
+            )
+
+        return value
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+
+        name = self._file_name(namespace, key)
+        path = self.directory / name
+
+        # Write then rename so a concurrent reader never sees a partial entry; the
+        # name is unique per process and thread, as workers share the directory
+        tmp_path = path.with_name(f"{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+        with self._connect(write=True) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (name, size, last_used) VALUES (?, ?, ?)",
+                (name, len(data), time.time()),
+            )
+            evicted = self._evict(conn)
+
+        self._remove_files(evicted)
+
+    def status(self) -> dict:
+        with self._connect() as conn:
+            entries, size_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            counters = conn.execute("SELECT namespace, hits, misses FROM counters").fetchall()
+
+        return {
+            "entries": entries,
+            "size_bytes": size_bytes,
+            "max_size_bytes": self.max_bytes,
+            "hits": {namespace: hits for namespace, hits, _ in counters},
+            "misses": {namespace: misses for namespace, _, misses in counters},
+        }
+
+    def _remove_stale_tmp_files(self) -> None:
+        """Remove temp files left by writers that died between writing and renaming."""
+        now = time.time()
+        for path in self.directory.glob("*.tmp"):
+            # <namespace>-<key>.pkl.<pid>.<thread>.tmp
+            parts = path.name.split(".")
+            writer_pid = int(parts[-3]) if len(parts) >= 3 and parts[-3].isdigit() else 0
+            try:
+                if writer_pid != os.getpid() and (not pid_alive(writer_pid) or now - path.stat().st_mtime > STALE_TMP_SECONDS):
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _evict(self, conn: sqlite3.Connection) -> list[str]:
+        """Drop least recently used rows until the index fits the budget; returns their file names."""
+        (size_bytes,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        evicted = []
+        if size_bytes <= self.max_bytes:
+            return evicted
+
+        for name, size in conn.execute("SELECT name, size FROM entries ORDER BY last_used"):
+            if size_bytes <= self.max_bytes:
+                break
+            evicted.append(name)
+            size_bytes -= size
+        conn.executemany("DELETE FROM entries WHERE name = ?", [(name,) for name in evicted])
+        return evicted
+
+    def _remove_files(self, names: list[str]) -> None:
+        for name in names:
+            try:
+                os.remove(self.directory / name)
+            except FileNotFoundError:
+                pass
+
+
+def get_result_cache(directory: str, max_bytes: int) -> DiskCache:
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                print(f"Opening result cache at {directory} (max {max_bytes} bytes)...")
+                _cache = DiskCache(Path(directory), max_bytes)
+
+    return _cache
@@ -1,11 +1,14 @@
 from typing import Annotated
 from app.common.router import VersionRouter
-from app.common.response import HttpResponse
+from app.common.response import CleanupStreamingResponse, HttpResponse
 from app.whisper.service import WhisperService
-from fastapi import status as HttpStatus, Depends
-from .schemas.process_audio_schema import ProcessAudioSchema
+from fastapi import status as HttpStatus, Depends, Request
+from fastapi.responses import StreamingResponse
+from .schemas.process_audio_schema import ProcessAudioOptionsSchema, ProcessAudioSchema
 from .schemas.process_audio_response_schema import ProcessAudioResponseSchema
+from .schemas.cache_status_schema import CacheStatusSchema
 from .schemas.thread_pool_status_schema import ThreadPoolStatusSchema
+from .schemas.model_registry_status_schema import ModelRegistryStatusSchema
 
 
 router = VersionRouter(version="1", path="whisper", tags=["Whisper"])
@@ -21,6 +24,57 @@ async def process_audio(
     return HttpResponse(message="Processed Audio Successfully", data=results, status_code=HttpStatus.HTTP_200_OK)
 
 
+@router.post(
+    "/upload",
+    status_code=HttpStatus.HTTP_200_OK,
+    response_model=HttpResponse[ProcessAudioResponseSchema],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["audio_file"],
+                        "properties": {
+                            "audio_file": {"type": "string", "format": "binary"},
+                            **{
+                                name: {"type": "string"}
+                                for name in ProcessAudioOptionsSchema.model_fields
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+)
+async def process_uploaded_audio(
+    request: Request,
+    whisper_service: Annotated[WhisperService, Depends(WhisperService)],
+) -> HttpResponse[ProcessAudioResponseSchema]:
+    """Multipart form: the audio as `audio_file`, plus any processing option as a form field.
+
+    Send the option fields before `audio_file`, so that an unknown `model` is rejected before the audio is uploaded.
+    """
+
+    results = await whisper_service.process_upload(request)
+
+    return HttpResponse(message="Processed Audio Successfully", data=results, status_code=HttpStatus.HTTP_200_OK)
+
+
+@router.post("/stream", status_code=HttpStatus.HTTP_200_OK, response_class=StreamingResponse)
+async def stream_process_audio(
+    process_audio_schema: ProcessAudioSchema,
+    whisper_service: Annotated[WhisperService, Depends(WhisperService)],
+) -> StreamingResponse:
+    """Newline-delimited JSON: `segment` events while Whisper decodes, then one `result` (or `error`) event."""
+
+    events, remove_unstarted = await whisper_service.stream_process_audio(process_audio_schema)
+
+    return CleanupStreamingResponse(events, on_close=remove_unstarted, media_type="application/x-ndjson")
+
+
 @router.get("/thread-pool-status", status_code=HttpStatus.HTTP_200_OK, response_model=HttpResponse[ThreadPoolStatusSchema])
 async def get_thread_pool_status(
     whisper_service: Annotated[WhisperService, Depends(WhisperService)],
@@ -29,3 +83,24 @@ async def get_thread_pool_status(
     status = whisper_service.get_thread_pool_status()
 
     return HttpResponse(message="Thread Pool Status Fetched Successfully", data=status, status_code=HttpStatus.HTTP_200_OK)
+
+
+@router.get("/models", status_code=HttpStatus.HTTP_200_OK, response_model=HttpResponse[ModelRegistryStatusSchema])
+async def get_model_status(
+    whisper_service: Annotated[WhisperService, Depends(WhisperService)],
+) -> HttpResponse[ModelRegistryStatusSchema]:
+    """Selectable models, the ones loaded in this process, and load / eviction counters."""
+
+    status = whisper_service.get_model_status()
+
+    return HttpResponse(message="Model Status Fetched Successfully", data=status, status_code=HttpStatus.HTTP_200_OK)
+
+
+@router.get("/cache-status", status_code=HttpStatus.HTTP_200_OK, response_model=HttpResponse[CacheStatusSchema])
+async def get_cache_status(
+    whisper_service: Annotated[WhisperService, Depends(WhisperService)],
+) -> HttpResponse[CacheStatusSchema]:
+
+    status = whisper_service.get_cache_status()
+
+    return HttpResponse(message="Cache Status Fetched Successfully", data=status, status_code=HttpStatus.HTTP_200_OK)
@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class CacheStatusSchema(BaseModel):
+    enabled: bool
+    entries: int
+    size_bytes: int
+    max_size_bytes: int
+    # Per namespace: "result", "whisper", "diarization"
+    hits: dict[str, int]
+    misses: dict[str, int]
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from .thread_pool_status_schema import WhisperPoolStatusSchema
+
+
+class LoadedModelStatusSchema(BaseModel):
+    model: str
+    # Names in WHISPER_MODELS that select this model
+    names: list[str]
+    size_bytes: int
+    load_seconds: float
+    in_use: int
+    uses: int
+    last_used: datetime
+    # The default model is never evicted
+    pinned: bool
+    replicas: WhisperPoolStatusSchema
+
+
+class CascadeStatusSchema(BaseModel):
+    fast_model: str
+    jobs: int
+    segments: int
+    escalated_segments: int
+    audio_seconds: float
+    escalated_seconds: float
+    escalated_fraction: float
+
+
+class ModelRegistryStatusSchema(BaseModel):
+    default_model: str
+    # Names a request can select with "model", and the model size or path each one loads
+    available_models: dict[str, str]
+    max_bytes: int
+    resident_bytes: int
+    loads: int
+    evictions: int
+    hits: int
+    # Most recently used first; only models loaded in this process
+    models: list[LoadedModelStatusSchema]
+    # Only with WHISPER_CASCADE_MODEL set; totals over the jobs run in this process
+    cascade: Optional[CascadeStatusSchema] = None
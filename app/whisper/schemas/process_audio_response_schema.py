@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from datetime import datetime
 from pydantic import BaseModel, PositiveFloat
 
@@ -22,4 +22,15 @@ class ProcessAudioResponseSchema(BaseModel):
     turns: List[SpeakerTurn]
     processing_time_start: Optional[datetime] = None
     processing_time_end: Optional[datetime] = None
-    processing_duration_in_seconds: Optional[PositiveFloat] = None
\ No newline at end of file
+    processing_duration_in_seconds: Optional[PositiveFloat] = None
+    # Share of the audio re-decoded with the large model; only in cascade mode
+    escalated_audio_fraction: Optional[float] = None
+
+class TranscriptSegment(BaseModel):
+    start: float
+    end: float
+    text: str
+
+class StreamEvent(BaseModel):
+    event: Literal["segment", "result", "error"]
+    data: Union[TranscriptSegment, ProcessAudioResponseSchema, dict]
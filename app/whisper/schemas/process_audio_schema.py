@@ -1,9 +1,8 @@
 from typing import Optional
 from pydantic import PositiveInt, BaseModel, HttpUrl
 
-class ProcessAudioSchema(BaseModel):
+class ProcessAudioOptionsSchema(BaseModel):
     num_of_speakers: Optional[PositiveInt] = None
-    audio_file_url: HttpUrl
     language: Optional[str] = None
     beam_size: Optional[int] = None
     no_speech_threshold: Optional[float] = None
@@ -13,4 +12,9 @@ class ProcessAudioSchema(BaseModel):
     classify_events: Optional[bool] = False
     clustering_threshold: Optional[float] = None
     min_duration_off: Optional[float] = None
-    min_cluster_size: Optional[int] = None
\ No newline at end of file
+    min_cluster_size: Optional[int] = None
+    # A name from WHISPER_MODELS; the default model if not set
+    model: Optional[str] = None
+
+class ProcessAudioSchema(ProcessAudioOptionsSchema):
+    audio_file_url: HttpUrl
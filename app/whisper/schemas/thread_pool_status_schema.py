@@ -1,8 +1,30 @@
+from typing import Optional
 from pydantic import BaseModel
 
 
+class BatchSchedulerStatusSchema(BaseModel):
+    batches: int
+    chunks: int
+    average_batch_size: float
+    pending_chunks: int
+
+
+class WhisperPoolStatusSchema(BaseModel):
+    replicas: int
+    threads_per_replica: int
+    in_use: int
+    waiting: int
+    checkouts: int
+    average_wait_seconds: float
+    max_wait_seconds: float
+
+
 class ThreadPoolStatusSchema(BaseModel):
     max_workers: int
     active_workers: int
     available_workers: int
     queued_tasks: int
+    # Only once batched Whisper decoding has run in this process
+    batch_scheduler: Optional[BatchSchedulerStatusSchema] = None
+    # Replicas of the default Whisper model, once it has been loaded in this process
+    whisper_pool: Optional[WhisperPoolStatusSchema] = None
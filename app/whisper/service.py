@@ -1,31 +1,60 @@
 from pathlib import Path
+from functools import lru_cache, partial
+from contextlib import ExitStack, nullcontext
 
 import torch
-import torchaudio # type: ignore
+import numpy as np
 import threading
 import os
-from fastapi import Depends
+from fastapi import Depends, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+import asyncio
 from asyncio import get_event_loop
 from pyannote.audio import Pipeline  # type: ignore
 from datetime import datetime, timezone
 from settings.config import SettingsDep
 from faster_whisper import WhisperModel # type: ignore
+from app.common.exceptions import BadRequestException
 from app.file.service import FileService
-from typing import Any, Annotated, Optional, Tuple
+from app.file.schemas.file_schema import File
+from typing import Any, Annotated, AsyncIterator, Callable, Iterator, Optional, Tuple, Union
 from faster_whisper.transcribe import TranscriptionInfo # type: ignore
-from concurrent.futures import ThreadPoolExecutor
+from faster_whisper.utils import download_model # type: ignore
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
 from transformers import ASTFeatureExtractor, AutoModelForAudioClassification  # type: ignore
-from .schemas.process_audio_schema import ProcessAudioSchema
-from .schemas.process_audio_response_schema import ProcessAudioResponseSchema, SpeakerTurn
-from .schemas.thread_pool_status_schema import ThreadPoolStatusSchema
+from .audio import DecodedAudio, TARGET_SAMPLE_RATE, load_audio
+from .batching import ScheduledBatchPipeline, batch_scheduler_status, close_batch_scheduler, get_batch_scheduler, pause_clip_timestamps
+from .cascade import cascade_status, transcribe_cascade
+from .long_audio import find_split_points, get_chunk_executor, transcribe_long_audio
+from .diarization_pool import DiarizationPipelinePool
+from .event_timeline import EventTimeline
+from .model_registry import WhisperModelRegistry
+from .model_status import tracking_load
+from .process_pool import get_process_pool, run_in_process_pool, worker_thread_count
+from .result_cache import cache_key, get_result_cache
+from .track_index import SpeakerTrackIndex
+from .whisper_pool import WhisperReplicaPool, threads_per_replica
+from .word_table import NO_SPEAKER, WordTable
+from .schemas.process_audio_schema import ProcessAudioOptionsSchema, ProcessAudioSchema
+from .schemas.process_audio_response_schema import ProcessAudioResponseSchema, SpeakerTurn, StreamEvent, TranscriptSegment
+from .schemas.cache_status_schema import CacheStatusSchema
+from .schemas.model_registry_status_schema import CascadeStatusSchema, ModelRegistryStatusSchema
+from .schemas.thread_pool_status_schema import BatchSchedulerStatusSchema, ThreadPoolStatusSchema, WhisperPoolStatusSchema
 
 thread_pool_executor = ThreadPoolExecutor(max_workers=8)
+# Diarization of a job runs here while its worker thread consumes Whisper segments
+diarization_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="diarization")
 
 _active_transcriptions_lock = threading.Lock()
 _active_transcriptions = 0
 
-_whisper_model: Optional[WhisperModel] = None
+# Identical in-flight process_audio requests, keyed by URL + parameters; only touched on the event loop
+_in_flight_requests: dict[str, "asyncio.Task[ProcessAudioResponseSchema]"] = {}
+
+_whisper_registry: Optional[WhisperModelRegistry] = None
 _diarization_pipeline: Optional[Pipeline] = None
+_diarization_pool: Optional[DiarizationPipelinePool] = None
 _ast_model = None
 _ast_feature_extractor = None
 
@@ -34,6 +63,7 @@ diarization_pipeline_lock = threading.Lock()
 _ast_lock = threading.Lock()
 
 AST_MODEL_ID = "MIT/ast-finetuned-audioset-10-10-0.4593"
+DIARIZATION_MODEL_ID = "pyannote/speaker-diarization-3.1"
 AST_CONFIDENCE_THRESHOLD = 0.1
 AST_TARGET_EVENTS = {
     "Music", "Laughter", "Cough", "Silence", "Singing", "Speech",
@@ -46,6 +76,8 @@ AST_EMBEDDABLE_EVENTS = {"Cough", "Laughter", "Sneeze", "Breathing", "Crying, so
 AST_WINDOW_SIZE = 1.5
 AST_STEP_SIZE = 0.5
 AST_EMBED_THRESHOLD = 0.07
+# Windows quieter than this RMS (≈ -80 dBFS) are treated as digital silence and not scored
+AST_SILENCE_RMS = 1e-4
 
 # Whisper sometimes transcribes non-verbal sounds inline as "(laughing)", "(cough)", etc.
 # This maps those annotation keywords to our standardized event label strings.
@@ -67,48 +99,102 @@ WHISPER_ANNOTATION_MAP = {
     "applause":  "Applause",
 }
 
-def get_whisper_model(model_size_or_path: str, device: str, compute_type: str) -> WhisperModel:
-    global _whisper_model
+def _resolve_whisper_model_path(model_size_or_path: str) -> str:
+    # Absolute paths (e.g. /models/...) are used as-is — the docker volume
+    # mounts the model directory directly at that path.
+    # Relative paths (e.g. models/...) are resolved from the project root.
+    if model_size_or_path.startswith("/"):
+        return model_size_or_path
+    elif model_size_or_path.startswith("models"):
+        project_root = Path(__file__).resolve().parent.parent.parent
+        return str(project_root / model_size_or_path)
+    else:
+        return model_size_or_path
+
+
+def load_whisper_model(model_size_or_path: str, device: str, compute_type: str, cpu_threads: int = 0, replicas: int = 1) -> WhisperModel:
+    cpu_threads = threads_per_replica(cpu_threads, replicas)
+    print(f"Whisper replicas: {replicas} x {cpu_threads} threads")
+
+    resolved_path = _resolve_whisper_model_path(model_size_or_path)
+
+    print(f"Loading Whisper model: {model_size_or_path}")
+    print(f"Resolved path: {resolved_path}")
+    print(f"Is local path: {os.path.isdir(resolved_path)}")
+
+    if os.path.isdir(resolved_path):
+        model = WhisperModel(resolved_path, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=replicas, local_files_only=True)
+    else:
+        model = WhisperModel(model_size_or_path, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=replicas)
+
+    # Self-healing mel filter patch
+    expected_n_mels = model.model.n_mels
+    current_n_mels = model.feature_extractor.mel_filters.shape[0]
+
+    if expected_n_mels != current_n_mels:
+        print(f"Patching mel filters: {current_n_mels} → {expected_n_mels} bins")
+        new_filters = model.feature_extractor.get_mel_filters(
+            model.feature_extractor.sampling_rate,
+            model.feature_extractor.n_fft,
+            n_mels=expected_n_mels,
+        )
+        # CTranslate2 requires float32, but get_mel_filters returns float64
+        model.feature_extractor.mel_filters = new_filters.astype(np.float32)
+    else:
+        print(f"Mel filters already correct ({current_n_mels} bins)")
+
+    return model
+
+
+def _local_whisper_model_files(model_size_or_path: str) -> list[Path]:
+    """The files of a model on disk; none if it is not downloaded yet."""
+    resolved_path = _resolve_whisper_model_path(model_size_or_path)
+    if not os.path.isdir(resolved_path):
+        try:
+            resolved_path = download_model(model_size_or_path, local_files_only=True)
+        except Exception:
+            return []
+
+    return sorted(path for path in Path(resolved_path).iterdir() if path.is_file())
+
+
+def whisper_model_size_bytes(model_size_or_path: str) -> int:
+    """Size of a model's files on disk, which is what CTranslate2 holds in memory; 0 if not downloaded yet."""
+    return sum(path.stat().st_size for path in _local_whisper_model_files(model_size_or_path))
+
+
+def whisper_model_identity(model_size_or_path: str) -> list[tuple[str, int, int]]:
+    """Name, size and modification time of each of a model's files, for cache keys.
+
+    The conversion scripts write a re-converted model to the same path, so the
+    path alone does not tell its outputs apart.
+    """
+    identity = []
+    for path in _local_whisper_model_files(model_size_or_path):
+        stat = path.stat()
+        identity.append((path.name, stat.st_size, stat.st_mtime_ns))
+    return identity
+
+
+def _unload_whisper_model(model_size_or_path: str, pool: WhisperReplicaPool) -> None:
+    close_batch_scheduler(model_size_or_path)
+    # Free the weights now rather than whenever the last reference goes away
+    pool.model.model.unload_model()
+
+
+def get_whisper_registry(default_model_size_or_path: str, device: str, compute_type: str, cpu_threads: int = 0, replicas: int = 1, max_bytes: int = 0) -> WhisperModelRegistry:
+    global _whisper_registry
+
+    def load(model_size_or_path: str) -> WhisperReplicaPool:
+        # The readiness state follows the default model
+        with tracking_load("whisper") if model_size_or_path == default_model_size_or_path else nullcontext():
+            model = load_whisper_model(model_size_or_path, device, compute_type, cpu_threads, replicas)
+        return WhisperReplicaPool(model, replicas, threads_per_replica(cpu_threads, replicas))
+
     with whisper_model_lock:
-        if _whisper_model is None:
-            # Absolute paths (e.g. /models/...) are used as-is — the docker volume
-            # mounts the model directory directly at that path.
-            # Relative paths (e.g. models/...) are resolved from the project root.
-            if model_size_or_path.startswith("/"):
-                resolved_path = model_size_or_path
-            elif model_size_or_path.startswith("models"):
-                project_root = Path(__file__).resolve().parent.parent.parent
-                resolved_path = str(project_root / model_size_or_path)
-            else:
-                resolved_path = model_size_or_path
-            
-            print(f"Loading Whisper model: {model_size_or_path}")
-            print(f"Resolved path: {resolved_path}")
-            print(f"Is local path: {os.path.isdir(resolved_path)}")
-            
-            if os.path.isdir(resolved_path):
-                _whisper_model = WhisperModel(resolved_path, device=device, compute_type=compute_type, local_files_only=True)
-            else:
-                _whisper_model = WhisperModel(model_size_or_path, device=device, compute_type=compute_type)
-            
-            # Self-healing mel filter patch
-            expected_n_mels = _whisper_model.model.n_mels
-            current_n_mels = _whisper_model.feature_extractor.mel_filters.shape[0]
-            
-            if expected_n_mels != current_n_mels:
-                import numpy as np
-                print(f"Patching mel filters: {current_n_mels} → {expected_n_mels} bins")
-                new_filters = _whisper_model.feature_extractor.get_mel_filters(
-                    _whisper_model.feature_extractor.sampling_rate,
-                    _whisper_model.feature_extractor.n_fft,
-                    n_mels=expected_n_mels,
-                )
-                # CTranslate2 requires float32, but get_mel_filters returns float64
-                _whisper_model.feature_extractor.mel_filters = new_filters.astype(np.float32)
-            else:
-                print(f"Mel filters already correct ({current_n_mels} bins)")
-    
-    return _whisper_model
+        if _whisper_registry is None:
+            _whisper_registry = WhisperModelRegistry(load, whisper_model_size_bytes, default_model_size_or_path, max_bytes, _unload_whisper_model)
+    return _whisper_registry
 
 
 def get_ast_model():
@@ -116,14 +202,68 @@ def get_ast_model():
     with _ast_lock:
         if _ast_model is None:
             print("Loading AST audio classification model...")
-            _ast_feature_extractor = ASTFeatureExtractor.from_pretrained(AST_MODEL_ID)
-            _ast_model = AutoModelForAudioClassification.from_pretrained(AST_MODEL_ID)
-            _ast_model.eval()
-            if torch.cuda.is_available():
-                _ast_model = _ast_model.to(torch.device("cuda"))
+            with tracking_load("ast"):
+                _ast_feature_extractor = ASTFeatureExtractor.from_pretrained(AST_MODEL_ID)
+                _ast_model = AutoModelForAudioClassification.from_pretrained(AST_MODEL_ID)
+                _ast_model.eval()
+                if torch.cuda.is_available():
+                    _ast_model = _ast_model.to(torch.device("cuda"))
     return _ast_model, _ast_feature_extractor
 
 
+@lru_cache(maxsize=None)
+def get_ast_label_indices(labels: frozenset) -> Tuple[torch.Tensor, list[str]]:
+    """Return the sorted AST output indices for ``labels`` and the matching label names."""
+    model, _ = get_ast_model()
+    label2id = model.config.label2id
+    indices = sorted(label2id[label] for label in labels if label in label2id)
+    return torch.tensor(indices, dtype=torch.long), [model.config.id2label[idx] for idx in indices]
+
+
+def _ast_window_bounds(total_samples: int) -> list[tuple[int, int]]:
+    """Sample ranges of the AST_WINDOW_SIZE / AST_STEP_SIZE sliding windows over a clip."""
+    window_samples = int(AST_WINDOW_SIZE * TARGET_SAMPLE_RATE)
+    step_samples = int(AST_STEP_SIZE * TARGET_SAMPLE_RATE)
+    bounds = []
+    window_start = 0
+
+    while window_start < total_samples:
+        window_end = min(window_start + window_samples, total_samples)
+        if window_end - window_start < TARGET_SAMPLE_RATE * 0.1:
+            break
+        bounds.append((window_start, window_end))
+        window_start += step_samples
+
+    return bounds
+
+
+def score_ast_windows(audio_np, bounds: list[tuple[int, int]], label_indices: torch.Tensor, batch_size: int = 16) -> torch.Tensor:
+    """Run AST over the given windows of a clip and return sigmoid scores.
+
+    Windows are scored ``batch_size`` at a time — the feature extractor pads every
+    window to the same number of frames, so one forward handles the whole batch.
+    Returns a (num_windows, len(label_indices)) CPU tensor.
+    """
+    model, feature_extractor = get_ast_model()
+    batch_size = max(1, batch_size)
+    scores = []
+
+    for i in range(0, len(bounds), batch_size):
+        batch = [audio_np[window_start:window_end] for window_start, window_end in bounds[i:i + batch_size]]
+        inputs = feature_extractor(batch, sampling_rate=TARGET_SAMPLE_RATE, return_tensors="pt")
+        if torch.cuda.is_available():
+            inputs = {k: v.to(torch.device("cuda")) for k, v in inputs.items()}
+
+        with torch.no_grad():
+            logits = model(**inputs).logits
+
+        scores.append(torch.sigmoid(logits[:, label_indices.to(logits.device)]).cpu())
+
+    if not scores:
+        return torch.zeros((0, len(label_indices)))
+    return torch.cat(scores)
+
+
 def extract_whisper_annotations(words: list) -> list[tuple[float, str]]:
     """
     Scan Whisper word tokens for inline non-verbal annotations like (laughing).
@@ -191,10 +331,7 @@ def extract_whisper_annotations(words: list) -> list[tuple[float, str]]:
     return detected
 
 
-def classify_audio_segment(audio_file_path: str, start: float, end: float, words: list = []) -> list[str]:
-    import numpy as np
-    TARGET_SR = 16000
-
+def classify_audio_segment(audio: DecodedAudio, start: float, end: float, words: list = []) -> list[str]:
     # --- Source 1: Whisper inline annotations ---
     # Highly reliable — Whisper only adds these when it's confident.
     # We collect just the unique label strings for the audio_events list.
@@ -202,55 +339,38 @@ def classify_audio_segment(audio_file_path: str, start: float, end: float, words
 
     # --- Source 2: AST model classifying the full turn audio ---
     # Catches events Whisper didn't transcribe (e.g. background music, subtle breathing).
-    waveform, sr = safe_load_audio(audio_file_path)
-    start_frame = max(0, int(start * sr))
-    end_frame = min(waveform.shape[-1], int(end * sr))
+    # The job audio is already mono 16 kHz, so the turn is a zero-copy slice.
+    audio_np = audio.slice(start, end)
 
-    if end_frame <= start_frame:
+    if len(audio_np) < TARGET_SAMPLE_RATE * 0.1:
         # No audio slice to analyse — return whatever Whisper found
         return list(whisper_labels)
 
-    waveform = waveform[:, start_frame:end_frame]
-
-    if waveform.shape[0] > 1:
-        waveform = waveform.mean(dim=0, keepdim=True)
-
-    if sr != TARGET_SR:
-        resampler = torchaudio.transforms.Resample(orig_freq=sr, new_freq=TARGET_SR)
-        waveform = resampler(waveform)
-
-    audio_np = waveform.squeeze(0).numpy().astype(np.float32)
-
-    if len(audio_np) < TARGET_SR * 0.1:
-        return list(whisper_labels)
-
-    model, feature_extractor = get_ast_model()
-    inputs = feature_extractor(audio_np, sampling_rate=TARGET_SR, return_tensors="pt")
+    label_indices, labels = get_ast_label_indices(frozenset(AST_TARGET_EVENTS))
+    scores = score_ast_windows(audio_np, [(0, len(audio_np))], label_indices)[0]
 
-    if torch.cuda.is_available():
-        inputs = {k: v.to(torch.device("cuda")) for k, v in inputs.items()}
+    ast_labels = {labels[idx] for idx in (scores >= AST_CONFIDENCE_THRESHOLD).nonzero().flatten().tolist()}
 
-    with torch.no_grad():
-        outputs = model(**inputs)
+    # Merge both sources — union of all detected labels across Whisper and AST
+    return list(whisper_labels | ast_labels)
 
-    probs = torch.sigmoid(outputs.logits).squeeze(0)
-    id2label = model.config.id2label
 
-    ast_labels = {
-        id2label[idx]
-        for idx, score in enumerate(probs.tolist())
-        if score >= AST_CONFIDENCE_THRESHOLD and id2label[idx] in AST_TARGET_EVENTS
-    }
+def _ast_window_detections(start: float, bounds: list[tuple[int, int]], scores: torch.Tensor, labels: list[str], allowed_labels: set[str]) -> list[tuple[float, str]]:
+    """Turn a window score matrix into (timestamp, label) detections for embedding."""
+    allowed = torch.tensor([label in allowed_labels for label in labels], dtype=torch.bool)
+    detections = []
 
-    # Merge both sources — union of all detected labels across Whisper and AST
-    return list(whisper_labels | ast_labels)
+    # Row-major nonzero keeps the window-then-label order of the detections
+    for window_idx, label_idx in ((scores >= AST_EMBED_THRESHOLD) & allowed).nonzero().tolist():
+        window_start, window_end = bounds[window_idx]
+        # Absolute timestamp of the centre of this window
+        window_mid_abs = start + (window_start + window_end) / 2 / TARGET_SAMPLE_RATE
+        detections.append((window_mid_abs, labels[label_idx]))
 
+    return detections
 
-def embed_events_in_text(audio_file_path: str, start: float, end: float, words: list) -> str:
-    import re
-    import numpy as np
-    TARGET_SR = 16000
 
+def embed_events_in_text(audio: DecodedAudio, start: float, end: float, words: list, batch_size: int = 16) -> str:
     if not words:
         return ""
 
@@ -262,52 +382,105 @@ def embed_events_in_text(audio_file_path: str, start: float, end: float, words:
     # --- Source 2: AST sliding window on the raw audio ---
     # Runs a small classification window across the turn to catch events Whisper
     # didn't transcribe (e.g. quiet breathing, background sounds between words).
-    waveform, sr = safe_load_audio(audio_file_path)
+    audio_np = audio.slice(start, end)
 
-    if waveform.shape[0] > 1:
-        waveform = waveform.mean(dim=0, keepdim=True)
-    if sr != TARGET_SR:
-        resampler = torchaudio.transforms.Resample(orig_freq=sr, new_freq=TARGET_SR)
-        waveform = resampler(waveform)
+    ast_detections: list[tuple[float, str]] = []
 
-    start_frame = max(0, int(start * TARGET_SR))
-    end_frame = min(waveform.shape[-1], int(end * TARGET_SR))
-    audio_np = waveform.squeeze(0)[start_frame:end_frame].numpy().astype(np.float32)
+    if len(audio_np) >= TARGET_SAMPLE_RATE * 0.1:
+        label_indices, labels = get_ast_label_indices(frozenset(AST_EMBEDDABLE_EVENTS))
+        bounds = _ast_window_bounds(len(audio_np))
+        scores = score_ast_windows(audio_np, bounds, label_indices, batch_size)
+        ast_detections = _ast_window_detections(start, bounds, scores, labels, AST_EMBEDDABLE_EVENTS)
 
+    return _render_text_with_events(words, whisper_detections, ast_detections)
+
+
+def classify_turn_events(audio: DecodedAudio, start: float, end: float, words: list, batch_size: int = 16, pooling: str = "max") -> Tuple[list[str], str]:
+    """Single-pass replacement for classify_audio_segment + embed_events_in_text.
+
+    Scores the turn's sliding windows once against the union of target and
+    embeddable labels. Turn-level ``audio_events`` are the labels whose pooled
+    (max or mean) window score reaches AST_CONFIDENCE_THRESHOLD; the same
+    matrix supplies the inline detections for ``text_with_events``.
+    """
+    whisper_detections = extract_whisper_annotations(words)
+    audio_events = {label for _, label in whisper_detections}
     ast_detections: list[tuple[float, str]] = []
 
-    if len(audio_np) >= TARGET_SR * 0.1:
-        model, feature_extractor = get_ast_model()
-        window_samples = int(AST_WINDOW_SIZE * TARGET_SR)
-        step_samples = int(AST_STEP_SIZE * TARGET_SR)
-        total_samples = len(audio_np)
-        window_start = 0
+    audio_np = audio.slice(start, end)
 
-        while window_start < total_samples:
-            window_end = min(window_start + window_samples, total_samples)
-            window_audio = audio_np[window_start:window_end]
+    if len(audio_np) >= TARGET_SAMPLE_RATE * 0.1:
+        label_indices, labels = get_ast_label_indices(frozenset(AST_TARGET_EVENTS | AST_EMBEDDABLE_EVENTS))
+        bounds = _ast_window_bounds(len(audio_np))
+        scores = score_ast_windows(audio_np, bounds, label_indices, batch_size)
 
-            if len(window_audio) < TARGET_SR * 0.1:
-                break
+        if bounds:
+            pooled = scores.mean(dim=0) if pooling == "mean" else scores.max(dim=0).values
+            audio_events |= {
+                labels[idx]
+                for idx in (pooled >= AST_CONFIDENCE_THRESHOLD).nonzero().flatten().tolist()
+                if labels[idx] in AST_TARGET_EVENTS
+            }
+            ast_detections = _ast_window_detections(start, bounds, scores, labels, AST_EMBEDDABLE_EVENTS)
 
-            inputs = feature_extractor(window_audio, sampling_rate=TARGET_SR, return_tensors="pt")
-            if torch.cuda.is_available():
-                inputs = {k: v.to(torch.device("cuda")) for k, v in inputs.items()}
+    text_with_events = _render_text_with_events(words, whisper_detections, ast_detections) if words else ""
+
+    return list(audio_events), text_with_events
+
+
+def build_event_timeline(audio: DecodedAudio, speech_spans: list[tuple[float, float]], batch_size: int = 16) -> EventTimeline:
+    """Score the whole file once on a fixed sliding-window grid.
+
+    Only windows overlapping a speech span (the speaker turns) and above
+    AST_SILENCE_RMS are scored, so gaps between turns and silent stretches
+    cost nothing. Returns the scores as an EventTimeline indexed by window centre.
+    """
+
+    label_indices, labels = get_ast_label_indices(frozenset(AST_TARGET_EVENTS | AST_EMBEDDABLE_EVENTS))
+    bounds = _ast_window_bounds(audio.num_samples)
+
+    if bounds and speech_spans:
+        span_starts = np.array([int(span_start * TARGET_SAMPLE_RATE) for span_start, _ in speech_spans])
+        span_ends = np.maximum.accumulate(np.array([int(span_end * TARGET_SAMPLE_RATE) for _, span_end in speech_spans]))
+        window_starts = np.array([window_start for window_start, _ in bounds])
+        window_ends = np.array([window_end for _, window_end in bounds])
+
+        # Last span starting before each window ends; the window overlaps speech if that span (or any earlier one) ends after it starts
+        span_idx = np.searchsorted(span_starts, window_ends, side="left") - 1
+        overlaps = (span_idx >= 0) & (span_ends[np.maximum(span_idx, 0)] > window_starts)
+
+        bounds = [
+            (window_start, window_end)
+            for (window_start, window_end), keep in zip(bounds, overlaps.tolist())
+            if keep and np.sqrt(np.mean(np.square(audio.samples[window_start:window_end]))) >= AST_SILENCE_RMS
+        ]
+    else:
+        bounds = []
 
-            with torch.no_grad():
-                outputs = model(**inputs)
+    scores = score_ast_windows(audio.samples, bounds, label_indices, batch_size)
+    mids = np.array([(window_start + window_end) / 2 / TARGET_SAMPLE_RATE for window_start, window_end in bounds], dtype=np.float64)
 
-            probs = torch.sigmoid(outputs.logits).squeeze(0)
-            id2label = model.config.id2label
-            # Absolute timestamp of the centre of this window
-            window_mid_abs = start + (window_start + (window_end - window_start) / 2) / TARGET_SR
+    print(f"Scored {len(bounds)} event windows for {audio.duration:.1f}s of audio")
 
-            for idx, score in enumerate(probs.tolist()):
-                label = id2label[idx]
-                if score >= AST_EMBED_THRESHOLD and label in AST_EMBEDDABLE_EVENTS:
-                    ast_detections.append((window_mid_abs, label))
+    return EventTimeline(mids, scores.numpy(), labels)
 
-            window_start += step_samples
+
+def classify_turn_events_from_timeline(timeline: EventTimeline, start: float, end: float, words: list, pooling: str = "max") -> Tuple[list[str], str]:
+    """Timeline counterpart of classify_turn_events — no model work per turn."""
+    whisper_detections = extract_whisper_annotations(words)
+    audio_events = {label for _, label in whisper_detections}
+
+    lo, hi = timeline.window_range(start, end, max_distance=AST_WINDOW_SIZE / 2)
+    audio_events |= timeline.pooled_labels(lo, hi, AST_CONFIDENCE_THRESHOLD, AST_TARGET_EVENTS, pooling)
+    ast_detections = timeline.detections(lo, hi, AST_EMBED_THRESHOLD, AST_EMBEDDABLE_EVENTS)
+
+    text_with_events = _render_text_with_events(words, whisper_detections, ast_detections) if words else ""
+
+    return list(audio_events), text_with_events
+
+
+def _render_text_with_events(words: list, whisper_detections: list[tuple[float, str]], ast_detections: list[tuple[float, str]]) -> str:
+    import re
 
     # --- Merge and deduplicate ---
     # Whisper detections go first so their timestamps win when both sources
@@ -367,65 +540,297 @@ def embed_events_in_text(audio_file_path: str, start: float, end: float, words:
     return "".join(tokens).strip()
 
 
-def get_diarization_pipeline(hf_token: str) -> Pipeline:
+def get_diarization_pipeline(hf_token: str, num_threads: int = 0) -> Pipeline:
     global _diarization_pipeline
     with diarization_pipeline_lock:
         if _diarization_pipeline is None:
             print("Loading diarization pipeline...")
-            _diarization_pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=hf_token
-            )
-            if torch.cuda.is_available():
-                _diarization_pipeline.to(torch.device("cuda"))
+            if num_threads > 0:
+                # Torch intra-op pool is only used by pyannote/AST; Whisper runs on CTranslate2's own threads
+                torch.set_num_threads(num_threads)
+            with tracking_load("diarization"):
+                _diarization_pipeline = Pipeline.from_pretrained(
+                    DIARIZATION_MODEL_ID,
+                    use_auth_token=hf_token
+                )
+                if torch.cuda.is_available():
+                    _diarization_pipeline.to(torch.device("cuda"))
     return _diarization_pipeline
 
+
+def get_diarization_pool(hf_token: str, num_threads: int = 0, max_size: int = 4) -> DiarizationPipelinePool:
+    global _diarization_pool
+    base_pipeline = get_diarization_pipeline(hf_token, num_threads)
+    with diarization_pipeline_lock:
+        if _diarization_pool is None:
+            _diarization_pool = DiarizationPipelinePool(base_pipeline, max_size)
+    return _diarization_pool
+
 class WhisperService:
     def __init__(self, settings: SettingsDep, file_service: Annotated[FileService, Depends(FileService)]):
         self.settings = settings
         self.file_service = file_service
-        self.thread_pool_executor = thread_pool_executor
+        # EXECUTION_BACKEND=process runs jobs in worker processes that own their models
+        self.executor: Executor = get_process_pool(settings) if settings.EXECUTION_BACKEND == "process" else thread_pool_executor
 
     async def process_audio(self, process_audio_schema: ProcessAudioSchema) -> ProcessAudioResponseSchema:
-        file = await self.file_service.download_file(str(process_audio_schema.audio_file_url))
+        """Process a request, sharing the work with an identical request already in flight.
+
+        Requests with the same URL and parameters (typically client retries) are
+        attached to the running task instead of downloading and transcribing again.
+        """
+        self.validate_options(process_audio_schema)
+        key = cache_key(process_audio_schema.model_dump(mode="json"))
+
+        task = _in_flight_requests.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._process_audio(process_audio_schema))
+            _in_flight_requests[key] = task
+
+            def forget(done: "asyncio.Task[ProcessAudioResponseSchema]") -> None:
+                if _in_flight_requests.get(key) is done:
+                    del _in_flight_requests[key]
+
+            task.add_done_callback(forget)
+        else:
+            print(f"Attaching to in-flight request for {process_audio_schema.audio_file_url}")
+
+        # A disconnecting caller must not cancel the work other callers are waiting on
+        return await asyncio.shield(task)
+
+    async def _process_audio(self, process_audio_schema: ProcessAudioSchema) -> ProcessAudioResponseSchema:
+        # Everything the job writes lives in its scratch directory, removed however the job ends
+        async with self.file_service.scratch_dir() as scratch_dir:
+            file = await self.file_service.download_file(str(process_audio_schema.audio_file_url), scratch_dir)
+
+            return await self._process_file(file, process_audio_schema)
+
+    async def process_upload(self, request: Request) -> ProcessAudioResponseSchema:
+        """Process audio sent as the ``audio_file`` part of a multipart form; the
+        other form fields are the same options as for a URL request."""
+
+        def check_field(name: str, value: str) -> None:
+            # An unknown model fails before the audio is stored when the field comes first
+            if name == "model" and value != "":
+                self.whisper_model_path(value)
+
+        async with self.file_service.scratch_dir() as scratch_dir:
+            file, fields = await self.file_service.receive_upload(request, "audio_file", scratch_dir, check_field)
+
+            try:
+                # Empty form fields mean "not set"
+                options = ProcessAudioOptionsSchema.model_validate({name: value for name, value in fields.items() if value != ""})
+            except ValidationError as e:
+                raise RequestValidationError(e.errors(include_url=False))
+            self.validate_options(options)
+
+            return await self._process_file(file, options)
+
+    async def _process_file(self, file: File, options: ProcessAudioOptionsSchema) -> ProcessAudioResponseSchema:
+        processing_time_start = datetime.now(timezone.utc)
+
+        results, transcription_info = await self._transcribe(file, options)
+
+        return self._build_response(results, transcription_info, processing_time_start)
+
+    async def stream_process_audio(self, process_audio_schema: ProcessAudioSchema) -> Tuple[AsyncIterator[str], Callable[[], None]]:
+        """Download the audio, then return an NDJSON event stream for its processing.
 
+        The download happens before the stream starts so a bad URL still fails
+        with a regular error response. Once started, the stream removes the
+        job's scratch directory when the job ends; the returned callable
+        removes it if the stream is never started (the client went away
+        first) and must be called when the response is done.
+        """
+        self.validate_options(process_audio_schema)
+        scratch_dir = self.file_service.create_scratch_dir()
+        try:
+            file = await self.file_service.download_file(str(process_audio_schema.audio_file_url), scratch_dir)
+        except BaseException:
+            self.file_service.remove_scratch_dir(scratch_dir)
+            raise
+
+        started = asyncio.Event()
+
+        def remove_unstarted() -> None:
+            if not started.is_set():
+                self.file_service.remove_scratch_dir(scratch_dir)
+
+        return self._stream_events(file, process_audio_schema, scratch_dir, started), remove_unstarted
+
+    async def _stream_events(self, file: File, process_audio_schema: ProcessAudioSchema, scratch_dir: Path, started: asyncio.Event) -> AsyncIterator[str]:
+        """Yield one ``segment`` event per Whisper segment as soon as it is decoded,
+        then a single ``result`` event with the speaker-attributed turns once
+        diarization (and event classification) has finished. Failures after the
+        stream has started are reported as an ``error`` event.
+        """
+        # From here on this generator's cleanup owns the scratch directory
+        started.set()
         loop = get_event_loop()
+        segment_queue: asyncio.Queue[Optional[TranscriptSegment]] = asyncio.Queue()
+
+        def on_segment(segment: dict) -> None:
+            # Called on the worker thread for every decoded Whisper segment
+            loop.call_soon_threadsafe(segment_queue.put_nowait, TranscriptSegment(**segment))
 
         processing_time_start = datetime.now(timezone.utc)
 
+        task = asyncio.ensure_future(self._transcribe(file, process_audio_schema, on_segment))
+        task.add_done_callback(lambda _: segment_queue.put_nowait(None))
+
+        try:
+            while (segment := await segment_queue.get()) is not None:
+                yield StreamEvent(event="segment", data=segment).model_dump_json() + "\n"
+
+            results, transcription_info = await task
+            response = self._build_response(results, transcription_info, processing_time_start)
+            yield StreamEvent(event="result", data=response).model_dump_json() + "\n"
+        except Exception as e:
+            print(f"ERROR: Streaming transcription failed: {e}")
+            yield StreamEvent(event="error", data={"message": "Internal Server Error"}).model_dump_json() + "\n"
+        finally:
+            # The client may have disconnected mid-stream; let the job finish before removing its files
+            await asyncio.wait([task])
+            self.file_service.remove_scratch_dir(scratch_dir)
+
+    def whisper_model_path(self, model: Optional[str]) -> str:
+        """Size or path of the Whisper model a request selects by name."""
+        if model is None:
+            return self.settings.WHISPER_MODEL_SIZE_OR_PATH
+        if model not in self.settings.WHISPER_MODELS:
+            raise BadRequestException(message=f"Unknown model '{model}'", data={"available_models": sorted(self.settings.WHISPER_MODELS)})
+        return self.settings.WHISPER_MODELS[model]
+
+    def validate_options(self, options: ProcessAudioOptionsSchema) -> None:
+        """Reject a request the configured decoding cannot honour, before any work is done for it."""
+        self.whisper_model_path(options.model)
+        if self.settings.WHISPER_BATCH_SIZE > 1 and options.hallucination_silence_threshold is not None:
+            raise BadRequestException(message="hallucination_silence_threshold is not supported with batched decoding (WHISPER_BATCH_SIZE > 1)")
+
+    def whisper_cascade_model_path(self, model_size_or_path: str) -> Optional[str]:
+        """Size or path of the cascade's fast model, or None when a job with this model runs without a cascade."""
+        cascade_model = self.settings.WHISPER_MODELS.get(self.settings.WHISPER_CASCADE_MODEL, self.settings.WHISPER_CASCADE_MODEL)
+        if not cascade_model or cascade_model == model_size_or_path:
+            return None
+        return cascade_model
+
+    async def _transcribe(self, file: File, process_audio_schema: ProcessAudioOptionsSchema, on_segment: Optional[Callable[[dict], None]] = None) -> Tuple[list[Any], TranscriptionInfo]:
+        loop = get_event_loop()
+        model_size_or_path = self.whisper_model_path(process_audio_schema.model)
+        cascade_model = self.whisper_cascade_model_path(model_size_or_path)
+        cascade_thresholds = (
+            self.settings.WHISPER_CASCADE_MIN_AVG_LOGPROB,
+            self.settings.WHISPER_CASCADE_MIN_WORD_PROBABILITY,
+            self.settings.WHISPER_CASCADE_MAX_COMPRESSION_RATIO,
+        )
+
+        clustering_threshold = process_audio_schema.clustering_threshold if process_audio_schema.clustering_threshold is not None else self.settings.DIARIZATION_CLUSTERING_THRESHOLD
+        min_duration_off = process_audio_schema.min_duration_off if process_audio_schema.min_duration_off is not None else self.settings.DIARIZATION_MIN_DURATION_OFF
+        min_cluster_size = process_audio_schema.min_cluster_size if process_audio_schema.min_cluster_size is not None else self.settings.DIARIZATION_MIN_CLUSTER_SIZE
+
+        # Only files whose content hash is known can be cached
+        cache = None
+        result_key = None
+        if self.settings.RESULT_CACHE_ENABLED and file.sha256:
+            cache = get_result_cache(str(self.settings.RESULT_CACHE_DIR), self.settings.RESULT_CACHE_MAX_BYTES)
+            result_key = cache_key(
+                file.sha256,
+                model_size_or_path,
+                whisper_model_identity(model_size_or_path),
+                self.settings.WHISPER_MODEL_DEVICE,
+                self.settings.WHISPER_COMPUTE_TYPE,
+                # Keyed by the model itself, so renaming it in WHISPER_MODELS keeps its results
+                process_audio_schema.model_dump(mode="json", exclude={"audio_file_url", "model"}),
+                clustering_threshold,
+                min_duration_off,
+                min_cluster_size,
+                self.settings.AST_EVENT_MODE,
+                self.settings.AST_TURN_POOLING,
+                self.settings.WHISPER_BATCH_SIZE > 1,
+                self.settings.LONG_AUDIO_MIN_SECONDS,
+                self.settings.LONG_AUDIO_CHUNK_SECONDS,
+                cascade_model,
+                whisper_model_identity(cascade_model) if cascade_model else None,
+                cascade_thresholds if cascade_model else None,
+            )
+            cached = await loop.run_in_executor(None, cache.get, "result", result_key)
+            if cached is not None:
+                print(f"Result cache hit for {file.sha256[:12]}")
+                return cached
+
         global _active_transcriptions
         with _active_transcriptions_lock:
             _active_transcriptions += 1
             active = _active_transcriptions
-        print(f"[ThreadPool] active={active}/{self.thread_pool_executor._max_workers} queued={self.thread_pool_executor._work_queue.qsize()}")
+        print(f"[ThreadPool] active={active}/{self.executor._max_workers} queued={self._queued_tasks()}")
+
+        whisper_cpu_threads = self.settings.WHISPER_CPU_THREADS
+        diarization_threads = self.settings.DIARIZATION_TORCH_THREADS
+        if self.settings.EXECUTION_BACKEND == "process":
+            # Models in the workers are loaded with the worker's own budget
+            whisper_cpu_threads = whisper_cpu_threads or max(1, worker_thread_count(self.settings) // max(1, self.settings.WHISPER_REPLICAS))
+            diarization_threads = diarization_threads or worker_thread_count(self.settings)
+
+        args = (
+            file.data if file.data is not None else file.path,
+            model_size_or_path,
+            self.settings.WHISPER_MODEL_DEVICE,
+            self.settings.WHISPER_COMPUTE_TYPE,
+            self.settings.HF_TOKEN,
+            process_audio_schema.num_of_speakers,
+            process_audio_schema.language,
+            clustering_threshold,
+            min_duration_off,
+            min_cluster_size,
+            process_audio_schema.beam_size,
+            process_audio_schema.no_speech_threshold,
+            process_audio_schema.initial_prompt,
+            process_audio_schema.vad_filter,
+            process_audio_schema.hallucination_silence_threshold,
+            process_audio_schema.classify_events,
+            self.settings.PARALLEL_DIARIZATION,
+            whisper_cpu_threads,
+            diarization_threads,
+            self.settings.DIARIZATION_POOL_SIZE,
+            self.settings.AST_BATCH_SIZE,
+            self.settings.AST_EVENT_MODE,
+            self.settings.AST_TURN_POOLING,
+            self.settings.WHISPER_BATCH_SIZE,
+            self.settings.WHISPER_BATCH_MAX_WAIT_MS / 1000,
+            self.settings.WHISPER_REPLICAS,
+            self.settings.LONG_AUDIO_MIN_SECONDS,
+            self.settings.LONG_AUDIO_CHUNK_SECONDS,
+            self.settings.LONG_AUDIO_MAX_PARALLEL_CHUNKS,
+            self.settings.WHISPER_MODEL_SIZE_OR_PATH,
+            self.settings.WHISPER_MODELS_MAX_BYTES,
+            cascade_model,
+            *cascade_thresholds,
+        )
+        cache_kwargs = dict(
+            audio_hash=file.sha256 if cache is not None else None,
+            cache_dir=str(self.settings.RESULT_CACHE_DIR),
+            cache_max_bytes=self.settings.RESULT_CACHE_MAX_BYTES,
+        )
 
         try:
-            results, transcription_info = await loop.run_in_executor(
-                self.thread_pool_executor,
-                transcribe_audio,
-                file.path,
-                self.settings.WHISPER_MODEL_SIZE_OR_PATH,
-                self.settings.WHISPER_MODEL_DEVICE,
-                self.settings.WHISPER_COMPUTE_TYPE,
-                self.settings.HF_TOKEN,
-                process_audio_schema.num_of_speakers,
-                process_audio_schema.language,
-                process_audio_schema.clustering_threshold if process_audio_schema.clustering_threshold is not None else self.settings.DIARIZATION_CLUSTERING_THRESHOLD,
-                process_audio_schema.min_duration_off if process_audio_schema.min_duration_off is not None else self.settings.DIARIZATION_MIN_DURATION_OFF,
-                process_audio_schema.min_cluster_size if process_audio_schema.min_cluster_size is not None else self.settings.DIARIZATION_MIN_CLUSTER_SIZE,
-                process_audio_schema.beam_size,
-                process_audio_schema.no_speech_threshold,
-                process_audio_schema.initial_prompt,
-                process_audio_schema.vad_filter,
-                process_audio_schema.hallucination_silence_threshold,
-                process_audio_schema.classify_events,
-            )
+            if isinstance(self.executor, ThreadPoolExecutor):
+                results, transcription_info = await loop.run_in_executor(
+                    self.executor, partial(transcribe_audio, *args, on_segment=on_segment, **cache_kwargs)
+                )
+            else:
+                results, transcription_info = await run_in_process_pool(self.executor, transcribe_audio, *args, on_segment=on_segment, **cache_kwargs)
         finally:
             with _active_transcriptions_lock:
                 _active_transcriptions -= 1
                 active = _active_transcriptions
-            print(f"[ThreadPool] active={active}/{self.thread_pool_executor._max_workers} queued={self.thread_pool_executor._work_queue.qsize()}")
+            print(f"[ThreadPool] active={active}/{self.executor._max_workers} queued={self._queued_tasks()}")
+
+        if cache is not None and result_key is not None:
+            await loop.run_in_executor(None, cache.put, "result", result_key, (results, transcription_info))
+
+        return results, transcription_info
 
+    def _build_response(self, results: list[Any], transcription_info: TranscriptionInfo, processing_time_start: datetime) -> ProcessAudioResponseSchema:
         speaker_set = set()
 
         for turn in results:
@@ -434,7 +839,7 @@ class WhisperService:
 
         processing_time_end = datetime.now(timezone.utc)
 
-        processed_audio_response_schema = ProcessAudioResponseSchema(
+        return ProcessAudioResponseSchema(
             num_of_speakers=len(speaker_set),
             detected_language=transcription_info.language,
             speaker_set=list(speaker_set),
@@ -455,36 +860,59 @@ class WhisperService:
             ],
             processing_time_start=processing_time_start,
             processing_time_end=processing_time_end,
-            processing_duration_in_seconds= (processing_time_end - processing_time_start).total_seconds()
+            processing_duration_in_seconds= (processing_time_end - processing_time_start).total_seconds(),
+            escalated_audio_fraction=getattr(transcription_info, "escalated_fraction", None),
         )
-    
-        await self.file_service.delete_file(file)
 
-        return processed_audio_response_schema
+    def _queued_tasks(self) -> int:
+        if isinstance(self.executor, ThreadPoolExecutor):
+            return self.executor._work_queue.qsize()
+        # A process pool tracks running and waiting jobs together
+        return max(len(self.executor._pending_work_items) - self.executor._max_workers, 0)
 
     def get_thread_pool_status(self) -> ThreadPoolStatusSchema:
-        max_workers = self.thread_pool_executor._max_workers
+        max_workers = self.executor._max_workers
         with _active_transcriptions_lock:
             active = _active_transcriptions
+        batch_status = batch_scheduler_status()
+        whisper_pool = _whisper_registry.loaded_pool(_whisper_registry.resident) if _whisper_registry is not None else None
 
         return ThreadPoolStatusSchema(
             max_workers=max_workers,
             active_workers=active,
             available_workers=max(max_workers - active, 0),
-            queued_tasks=self.thread_pool_executor._work_queue.qsize(),
+            queued_tasks=self._queued_tasks(),
+            batch_scheduler=BatchSchedulerStatusSchema(**batch_status) if batch_status is not None else None,
+            whisper_pool=WhisperPoolStatusSchema(**whisper_pool.status()) if whisper_pool is not None else None,
         )
 
+    def get_model_status(self) -> ModelRegistryStatusSchema:
+        registry_status = _whisper_registry.status() if _whisper_registry is not None else {
+            "max_bytes": self.settings.WHISPER_MODELS_MAX_BYTES, "resident_bytes": 0, "loads": 0, "evictions": 0, "hits": 0, "models": [],
+        }
+
+        for model in registry_status["models"]:
+            model["names"] = sorted(name for name, path in self.settings.WHISPER_MODELS.items() if path == model["model"])
+
+        cascade_model = self.whisper_cascade_model_path(self.settings.WHISPER_MODEL_SIZE_OR_PATH)
+
+        return ModelRegistryStatusSchema(
+            default_model=self.settings.WHISPER_MODEL_SIZE_OR_PATH,
+            available_models=self.settings.WHISPER_MODELS,
+            **registry_status,
+            cascade=CascadeStatusSchema(fast_model=cascade_model, **cascade_status()) if cascade_model else None,
+        )
+
+    def get_cache_status(self) -> CacheStatusSchema:
+        if not self.settings.RESULT_CACHE_ENABLED:
+            return CacheStatusSchema(enabled=False, entries=0, size_bytes=0, max_size_bytes=0, hits={}, misses={})
 
-def transcribe_audio(file_path: str, model_size_or_path: str, device: str, compute_type: str, hf_token: str, num_of_speakers: Optional[int] = None, language: Optional[str] = None, clustering_threshold: float = 0.65, min_duration_off: float = 0.1, min_cluster_size: int = 12, beam_size: Optional[int] = None, no_speech_threshold: Optional[float] = None, initial_prompt: Optional[str] = None, vad_filter: Optional[bool] = None, hallucination_silence_threshold: Optional[float] = None, classify_events: Optional[bool] = False) -> Tuple[list[Any], TranscriptionInfo]:
+        cache = get_result_cache(str(self.settings.RESULT_CACHE_DIR), self.settings.RESULT_CACHE_MAX_BYTES)
 
-    import os
-    os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
-    os.environ["OMP_NUM_THREADS"] = "1"
-    os.environ["MKL_NUM_THREADS"] = "1"
-    os.environ["NUMEXPR_NUM_THREADS"] = "1"
+        return CacheStatusSchema(enabled=True, **cache.status())
 
 
-    whisper_model = get_whisper_model(model_size_or_path, device, compute_type)
+def transcribe_audio(audio_source: Union[str, bytes], model_size_or_path: str, device: str, compute_type: str, hf_token: str, num_of_speakers: Optional[int] = None, language: Optional[str] = None, clustering_threshold: float = 0.65, min_duration_off: float = 0.1, min_cluster_size: int = 12, beam_size: Optional[int] = None, no_speech_threshold: Optional[float] = None, initial_prompt: Optional[str] = None, vad_filter: Optional[bool] = None, hallucination_silence_threshold: Optional[float] = None, classify_events: Optional[bool] = False, parallel_diarization: bool = True, whisper_cpu_threads: int = 0, diarization_threads: int = 0, diarization_pool_size: int = 4, ast_batch_size: int = 16, ast_event_mode: str = "timeline", ast_turn_pooling: str = "max", whisper_batch_size: int = 1, whisper_batch_max_wait: float = 0.05, whisper_replicas: int = 1, long_audio_min_seconds: float = 0, long_audio_chunk_seconds: float = 300, long_audio_max_parallel_chunks: int = 4, whisper_default_model: Optional[str] = None, whisper_models_max_bytes: int = 0, whisper_cascade_model: Optional[str] = None, cascade_min_avg_logprob: float = -0.6, cascade_min_word_probability: float = 0.3, cascade_max_compression_ratio: float = 2.0, on_segment: Optional[Callable[[dict], None]] = None, audio_hash: Optional[str] = None, cache_dir: Optional[str] = None, cache_max_bytes: int = 0) -> Tuple[list[Any], TranscriptionInfo]:
 
     _beam_size = beam_size if beam_size is not None else 3
     _no_speech_threshold = no_speech_threshold if no_speech_threshold is not None else 0.3
@@ -508,62 +936,155 @@ def transcribe_audio(file_path: str, model_size_or_path: str, device: str, compu
     print(f"  min_duration_off:             {min_duration_off}")
     print(f"  min_cluster_size:             {min_cluster_size}")
     print(f"  classify_events:              {classify_events or False}")
+    print(f"  parallel_diarization:         {parallel_diarization}")
+    print(f"  whisper_batch_size:           {whisper_batch_size}")
+    print(f"  long_audio_min_seconds:       {long_audio_min_seconds or 'off'}")
+    print(f"  cascade_model:                {whisper_cascade_model or 'off'}")
     print("=" * 50)
 
-    print("Transcribing...")
-    segments, info = whisper_model.transcribe(
-        file_path,
-        beam_size=_beam_size,
-        word_timestamps=True,
-        language=language,
-        no_speech_threshold=_no_speech_threshold,
-        initial_prompt=_initial_prompt,
-        vad_filter=_vad_filter,
-        hallucination_silence_threshold=_hallucination_silence_threshold,
-        suppress_tokens=[],
-        condition_on_previous_text=False,
-    )
-
-    print("Loading diarization model...")
-
-
-    if torch.cuda.is_available():
-        print("CUDA IS AVAILABLE")
-    else:
-        print("CUDA NOT AVAILABLE, USING CPU for Diarization")
-   
-    diarization_pipeline = get_diarization_pipeline(hf_token)
-    diarization_pipeline.instantiate({
-        "segmentation": {
-            "min_duration_off": min_duration_off,
-        },
-        "clustering": {
-            "threshold": clustering_threshold,
-            "method": "centroid",
-            "min_cluster_size": min_cluster_size,
-        }
-    })
+    # Stage outputs are cached by audio hash plus the parameters that affect them,
+    # so e.g. a new clustering_threshold re-runs diarization but reuses the transcript.
+    stage_cache = get_result_cache(cache_dir, cache_max_bytes) if audio_hash and cache_dir else None
+    whisper_key = cache_key(audio_hash, model_size_or_path, whisper_model_identity(model_size_or_path), device, compute_type, language, _beam_size, _no_speech_threshold, _initial_prompt, _vad_filter, _hallucination_silence_threshold, whisper_batch_size > 1, long_audio_min_seconds, long_audio_chunk_seconds, whisper_cascade_model, whisper_model_identity(whisper_cascade_model) if whisper_cascade_model else None, (cascade_min_avg_logprob, cascade_min_word_probability, cascade_max_compression_ratio) if whisper_cascade_model else None)
+    diarization_key = cache_key(audio_hash, DIARIZATION_MODEL_ID, num_of_speakers, min_duration_off, clustering_threshold, min_cluster_size)
 
+    transcript = stage_cache.get("whisper", whisper_key) if stage_cache is not None else None
+    tracks = stage_cache.get("diarization", diarization_key) if stage_cache is not None else None
 
-    result_segments = []
-    for segment in segments:
-        result_segments.append({
-            'start': segment.start,
-            'end': segment.end,
-            'text': segment.text,
-            'words': segment.words
-        })
+    # Decode once; every stage below works on this buffer or slices of it.
+    audio = load_audio(audio_source, DIARIZATION_CHUNK_SAMPLES) if transcript is None or tracks is None or classify_events else None
+
+    with ExitStack() as stack:
+        diarization_pipeline = None
+        diarization_future = None
 
-    words_with_speakers = assign_word_speakers(file_path, result_segments, diarization_pipeline, num_of_speakers)
-    speaker_turns = group_by_speaker_turns(words_with_speakers)
+        if tracks is None:
+            print("Loading diarization model...")
+
+            if torch.cuda.is_available():
+                print("CUDA IS AVAILABLE")
+            else:
+                print("CUDA NOT AVAILABLE, USING CPU for Diarization")
+
+            diarization_pool = get_diarization_pool(hf_token, diarization_threads, diarization_pool_size)
+
+            # Each job checks out its own pipeline instance for its hyper-parameters, so
+            # concurrent jobs never overwrite each other's instantiated parameters.
+            diarization_pipeline = stack.enter_context(diarization_pool.checkout(min_duration_off, clustering_threshold, min_cluster_size))
+
+            # Diarization only needs the decoded audio, so it can start before Whisper
+            # produces anything; the two are joined before word-to-speaker assignment.
+            if parallel_diarization:
+                diarization_future = diarization_executor.submit(diarize_audio, audio, diarization_pipeline, num_of_speakers)
+
+        if transcript is None:
+            try:
+                whisper_registry = get_whisper_registry(whisper_default_model or model_size_or_path, device, compute_type, whisper_cpu_threads, whisper_replicas, whisper_models_max_bytes)
+
+                # The model stays loaded and a replica is held while this job decodes on its
+                # own (segments are produced lazily, so until the table is built); batches
+                # and long-audio chunks check replicas out themselves
+                with ExitStack() as whisper_checkout:
+                    whisper_pool = whisper_checkout.enter_context(whisper_registry.use(model_size_or_path))
+                    print("Transcribing...")
+                    if whisper_batch_size > 1:
+                        # Chunks are decoded in batches shared with the other running jobs
+                        scheduler = get_batch_scheduler(model_size_or_path, whisper_pool, whisper_batch_size, whisper_batch_max_wait)
+                        segments, info = ScheduledBatchPipeline(whisper_pool, scheduler).transcribe(
+                            audio.samples,
+                            beam_size=_beam_size,
+                            word_timestamps=True,
+                            language=language,
+                            no_speech_threshold=_no_speech_threshold,
+                            initial_prompt=_initial_prompt,
+                            vad_filter=_vad_filter,
+                            # Without VAD the audio is cut into chunks of at most 30 s at pauses
+                            clip_timestamps=None if _vad_filter else pause_clip_timestamps(audio),
+                            suppress_tokens=[],
+                            batch_size=whisper_batch_size,
+                        )
+                    else:
+                        transcribe_options = dict(
+                            beam_size=_beam_size,
+                            word_timestamps=True,
+                            language=language,
+                            no_speech_threshold=_no_speech_threshold,
+                            initial_prompt=_initial_prompt,
+                            vad_filter=_vad_filter,
+                            hallucination_silence_threshold=_hallucination_silence_threshold,
+                            suppress_tokens=[],
+                            condition_on_previous_text=False,
+                        )
+
+                        if whisper_cascade_model:
+                            # The fast model transcribes everything; the requested one redoes what it is unsure of
+                            fast_pool = whisper_checkout.enter_context(whisper_registry.use(whisper_cascade_model))
+                            segments, info = transcribe_cascade(fast_pool, whisper_pool, audio, cascade_min_avg_logprob, cascade_min_word_probability, cascade_max_compression_ratio, **transcribe_options)
+                        elif long_audio_min_seconds > 0 and audio.duration >= long_audio_min_seconds:
+                            # Independent chunks split at pauses, decoded in parallel and stitched back
+                            split_points = find_split_points(audio, long_audio_chunk_seconds)
+                            print(f"Long audio: transcribing {len(split_points) + 1} chunks in parallel")
+                            segments, info = transcribe_long_audio(whisper_pool, audio, split_points, get_chunk_executor(long_audio_max_parallel_chunks), **transcribe_options)
+                        else:
+                            whisper_model = whisper_checkout.enter_context(whisper_pool.checkout())
+                            segments, info = whisper_model.transcribe(audio.samples, **transcribe_options)
+
+                    decoded_segments: list[dict] = []
+
+                    def report_segment(segment: dict) -> None:
+                        decoded_segments.append(segment)
+                        if on_segment is not None:
+                            on_segment(segment)
+
+                    # Words go straight into the compact table; segment objects are not kept
+                    word_table = WordTable.from_words(_segment_words(segments, report_segment))
+            except BaseException:
+                # Never return the pipeline to the pool while a diarization run still uses it
+                if diarization_future is not None and not diarization_future.cancel():
+                    wait([diarization_future])
+                raise
+
+            if stage_cache is not None:
+                stage_cache.put("whisper", whisper_key, (word_table, info, decoded_segments))
+        else:
+            print("Reusing cached transcription")
+            word_table, info, decoded_segments = transcript
+            if on_segment is not None:
+                for segment in decoded_segments:
+                    on_segment(segment)
+
+        if tracks is None:
+            if diarization_future is not None:
+                tracks = diarization_future.result()
+            else:
+                tracks = diarize_audio(audio, diarization_pipeline, num_of_speakers)
+
+            if stage_cache is not None:
+                stage_cache.put("diarization", diarization_key, tracks)
+        else:
+            print("Reusing cached diarization")
+
+    assign_word_speakers(word_table, tracks)
+    speaker_turns = group_by_speaker_turns(word_table)
 
     if classify_events:
         print(f"Classifying audio events for {len(speaker_turns)} turns...")
+
+        timeline = None
+        if ast_event_mode == "timeline":
+            timeline = build_event_timeline(audio, [(turn["start"], turn["end"]) for turn in speaker_turns], ast_batch_size)
+
         for i, turn in enumerate(speaker_turns):
-            turn_words = [w for w in words_with_speakers if turn["start"] <= w["start"] <= turn["end"]]
+            # Each turn knows the index range of its words in the table
+            turn_words = word_table.records(*turn["word_range"])
             # Pass words so both classify_ and embed_ can mine Whisper annotations
-            turn["audio_events"] = classify_audio_segment(file_path, turn["start"], turn["end"], turn_words)
-            turn["text_with_events"] = embed_events_in_text(file_path, turn["start"], turn["end"], turn_words)
+            if timeline is not None:
+                turn["audio_events"], turn["text_with_events"] = classify_turn_events_from_timeline(timeline, turn["start"], turn["end"], turn_words, ast_turn_pooling)
+            elif ast_event_mode == "two_pass":
+                turn["audio_events"] = classify_audio_segment(audio, turn["start"], turn["end"], turn_words)
+                turn["text_with_events"] = embed_events_in_text(audio, turn["start"], turn["end"], turn_words, ast_batch_size)
+            else:
+                turn["audio_events"], turn["text_with_events"] = classify_turn_events(audio, turn["start"], turn["end"], turn_words, ast_batch_size, ast_turn_pooling)
 
             # Log what was found for this turn
             print(f"  Turn {i + 1} [{turn['start']:.2f}s → {turn['end']:.2f}s] {turn['speaker']}")
@@ -579,32 +1100,24 @@ def transcribe_audio(file_path: str, model_size_or_path: str, device: str, compu
     return speaker_turns, info
 
 
-def safe_load_audio(audio_file_path: str):
-    import os
-    tmp_wav_path = None
-    try:
-        return torchaudio.load(str(audio_file_path))
-    except RuntimeError:
-        from pydub import AudioSegment
-        tmp_wav_path = str(audio_file_path) + "_converted.wav"
-        AudioSegment.from_file(audio_file_path).export(tmp_wav_path, format="wav")
-        waveform, sample_rate = torchaudio.load(tmp_wav_path)
-        return waveform, sample_rate
-    finally:
-        if tmp_wav_path and os.path.exists(tmp_wav_path):
-            os.remove(tmp_wav_path)
+def _segment_words(segments, on_segment: Optional[Callable[[dict], None]] = None) -> Iterator[Any]:
+    """Flatten Whisper segments into words, reporting each segment as it is decoded."""
+    for segment in segments:
+        if on_segment is not None:
+            on_segment({'start': segment.start, 'end': segment.end, 'text': segment.text})
+        if segment.words:
+            yield from segment.words
+
 
+# Diarization input is zero-padded to a whole number of these chunks (10 s at 16 kHz)
+DIARIZATION_CHUNK_SAMPLES = 160000
 
-def pad_audio(audio_file_path: str) -> dict:
-    waveform, sample_rate = safe_load_audio(audio_file_path)
 
-    chunk_size = 160000
-    remainder = waveform.shape[-1] % chunk_size
-    if remainder != 0:
-        pad_size = chunk_size - remainder
-        waveform = torch.nn.functional.pad(waveform, (0, pad_size))
+def pad_audio(audio: DecodedAudio) -> dict:
+    # load_audio reserved the zero tail, so this is a view rather than a padded copy
+    waveform = audio.as_tensor(audio.padded(DIARIZATION_CHUNK_SAMPLES))
 
-    return {"waveform": waveform, "sample_rate": sample_rate}
+    return {"waveform": waveform, "sample_rate": audio.sample_rate}
 
 
 # Within this distance (seconds) of a diarization segment boundary, midpoint assignment
@@ -616,85 +1129,11 @@ _BOUNDARY_ZONE_S = 0.15
 # of how many words they contain.
 _ISLAND_MAX_DURATION_S = 0.3
 
+# Upper bound on island-collapsing passes; real transcripts settle in two or three.
+_ISLAND_MAX_PASSES = 8
 
-def _nearest_speaker_by_midpoint(start: float, end: float, tracks: list) -> Optional[str]:
-    """Return the speaker whose segment midpoint is closest to the given time range."""
-    mid = (start + end) / 2
-    best_speaker, best_dist = None, float('inf')
-    for turn, _, speaker in tracks:
-        dist = abs(mid - (turn.start + turn.end) / 2)
-        if dist < best_dist:
-            best_dist = dist
-            best_speaker = speaker
-    return best_speaker
-
-
-def _assign_word_speaker_by_overlap(word, tracks: list) -> Optional[str]:
-    """Assign speaker by maximum overlap — used only in the boundary zone."""
-    best_speaker, best_overlap = None, 0.0
-    for turn, _, speaker in tracks:
-        overlap = max(0.0, min(word.end, turn.end) - max(word.start, turn.start))
-        if overlap > best_overlap:
-            best_overlap = overlap
-            best_speaker = speaker
-    if best_speaker is None:
-        best_speaker = _nearest_speaker_by_midpoint(word.start, word.end, tracks)
-    return best_speaker
-
-
-def _assign_word_speaker_by_midpoint(word, tracks: list) -> Optional[str]:
-    """Assign speaker by word midpoint with a boundary-zone fallback.
-
-    For words whose midpoint sits well inside a diarization segment, midpoint
-    gives a clean unambiguous answer. For words within _BOUNDARY_ZONE_S of a
-    segment edge (where pyannote timing errors are most likely), we fall back
-    to overlap-based comparison which is more robust in that narrow window.
-    """
-    mid = (word.start + word.end) / 2
-
-    for turn, _, speaker in tracks:
-        if turn.start <= mid <= turn.end:
-            near_boundary = (mid - turn.start) < _BOUNDARY_ZONE_S or (turn.end - mid) < _BOUNDARY_ZONE_S
-            if near_boundary:
-                return _assign_word_speaker_by_overlap(word, tracks)
-            return speaker
-
-    return _nearest_speaker_by_midpoint(word.start, word.end, tracks)
-
-
-def _smooth_speaker_assignments(words: list) -> list:
-    """Collapse short-duration speaker islands surrounded on both sides by the same speaker.
-
-    Uses total run duration rather than word count so that short bursts of multiple
-    fast words (e.g. 'Ja, okay') are also caught. Iterates until stable.
-    """
-    if len(words) < 3:
-        return words
-
-    changed = True
-    while changed:
-        changed = False
-        i = 0
-        while i < len(words):
-            current_speaker = words[i]['speaker']
-            j = i + 1
-            while j < len(words) and words[j]['speaker'] == current_speaker:
-                j += 1
 
-            if i > 0 and j < len(words):
-                run_duration = words[j - 1]['end'] - words[i]['start']
-                prev_speaker = words[i - 1]['speaker']
-                next_speaker = words[j]['speaker']
-                if run_duration < _ISLAND_MAX_DURATION_S and prev_speaker == next_speaker and prev_speaker != current_speaker:
-                    for k in range(i, j):
-                        words[k] = {**words[k], 'speaker': prev_speaker}
-                    changed = True
-            i = j
-
-    return words
-
-
-def assign_word_speakers(audio_file_path: str, transcription_segments, diarization_pipeline: Pipeline, num_of_speakers: Optional[int] = None):
+def diarize_audio(audio: DecodedAudio, diarization_pipeline: Pipeline, num_of_speakers: Optional[int] = None) -> list:
     print("Diarizing audio...")
     diarization_kwargs = {}
 
@@ -703,65 +1142,45 @@ def assign_word_speakers(audio_file_path: str, transcription_segments, diarizati
         diarization_kwargs["max_speakers"] = num_of_speakers
 
     # Pad audio file with empty audio after chunk split
-    audio_input = pad_audio(audio_file_path)
+    audio_input = pad_audio(audio)
 
     diarization = diarization_pipeline(audio_input, **diarization_kwargs)
-    tracks = list(diarization.itertracks(yield_label=True))
+    return list(diarization.itertracks(yield_label=True))
 
-    words_with_speakers = []
 
-    for segment in transcription_segments:
-        if not segment['words']:
-            continue
+def assign_word_speakers(word_table: WordTable, tracks: list) -> WordTable:
+    # Midpoint assignment with a boundary-zone overlap fallback, done for all
+    # words at once against a sorted index of the diarization tracks.
+    track_index = SpeakerTrackIndex(tracks, _BOUNDARY_ZONE_S)
+    word_table.set_speakers(track_index.assign(word_table.starts, word_table.ends))
+
+    unassigned = int((word_table.speakers == NO_SPEAKER).sum())
+    if unassigned:
+        print(f"WARNING: No speaker found for {unassigned} word(s)")
 
-        for word in segment['words']:
-            assigned = _assign_word_speaker_by_midpoint(word, tracks)
-            if assigned is None:
-                print(f"WARNING: No speaker found for word '{word.word}' at {word.start:.2f}s-{word.end:.2f}s")
-            words_with_speakers.append({'word': word.word, 'start': word.start, 'end': word.end, 'speaker': assigned})
+    # Collapse short speaker islands using total run duration rather than word
+    # count, so short bursts of multiple fast words (e.g. 'Ja, okay') are caught too.
+    word_table.collapse_islands(_ISLAND_MAX_DURATION_S, _ISLAND_MAX_PASSES)
 
-    return _smooth_speaker_assignments(words_with_speakers)
+    return word_table
 
 
-def group_by_speaker_turns(words_with_speakers: list[Any]):
-    if not words_with_speakers:
+def group_by_speaker_turns(word_table: WordTable):
+    if not len(word_table):
         return []
-    
-    valid_words = [w for w in words_with_speakers if w['speaker'] is not None]
-    dropped = len(words_with_speakers) - len(valid_words)
+
+    dropped = int((word_table.speakers == NO_SPEAKER).sum())
     if dropped > 0:
         print(f"WARNING: {dropped} word(s) dropped due to no speaker assignment")
 
-    if not valid_words:
-        return []
-    
     turns = []
-    current_speaker = valid_words[0]['speaker']
-    current_words = [valid_words[0]['word']]
-    current_start = valid_words[0]['start']
-    current_end = valid_words[0]['end']
-    
-    for word_info in valid_words[1:]:
-        if word_info['speaker'] == current_speaker:
-            current_words.append(word_info['word'])
-            current_end = word_info['end']
-        else:
-            turns.append({
-                'speaker': current_speaker,
-                'start': current_start,
-                'end': current_end,
-                'text': ''.join(current_words).strip()
-            })
-            current_speaker = word_info['speaker']
-            current_words = [word_info['word']]
-            current_start = word_info['start']
-            current_end = word_info['end']
-    
-    turns.append({
-        'speaker': current_speaker,
-        'start': current_start,
-        'end': current_end,
-        'text': ''.join(current_words).strip()
-    })
-    
+    for speaker_id, lo, hi in word_table.speaker_runs():
+        turns.append({
+            'speaker': word_table.speaker_label(speaker_id),
+            'start': float(word_table.starts[lo]),
+            'end': float(word_table.ends[hi - 1]),
+            'text': word_table.text(lo, hi),
+            'word_range': (lo, hi),
+        })
+
     return turns
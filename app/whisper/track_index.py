@@ -0,0 +1,135 @@
+import numpy as np
+from typing import Optional
+
+
+class SpeakerTrackIndex:
+    """Diarization tracks as sorted NumPy arrays for vectorized word assignment.
+
+    Replaces per-word linear scans over ``tracks`` with ``searchsorted`` lookups.
+    Tracks are ordered by start time (the order ``itertracks`` yields them in),
+    and every tie is broken towards the earlier track exactly like the scans did,
+    including distances that only tie after float rounding.
+    """
+
+    def __init__(self, tracks: list, boundary_zone: float):
+        order = np.argsort(np.array([turn.start for turn, _, _ in tracks], dtype=np.float64), kind="stable")
+        tracks = [tracks[i] for i in order]
+
+        self.labels: list[str] = [speaker for _, _, speaker in tracks]
+        self.starts = np.array([turn.start for turn, _, _ in tracks], dtype=np.float64)
+        self.ends = np.array([turn.end for turn, _, _ in tracks], dtype=np.float64)
+        self.boundary_zone = boundary_zone
+
+        # Running maximum of track ends: the first index where it reaches t is the
+        # first track (in start order) that ends at or after t.
+        self._max_ends = np.maximum.accumulate(self.ends) if len(tracks) else self.ends
+
+        # Track midpoints sorted for nearest-midpoint lookups. ``_mid_first`` maps
+        # each sorted position to the earliest track sharing that midpoint value;
+        # ``_run_start`` / ``_run_end`` to the first / last position with that value.
+        self.mids = (self.starts + self.ends) / 2
+        self._mid_order = np.argsort(self.mids, kind="stable")
+        self._sorted_mids = self.mids[self._mid_order]
+        if len(tracks):
+            positions = np.arange(len(tracks))
+            run_heads = np.r_[True, self._sorted_mids[1:] != self._sorted_mids[:-1]]
+            run_tails = np.r_[self._sorted_mids[1:] != self._sorted_mids[:-1], True]
+            self._run_start = np.maximum.accumulate(np.where(run_heads, positions, 0))
+            self._run_end = np.minimum.accumulate(np.where(run_tails, positions, len(tracks))[::-1])[::-1]
+            self._mid_first = self._mid_order[self._run_start]
+        else:
+            self._mid_first = self._run_start = self._run_end = self._mid_order
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def assign(self, word_starts: np.ndarray, word_ends: np.ndarray) -> list[Optional[str]]:
+        """Assign a speaker label to every word (None only when there are no tracks).
+
+        Midpoint inside a track → that track's speaker, unless the midpoint is
+        within ``boundary_zone`` of the track's edges, in which case the track
+        with the largest overlap wins. Words outside every track take the
+        speaker of the track whose midpoint is nearest.
+        """
+        if len(word_starts) == 0:
+            return []
+        if not len(self):
+            return [None] * len(word_starts)
+
+        word_mids = (word_starts + word_ends) / 2
+
+        # First track (start order) that contains the midpoint, if any
+        num_started = np.searchsorted(self.starts, word_mids, side="right")
+        containing = np.searchsorted(self._max_ends, word_mids, side="left")
+        contained = containing < num_started
+        containing = np.minimum(containing, len(self) - 1)
+
+        near_boundary = contained & (
+            ((word_mids - self.starts[containing]) < self.boundary_zone)
+            | ((self.ends[containing] - word_mids) < self.boundary_zone)
+        )
+
+        track_idx = np.where(contained, containing, self._nearest_by_midpoint(word_mids))
+
+        for i in np.flatnonzero(near_boundary).tolist():
+            track_idx[i] = self._best_overlap(word_starts[i], word_ends[i], word_mids[i])
+
+        return [self.labels[idx] for idx in track_idx.tolist()]
+
+    def _nearest_by_midpoint(self, word_mids: np.ndarray) -> np.ndarray:
+        """Index of the track whose midpoint is closest to each word midpoint."""
+        n = len(self)
+        pos = np.searchsorted(self._sorted_mids, word_mids, side="left")
+        left = np.maximum(pos - 1, 0)
+        right = np.minimum(pos, n - 1)
+
+        left_dist = np.where(pos > 0, np.abs(word_mids - self._sorted_mids[left]), np.inf)
+        right_dist = np.where(pos < n, np.abs(word_mids - self._sorted_mids[right]), np.inf)
+        left_idx = self._mid_first[left]
+        right_idx = self._mid_first[right]
+
+        nearest = np.where(
+            left_dist < right_dist, left_idx,
+            np.where(right_dist < left_dist, right_idx, np.minimum(left_idx, right_idx)),
+        )
+
+        # Distances are monotonic in the midpoint on each side, so a further track can
+        # only tie when the next distinct midpoint beyond the nearest one does. That
+        # happens when two midpoints differ by a rounding error; the scan then picked
+        # the earlier track, so those words are resolved by scanning like it did.
+        dist = np.minimum(left_dist, right_dist)
+        beyond_left = self._run_start[left] - 1
+        beyond_right = self._run_end[right] + 1
+        ambiguous = (
+            ((left_dist == dist) & (beyond_left >= 0)
+             & (np.abs(word_mids - self._sorted_mids[np.maximum(beyond_left, 0)]) == dist))
+            | ((right_dist == dist) & (beyond_right < n)
+               & (np.abs(word_mids - self._sorted_mids[np.minimum(beyond_right, n - 1)]) == dist))
+        )
+        for i in np.flatnonzero(ambiguous).tolist():
+            nearest[i] = self._scan_nearest(word_mids[i])
+
+        return nearest
+
+    def _scan_nearest(self, word_mid: float) -> int:
+        """First track in start order at the smallest midpoint distance, as the linear scan found it."""
+        best_idx, best_dist = 0, float("inf")
+        for idx, mid in enumerate(self.mids.tolist()):
+            dist = abs(word_mid - mid)
+            if dist < best_dist:
+                best_idx, best_dist = idx, dist
+        return best_idx
+
+    def _best_overlap(self, word_start: float, word_end: float, word_mid: float) -> int:
+        """Track with the largest positive overlap, else the nearest by midpoint."""
+        # Only tracks starting before the word ends and ending after it starts can overlap
+        lo = int(np.searchsorted(self._max_ends, word_start, side="right"))
+        hi = int(np.searchsorted(self.starts, word_end, side="left"))
+
+        if lo < hi:
+            overlaps = np.minimum(word_end, self.ends[lo:hi]) - np.maximum(word_start, self.starts[lo:hi])
+            best = int(np.argmax(overlaps))
+            if overlaps[best] > 0.0:
+                return lo + best
+
+        return int(self._nearest_by_midpoint(np.array([word_mid]))[0])
@@ -0,0 +1,73 @@
+import numpy as np
+from settings.config import ConfigType
+from .audio import DecodedAudio, TARGET_SAMPLE_RATE
+from .model_status import model_status, tracking_warmup
+from .process_pool import process_pool_ready
+from .service import (
+    AST_TARGET_EVENTS, AST_WINDOW_SIZE, DIARIZATION_CHUNK_SAMPLES,
+    diarize_audio, get_ast_label_indices, get_diarization_pool, get_whisper_registry, score_ast_windows,
+)
+
+
+def warm_up_whisper(settings: ConfigType) -> None:
+    registry = get_whisper_registry(settings.WHISPER_MODEL_SIZE_OR_PATH, settings.WHISPER_MODEL_DEVICE, settings.WHISPER_COMPUTE_TYPE, settings.WHISPER_CPU_THREADS, settings.WHISPER_REPLICAS, settings.WHISPER_MODELS_MAX_BYTES)
+
+    with registry.use(settings.WHISPER_MODEL_SIZE_OR_PATH) as pool, tracking_warmup("whisper"), pool.checkout() as model:
+        # Language detection plus decoding runs both encoder and decoder once
+        segments, _ = model.transcribe(np.zeros(TARGET_SAMPLE_RATE, dtype=np.float32), beam_size=1)
+        list(segments)
+
+
+def warm_up_diarization(settings: ConfigType) -> None:
+    pool = get_diarization_pool(settings.HF_TOKEN, settings.DIARIZATION_TORCH_THREADS, settings.DIARIZATION_POOL_SIZE)
+
+    with tracking_warmup("diarization"):
+        # Also leaves an instantiated copy for the default parameters in the pool
+        with pool.checkout(settings.DIARIZATION_MIN_DURATION_OFF, settings.DIARIZATION_CLUSTERING_THRESHOLD, settings.DIARIZATION_MIN_CLUSTER_SIZE) as pipeline:
+            noise = np.random.default_rng(0).normal(0.0, 0.01, DIARIZATION_CHUNK_SAMPLES).astype(np.float32)
+            diarize_audio(DecodedAudio(noise), pipeline)
+
+
+def warm_up_ast(settings: ConfigType) -> None:
+    label_indices, _ = get_ast_label_indices(frozenset(AST_TARGET_EVENTS))
+
+    with tracking_warmup("ast"):
+        window = np.zeros(int(AST_WINDOW_SIZE * TARGET_SAMPLE_RATE), dtype=np.float32)
+        score_ast_windows(window, [(0, len(window))], label_indices)
+
+
+_WARM_UPS = {
+    "whisper": warm_up_whisper,
+    "diarization": warm_up_diarization,
+    "ast": warm_up_ast,
+}
+
+
+def warm_up_models(settings: ConfigType) -> None:
+    """Load every model in ``MODEL_WARMUP_MODELS`` and run one dummy inference through it.
+
+    Blocking; the lifespan runs it in a worker thread so the server starts
+    answering (and reporting not-ready) immediately.
+    """
+    for name in settings.MODEL_WARMUP_MODELS:
+        print(f"Warming up {name} model...")
+        try:
+            _WARM_UPS[name](settings)
+        except Exception as e:
+            print(f"ERROR: Warm-up of {name} model failed: {e}")
+
+    print(f"Model warm-up finished: {model_status()}")
+
+
+def is_ready(settings: ConfigType) -> bool:
+    """True once every model that is warmed up at startup is ready; always True without warm-up.
+
+    With the process backend: once every worker has started and its models are ready.
+    """
+    if settings.EXECUTION_BACKEND == "process":
+        return process_pool_ready(settings)
+    if not settings.MODEL_WARMUP_ENABLED:
+        return True
+
+    status = model_status()
+    return all(status[name]["state"] == "ready" for name in settings.MODEL_WARMUP_MODELS)
@@ -0,0 +1,75 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from faster_whisper import WhisperModel  # type: ignore
+
+
+def threads_per_replica(cpu_threads: int, replicas: int) -> int:
+    """Intra-op threads of each replica: ``cpu_threads``, else the available CPUs split between the replicas."""
+    if cpu_threads > 0:
+        return cpu_threads
+    return max(1, len(os.sched_getaffinity(0)) // max(1, replicas))
+
+
+class WhisperReplicaPool:
+    """Whisper model replicas checked out by one job (or chunk, or batch) at a time.
+
+    The replicas are the CTranslate2 workers of a single ``WhisperModel``
+    (``num_workers``), which share the weights on CPU, so a replica costs
+    threads rather than memory. The model only decodes ``replicas`` calls in
+    parallel; checking out first keeps further jobs waiting here, where the
+    wait is measured, instead of piling up inside CTranslate2 with executor
+    threads blocked on it.
+    """
+
+    def __init__(self, model: WhisperModel, replicas: int, cpu_threads: int):
+        self.model = model
+        self.replicas = max(1, replicas)
+        self.cpu_threads = cpu_threads
+
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+
+    @contextmanager
+    def checkout(self) -> Iterator[WhisperModel]:
+        """Hold one replica; everything decoded with the model must happen inside."""
+        start = time.perf_counter()
+
+        with self._condition:
+            self._waiting += 1
+            try:
+                while self._in_use >= self.replicas:
+                    self._condition.wait()
+            finally:
+                self._waiting -= 1
+            self._in_use += 1
+
+            wait = time.perf_counter() - start
+            self._checkouts += 1
+            self._total_wait_seconds += wait
+            self._max_wait_seconds = max(self._max_wait_seconds, wait)
+
+        try:
+            yield self.model
+        finally:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+
+    def status(self) -> dict:
+        with self._condition:
+            return {
+                "replicas": self.replicas,
+                "threads_per_replica": self.cpu_threads,
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "average_wait_seconds": round(self._total_wait_seconds / self._checkouts, 4) if self._checkouts else 0.0,
+                "max_wait_seconds": round(self._max_wait_seconds, 4),
+            }
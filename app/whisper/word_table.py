@@ -0,0 +1,145 @@
+import numpy as np
+from typing import Any, Iterable, Optional, Tuple
+
+# Speaker id of words that could not be assigned to any speaker
+NO_SPEAKER = -1
+
+
+class WordTable:
+    """Transcript words stored as parallel arrays.
+
+    Holds text, start, end and probability per word plus a small-int speaker id
+    (an index into ``speaker_labels``) instead of one dict per word, which keeps
+    very long transcripts compact and lets smoothing/grouping work on arrays.
+    """
+
+    def __init__(self, words: list[str], starts: np.ndarray, ends: np.ndarray, probabilities: np.ndarray):
+        self.words = words
+        self.starts = starts
+        self.ends = ends
+        self.probabilities = probabilities
+        self.speakers = np.full(len(words), NO_SPEAKER, dtype=np.int16)
+        self.speaker_labels: list[str] = []
+
+    @classmethod
+    def from_words(cls, words: Iterable[Any]) -> "WordTable":
+        """Build a table from faster-whisper ``Word`` objects."""
+        texts: list[str] = []
+        starts: list[float] = []
+        ends: list[float] = []
+        probabilities: list[float] = []
+
+        for word in words:
+            texts.append(word.word)
+            starts.append(word.start)
+            ends.append(word.end)
+            probabilities.append(word.probability)
+
+        return cls(
+            texts,
+            np.array(starts, dtype=np.float64),
+            np.array(ends, dtype=np.float64),
+            np.array(probabilities, dtype=np.float32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def set_speakers(self, labels: list[Optional[str]]) -> None:
+        """Store per-word speaker labels as ids into ``speaker_labels``."""
+        label_ids: dict[str, int] = {}
+        ids = np.empty(len(labels), dtype=np.int16)
+
+        for i, label in enumerate(labels):
+            if label is None:
+                ids[i] = NO_SPEAKER
+            else:
+                ids[i] = label_ids.setdefault(label, len(label_ids))
+
+        self.speakers = ids
+        self.speaker_labels = list(label_ids)
+
+    def speaker_label(self, speaker_id: int) -> Optional[str]:
+        return None if speaker_id == NO_SPEAKER else self.speaker_labels[speaker_id]
+
+    def collapse_islands(self, max_duration: float, max_passes: int) -> None:
+        """Reassign short speaker runs surrounded on both sides by the same other speaker.
+
+        Works on run-length encoded speakers: a run shorter than ``max_duration``
+        (first word start to last word end) whose neighbouring runs share a
+        different speaker takes that speaker. Within a pass runs are visited left
+        to right and a run right after a collapsed one is left alone, as its left
+        neighbour has just become its own speaker. Each pass is a handful of
+        vectorized operations over the runs; passes repeat until nothing changes,
+        at most ``max_passes`` times.
+        """
+        n = len(self)
+        if n < 3:
+            return
+
+        run_first = np.r_[0, np.flatnonzero(self.speakers[1:] != self.speakers[:-1]) + 1]
+        run_speakers = self.speakers[run_first]
+
+        for _ in range(max_passes):
+            if len(run_first) < 3:
+                break
+
+            run_last = np.r_[run_first[1:], n] - 1
+            durations = self.ends[run_last] - self.starts[run_first]
+
+            candidate = np.zeros(len(run_first), dtype=bool)
+            candidate[1:-1] = (
+                (durations[1:-1] < max_duration)
+                & (run_speakers[:-2] == run_speakers[2:])
+                & (run_speakers[:-2] != run_speakers[1:-1])
+            )
+            if not candidate.any():
+                break
+
+            # In a chain of adjacent candidates only every other one collapses,
+            # starting with the first: once a run collapses, the next run's left
+            # neighbour has its speaker and it no longer qualifies.
+            block_start = np.maximum.accumulate(np.where(candidate & ~np.r_[False, candidate[:-1]], np.arange(len(candidate)), 0))
+            collapse = candidate & ((np.arange(len(candidate)) - block_start) % 2 == 0)
+
+            collapsed_idx = np.flatnonzero(collapse)
+            run_speakers = run_speakers.copy()
+            run_speakers[collapsed_idx] = run_speakers[collapsed_idx - 1]
+
+            # Merge neighbouring runs that now share a speaker
+            keep = np.r_[True, run_speakers[1:] != run_speakers[:-1]]
+            run_first = run_first[keep]
+            run_speakers = run_speakers[keep]
+
+        self.speakers = np.repeat(run_speakers, np.diff(np.r_[run_first, n])).astype(np.int16)
+
+    def speaker_runs(self) -> list[Tuple[int, int, int]]:
+        """(speaker id, first index, last index + 1) of runs over the assigned words.
+
+        Unassigned words are skipped, so words of one speaker on either side of
+        them form a single run; the range then spans the skipped words too.
+        """
+        valid = np.flatnonzero(self.speakers != NO_SPEAKER)
+        if not len(valid):
+            return []
+
+        valid_speakers = self.speakers[valid]
+        run_heads = np.r_[0, np.flatnonzero(valid_speakers[1:] != valid_speakers[:-1]) + 1]
+        run_tails = np.r_[run_heads[1:], len(valid)] - 1
+
+        return [
+            (int(valid_speakers[head]), int(valid[head]), int(valid[tail]) + 1)
+            for head, tail in zip(run_heads.tolist(), run_tails.tolist())
+        ]
+
+    def records(self, lo: int, hi: int) -> list[dict]:
+        """Per-word dicts for the assigned words in [lo, hi), for the event stages."""
+        return [
+            {'word': self.words[i], 'start': float(self.starts[i]), 'end': float(self.ends[i]), 'speaker': self.speaker_label(int(self.speakers[i]))}
+            for i in range(lo, hi)
+            if self.speakers[i] != NO_SPEAKER
+        ]
+
+    def text(self, lo: int, hi: int) -> str:
+        """Joined text of the assigned words in [lo, hi)."""
+        return ''.join(self.words[i] for i in range(lo, hi) if self.speakers[i] != NO_SPEAKER).strip()
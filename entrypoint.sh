@@ -9,9 +9,19 @@ echo "Starting Uvicorn..."
 
 PORT=${PORT}
 HOST=0.0.0.0
-WORKERS=1
+WORKERS=${WORKERS:-1}
 TIMEOUT=60
 
+# Several workers: load the models once and fork the workers from that process
+if [ "$WORKERS" -gt 1 ]; then
+    exec python -m app.serve \
+        --host $HOST \
+        --port $PORT \
+        --workers $WORKERS \
+        --timeout-keep-alive $TIMEOUT \
+        --log-level info
+fi
+
 exec uvicorn app.main:create_app --factory \
     --host $HOST \
     --port $PORT \
@@ -2,7 +2,7 @@ import os
 import certifi
 from pathlib import Path
 from fastapi import Depends
-from pydantic import Field
+from pydantic import Field, model_validator
 from dotenv import load_dotenv
 from functools import lru_cache
 from pydantic_settings import BaseSettings
@@ -49,17 +49,138 @@ class GlobalConfig(BaseSettings):
 
     WHISPER_MODEL_SIZE_OR_PATH: str = Field("/models/whisper-german-ct2", env="WHISPER_MODEL_SIZE_OR_PATH") # type: ignore
 
+    # Further Whisper models a request can select with "model", as a JSON object of name to size or
+    # path, e.g. {"german-v3": "/models/whisper-v3-german-ct2", "small": "small"}; requests without
+    # one use WHISPER_MODEL_SIZE_OR_PATH. Models load on first use and stay loaded while their files
+    # total at most WHISPER_MODELS_MAX_BYTES (0 = no limit), least recently used evicted first; the
+    # default model is never evicted.
+    WHISPER_MODELS: dict[str, str] = Field({}, env="WHISPER_MODELS") # type: ignore
+    WHISPER_MODELS_MAX_BYTES: int = Field(0, env="WHISPER_MODELS_MAX_BYTES") # type: ignore
+
+    # Cascade: a fast model (a name from WHISPER_MODELS, or a size or path; "" = off) transcribes
+    # everything, and only segments with an average log-probability below WHISPER_CASCADE_MIN_AVG_LOGPROB,
+    # a word probability below WHISPER_CASCADE_MIN_WORD_PROBABILITY or a compression ratio above
+    # WHISPER_CASCADE_MAX_COMPRESSION_RATIO are re-decoded with the request's model on their time range.
+    # Takes precedence over long-audio mode; cannot be combined with WHISPER_BATCH_SIZE > 1.
+    WHISPER_CASCADE_MODEL: str = Field("", env="WHISPER_CASCADE_MODEL") # type: ignore
+    WHISPER_CASCADE_MIN_AVG_LOGPROB: float = Field(-0.6, env="WHISPER_CASCADE_MIN_AVG_LOGPROB") # type: ignore
+    WHISPER_CASCADE_MIN_WORD_PROBABILITY: float = Field(0.3, env="WHISPER_CASCADE_MIN_WORD_PROBABILITY") # type: ignore
+    WHISPER_CASCADE_MAX_COMPRESSION_RATIO: float = Field(2.0, env="WHISPER_CASCADE_MAX_COMPRESSION_RATIO") # type: ignore
+
+    # Load the listed models and run a dummy inference through each in the background at
+    # startup; /v1/health/ready reports 503 until all of them are ready
+    MODEL_WARMUP_ENABLED: bool = Field(True, env="MODEL_WARMUP_ENABLED") # type: ignore
+    MODEL_WARMUP_MODELS: list[Literal["whisper", "diarization", "ast"]] = Field(["whisper", "diarization"], env="MODEL_WARMUP_MODELS") # type: ignore
+
+    # Thread budgets (0 = library default; for Whisper, the available CPUs divided by WHISPER_REPLICAS)
+    WHISPER_CPU_THREADS: int = Field(0, env="WHISPER_CPU_THREADS") # type: ignore
+    DIARIZATION_TORCH_THREADS: int = Field(0, env="DIARIZATION_TORCH_THREADS") # type: ignore
+
+    # Preload-then-fork serving (app/serve.py, used when WORKERS > 1): models loaded once in the
+    # parent and shared copy-on-write by the forked workers, and each worker's thread budget
+    # (0 = CPU count divided by the number of workers). Whisper always loads in the workers
+    # since CTranslate2 is not fork-safe.
+    SERVE_PRELOAD_MODELS: list[Literal["diarization", "ast"]] = Field(["diarization", "ast"], env="SERVE_PRELOAD_MODELS") # type: ignore
+    SERVE_WORKER_THREADS: int = Field(0, env="SERVE_WORKER_THREADS") # type: ignore
+
+    # Where jobs run: "thread" on a thread pool in the API process; "process" on a pool of
+    # worker processes that each load their own models, so post-processing doesn't contend
+    # on the GIL. Worker threads 0 = the available CPUs divided by the workers; pinning gives
+    # each worker its own contiguous slice of those CPUs.
+    EXECUTION_BACKEND: Literal["thread", "process"] = Field("thread", env="EXECUTION_BACKEND") # type: ignore
+    PROCESS_POOL_WORKERS: int = Field(2, env="PROCESS_POOL_WORKERS") # type: ignore
+    PROCESS_POOL_WORKER_THREADS: int = Field(0, env="PROCESS_POOL_WORKER_THREADS") # type: ignore
+    PROCESS_POOL_PIN_CPUS: bool = Field(False, env="PROCESS_POOL_PIN_CPUS") # type: ignore
+
+    # Whisper replicas decoding in parallel (CTranslate2 workers sharing the weights on CPU, each
+    # using WHISPER_CPU_THREADS); jobs check one out and wait when all are busy. Trade replicas
+    # against threads per replica: more replicas favour throughput, fewer favour per-job latency.
+    WHISPER_REPLICAS: int = Field(1, env="WHISPER_REPLICAS") # type: ignore
+
+    # Long-audio mode: recordings of at least LONG_AUDIO_MIN_SECONDS are split at pauses into
+    # chunks of about LONG_AUDIO_CHUNK_SECONDS, transcribed in parallel and stitched back together
+    # (0 = off). At most LONG_AUDIO_MAX_PARALLEL_CHUNKS chunks (across all jobs) are in progress and
+    # at most WHISPER_REPLICAS decode at once. Cannot be combined with WHISPER_BATCH_SIZE > 1.
+    LONG_AUDIO_MIN_SECONDS: float = Field(0, env="LONG_AUDIO_MIN_SECONDS") # type: ignore
+    LONG_AUDIO_CHUNK_SECONDS: float = Field(300, env="LONG_AUDIO_CHUNK_SECONDS") # type: ignore
+    LONG_AUDIO_MAX_PARALLEL_CHUNKS: int = Field(4, env="LONG_AUDIO_MAX_PARALLEL_CHUNKS") # type: ignore
+
+    # Cross-request batched Whisper decoding: audio is cut at pauses (or by VAD) into chunks of at
+    # most 30 s, and the chunks of all running jobs are decoded together in batches of up to
+    # WHISPER_BATCH_SIZE, each waiting at most WHISPER_BATCH_MAX_WAIT_MS for a batch to fill
+    # (1 = off, every job decodes on its own); one batch per replica is in flight. Batched decoding
+    # has no temperature fallback, and requests setting hallucination_silence_threshold are rejected.
+    WHISPER_BATCH_SIZE: int = Field(1, env="WHISPER_BATCH_SIZE") # type: ignore
+    WHISPER_BATCH_MAX_WAIT_MS: int = Field(50, env="WHISPER_BATCH_MAX_WAIT_MS") # type: ignore
+
+    # Run Whisper transcription and pyannote diarization of a job concurrently
+    PARALLEL_DIARIZATION: bool = Field(True, env="PARALLEL_DIARIZATION") # type: ignore
+
     # Diarization tuning parameters
     DIARIZATION_CLUSTERING_THRESHOLD: float = Field(0.65, env="DIARIZATION_CLUSTERING_THRESHOLD") # type: ignore
     DIARIZATION_MIN_DURATION_OFF: float = Field(0.1, env="DIARIZATION_MIN_DURATION_OFF") # type: ignore
     DIARIZATION_MIN_CLUSTER_SIZE: int = Field(12, env="DIARIZATION_MIN_CLUSTER_SIZE") # type: ignore
 
+    # Maximum number of instantiated diarization pipelines (one per concurrent job / parameter set);
+    # further jobs wait for one to be returned
+    DIARIZATION_POOL_SIZE: int = Field(4, env="DIARIZATION_POOL_SIZE") # type: ignore
+
+    # Number of AST sliding windows scored per forward pass when classifying events
+    AST_BATCH_SIZE: int = Field(16, env="AST_BATCH_SIZE") # type: ignore
+    # "timeline": one sliding-window pass over the whole file's speech, looked up per turn
+    # "windowed": one sliding-window pass per turn feeds both audio_events and text_with_events
+    # "two_pass": legacy whole-turn AST pass for audio_events plus a separate sliding-window pass
+    AST_EVENT_MODE: Literal["timeline", "windowed", "two_pass"] = Field("timeline", env="AST_EVENT_MODE") # type: ignore
+    # How window scores are pooled into turn-level audio_events in "timeline" and "windowed" modes
+    AST_TURN_POOLING: Literal["max", "mean"] = Field("max", env="AST_TURN_POOLING") # type: ignore
+
     # Paths (computed from BASE_DIR at init)
-    UPLOAD_DIR: Path = Field(default=_BASE_DIR / "uploads")
+    # Root of the per-job scratch directories; point it at a tmpfs mount (e.g. /dev/shm/whisper) to keep job audio off disk
+    UPLOAD_DIR: Path = Field(default=_BASE_DIR / "uploads", env="UPLOAD_DIR") # type: ignore
+
+    # Audio up to this size is kept in memory and never written to UPLOAD_DIR (0 = always spool to UPLOAD_DIR)
+    SCRATCH_IN_MEMORY_MAX_BYTES: int = Field(16 * 1024 ** 2, env="SCRATCH_IN_MEMORY_MAX_BYTES") # type: ignore
+    # Janitor: scratch entries not owned by a running job are removed once older than this
+    SCRATCH_ORPHAN_MAX_AGE_SECONDS: int = Field(6 * 3600, env="SCRATCH_ORPHAN_MAX_AGE_SECONDS") # type: ignore
+    SCRATCH_JANITOR_INTERVAL_SECONDS: int = Field(600, env="SCRATCH_JANITOR_INTERVAL_SECONDS") # type: ignore
+
+    # Audio downloads: pooled HTTP client limits, read chunk size, and whether to decode
+    # (ffmpeg, to 16 kHz float32 PCM) while the bytes are still arriving
+    DOWNLOAD_MAX_CONNECTIONS: int = Field(100, env="DOWNLOAD_MAX_CONNECTIONS") # type: ignore
+    DOWNLOAD_MAX_KEEPALIVE_CONNECTIONS: int = Field(20, env="DOWNLOAD_MAX_KEEPALIVE_CONNECTIONS") # type: ignore
+    DOWNLOAD_TIMEOUT_SECONDS: float = Field(30.0, env="DOWNLOAD_TIMEOUT_SECONDS") # type: ignore
+    DOWNLOAD_CHUNK_SIZE: int = Field(256 * 1024, env="DOWNLOAD_CHUNK_SIZE") # type: ignore
+    DOWNLOAD_DECODE_WHILE_STREAMING: bool = Field(False, env="DOWNLOAD_DECODE_WHILE_STREAMING") # type: ignore
+
+    # Largest audio file accepted by the multipart upload endpoint
+    UPLOAD_MAX_BYTES: int = Field(500 * 1024 ** 2, env="UPLOAD_MAX_BYTES") # type: ignore
+
+    # Content-addressed cache of final results and of Whisper / diarization stage outputs
+    RESULT_CACHE_ENABLED: bool = Field(True, env="RESULT_CACHE_ENABLED") # type: ignore
+    RESULT_CACHE_DIR: Path = Field(default=_BASE_DIR / "data" / "cache")
+    RESULT_CACHE_MAX_BYTES: int = Field(2 * 1024 ** 3, env="RESULT_CACHE_MAX_BYTES") # type: ignore
+
+    # Asynchronous jobs: SQLite store location, result retention and concurrency
+    JOB_STORE_PATH: Path = Field(default=_BASE_DIR / "data" / "jobs.sqlite3")
+    JOB_RESULT_TTL_SECONDS: int = Field(86400, env="JOB_RESULT_TTL_SECONDS") # type: ignore
+    JOB_PURGE_INTERVAL_SECONDS: int = Field(300, env="JOB_PURGE_INTERVAL_SECONDS") # type: ignore
+    JOB_MAX_CONCURRENCY: int = Field(8, env="JOB_MAX_CONCURRENCY") # type: ignore
+    # Re-schedule jobs left queued or running by stopped processes (the last shutdown,
+    # crashed workers of the forked server) whenever a worker starts
+    JOB_RESUME_ON_STARTUP: bool = Field(True, env="JOB_RESUME_ON_STARTUP") # type: ignore
 
     # Configs
     API_DOCS: APIDocsConfig = Field(default_factory=APIDocsConfig)  # type: ignore
 
+    @model_validator(mode="after")
+    def check_decoding_modes(self) -> "GlobalConfig":
+        """Fail at startup on decoding modes that cannot run together, rather than ignoring one of them."""
+        if self.WHISPER_BATCH_SIZE > 1 and self.LONG_AUDIO_MIN_SECONDS > 0:
+            raise ValueError("LONG_AUDIO_MIN_SECONDS cannot be combined with WHISPER_BATCH_SIZE > 1; batched decoding already splits the audio into chunks")
+        if self.WHISPER_BATCH_SIZE > 1 and self.WHISPER_CASCADE_MODEL:
+            raise ValueError("WHISPER_CASCADE_MODEL cannot be combined with WHISPER_BATCH_SIZE > 1; batched decoding has no cascade")
+        return self
+
 
 class DevelopmentConfig(GlobalConfig):
     """Development environment specific configurations."""
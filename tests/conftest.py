@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Importing the app package builds the FastAPI app, which needs the required settings
+os.environ.setdefault("HF_TOKEN", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+
+from app.whisper.audio import PCM_SUFFIX, map_pcm_file
+
+
+def _pcm_file(tmp_path, num_samples: int):
+    samples = np.random.default_rng(0).standard_normal(num_samples).astype(np.float32)
+    path = str(tmp_path / f"audio{PCM_SUFFIX}")
+    samples.tofile(path)
+    return path, samples
+
+
+def test_mapping_again_gives_the_same_samples(tmp_path):
+    path, samples = _pcm_file(tmp_path, 1000)
+
+    first = map_pcm_file(path, 64)
+    assert np.array_equal(first.samples, samples)
+    assert np.array_equal(first.padded(64), np.pad(samples, (0, 24)))
+
+    # The padding grew the file, but the decoded length is kept
+    for pad_multiple in (64, 1, 300):
+        again = map_pcm_file(path, pad_multiple)
+        assert np.array_equal(again.samples, samples)
+        assert again.padded(pad_multiple).shape[0] == -(-1000 // pad_multiple) * pad_multiple
+        assert not again.padded(pad_multiple)[1000:].any()
+
+
+def test_files_without_padding_are_left_alone(tmp_path):
+    path, samples = _pcm_file(tmp_path, 1024)
+
+    audio = map_pcm_file(path, 64)
+
+    assert np.array_equal(audio.samples, samples)
+    assert os.path.getsize(path) == samples.nbytes
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
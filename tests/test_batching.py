@@ -0,0 +1,165 @@
+import itertools
+
+import numpy as np
+import pytest
+from ctranslate2.specs import whisper_spec  # type: ignore
+from faster_whisper import WhisperModel  # type: ignore
+from faster_whisper.transcribe import BatchedInferencePipeline  # type: ignore
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+
+from app.whisper.audio import TARGET_SAMPLE_RATE, DecodedAudio
+from app.whisper.batching import ScheduledBatchPipeline, WhisperBatchScheduler, pause_clip_timestamps
+from app.whisper.whisper_pool import WhisperReplicaPool
+
+SPECIAL_TOKENS = ["<|endoftext|>", "<|startoftranscript|>", "<|translate|>", "<|transcribe|>", "<|startoflm|>", "<|startofprev|>", "<|nocaptions|>", "<|notimestamps|>"]
+WIDTH, HEADS, LAYERS = 64, 2, 2
+
+
+def _random_whisper_model(path) -> None:
+    """An English-only Whisper model with random weights, small enough to decode in a test.
+
+    Its transcripts are gibberish, but decoding runs through the same code as
+    with a real model, word timings included.
+    """
+    rng = np.random.default_rng(0)
+
+    def weights(*shape: int) -> np.ndarray:
+        return (rng.standard_normal(shape) * 0.2).astype(np.float32)
+
+    def layer_norm(spec) -> None:
+        spec.gamma = np.ones(WIDTH, dtype=np.float32)
+        spec.beta = np.zeros(WIDTH, dtype=np.float32)
+
+    def linear(spec, rows: int, columns: int = WIDTH) -> None:
+        spec.weight = weights(rows, columns)
+        spec.bias = weights(rows)
+
+    def attention(spec, cross: bool = False) -> None:
+        layer_norm(spec.layer_norm)
+        shapes = [WIDTH, 2 * WIDTH, WIDTH] if cross else [3 * WIDTH, WIDTH]
+        for linear_spec, rows in zip(spec.linear, shapes):
+            linear(linear_spec, rows)
+
+    def ffn(spec) -> None:
+        layer_norm(spec.layer_norm)
+        linear(spec.linear_0, 4 * WIDTH)
+        linear(spec.linear_1, WIDTH, 4 * WIDTH)
+
+    text_tokens = list(pre_tokenizers.ByteLevel.alphabet())
+    vocabulary = text_tokens + SPECIAL_TOKENS + ["<|%.2f|>" % (i * 0.02) for i in range(1501)]
+
+    spec = whisper_spec.WhisperSpec(LAYERS, HEADS, LAYERS, HEADS)
+    spec.encoder.conv1.weight, spec.encoder.conv1.bias = weights(WIDTH, 80, 3), weights(WIDTH)
+    spec.encoder.conv2.weight, spec.encoder.conv2.bias = weights(WIDTH, WIDTH, 3), weights(WIDTH)
+    spec.encoder.position_encodings.encodings = weights(1500, WIDTH)
+    layer_norm(spec.encoder.layer_norm)
+    for layer in spec.encoder.layer:
+        attention(layer.self_attention)
+        ffn(layer.ffn)
+    spec.decoder.embeddings.weight = weights(len(vocabulary), WIDTH)
+    spec.decoder.position_encodings.encodings = weights(448, WIDTH)
+    layer_norm(spec.decoder.layer_norm)
+    for layer in spec.decoder.layer:
+        attention(layer.self_attention)
+        attention(layer.attention, cross=True)
+        ffn(layer.ffn)
+    # Damp the special and timestamp logits so that segments have words to time
+    spec.decoder.projection.weight = weights(len(vocabulary), WIDTH)
+    spec.decoder.projection.weight[len(text_tokens):] *= 0.7
+
+    spec.register_vocabulary(vocabulary)
+    spec.config.suppress_ids = []
+    spec.config.suppress_ids_begin = [vocabulary.index("<|endoftext|>")]
+    spec.config.lang_ids = []
+    spec.config.alignment_heads = list(itertools.product(range(LAYERS // 2, LAYERS), range(HEADS)))
+    spec.validate()
+    spec.optimize()
+    spec.save(str(path))
+
+    tokenizer = Tokenizer(models.BPE(vocab={token: i for i, token in enumerate(text_tokens)}, merges=[]))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    tokenizer.add_special_tokens(SPECIAL_TOKENS)
+    tokenizer.save(str(path / "tokenizer.json"))
+
+
+@pytest.fixture(scope="module")
+def whisper_pool(tmp_path_factory) -> WhisperReplicaPool:
+    path = tmp_path_factory.mktemp("whisper")
+    _random_whisper_model(path)
+    return WhisperReplicaPool(WhisperModel(str(path), device="cpu", compute_type="float32", cpu_threads=1, num_workers=2), 2, 1)
+
+
+def _noise(seconds: float) -> np.ndarray:
+    return (np.random.default_rng(1).standard_normal(int(seconds * TARGET_SAMPLE_RATE)) * 0.1).astype(np.float32)
+
+
+def _decode_options(num_samples: int, **overrides) -> dict:
+    step = 25 * TARGET_SAMPLE_RATE
+    clips = [{"start": start, "end": min(start + step, num_samples)} for start in range(0, num_samples, step)]
+    options = dict(language="en", word_timestamps=True, clip_timestamps=clips, suppress_tokens=[], max_new_tokens=40, batch_size=len(clips))
+    return {**options, **overrides}
+
+
+def _scheduled_transcribe(whisper_pool: WhisperReplicaPool, audio: np.ndarray, options: dict) -> list:
+    scheduler = WhisperBatchScheduler(whisper_pool, options["batch_size"], 5.0)
+    try:
+        segments, _ = ScheduledBatchPipeline(whisper_pool, scheduler).transcribe(audio, **options)
+        return list(segments)
+    finally:
+        scheduler.close()
+
+
+def test_a_single_job_decodes_as_with_the_stock_pipeline(whisper_pool):
+    audio = _noise(70)
+    # Stock batched decoding keeps silent chunks
+    options = _decode_options(len(audio), no_speech_threshold=None)
+
+    expected, _ = BatchedInferencePipeline(whisper_pool.model).transcribe(audio, **options)
+    expected = list(expected)
+
+    assert any(segment.words for segment in expected)
+    assert _scheduled_transcribe(whisper_pool, audio, options) == expected
+
+
+def test_chunks_found_silent_are_dropped(whisper_pool):
+    audio = _noise(70)
+
+    kept = _scheduled_transcribe(whisper_pool, audio, _decode_options(len(audio), no_speech_threshold=1.0))
+    dropped = _scheduled_transcribe(whisper_pool, audio, _decode_options(len(audio), no_speech_threshold=0.0, log_prob_threshold=None))
+
+    assert kept and dropped == []
+
+
+def _speech_with_pauses(seconds: float, seed: int = 0) -> tuple[DecodedAudio, list[tuple[int, int]]]:
+    """Noise bursts of 2-9 s separated by 0.6-1.5 s pauses, and the pauses' sample ranges."""
+    rng = np.random.default_rng(seed)
+    samples = np.zeros(int(seconds * TARGET_SAMPLE_RATE), dtype=np.float32)
+    pauses = []
+    position = 0
+    while position < len(samples):
+        burst = int(rng.uniform(2, 9) * TARGET_SAMPLE_RATE)
+        samples[position:position + burst] = rng.standard_normal(len(samples[position:position + burst])) * 0.3
+        pause = int(rng.uniform(0.6, 1.5) * TARGET_SAMPLE_RATE)
+        pauses.append((position + burst, position + burst + pause))
+        position += burst + pause
+    return DecodedAudio(samples), pauses
+
+
+def test_chunks_fit_the_window_and_are_cut_in_pauses():
+    audio, pauses = _speech_with_pauses(600)
+
+    chunks = pause_clip_timestamps(audio)
+
+    assert chunks[0]["start"] == 0 and chunks[-1]["end"] == audio.num_samples
+    assert all(a["end"] == b["start"] for a, b in zip(chunks[:-1], chunks[1:]))
+    assert all(chunk["end"] - chunk["start"] <= 30 * TARGET_SAMPLE_RATE for chunk in chunks)
+    for chunk in chunks[:-1]:
+        assert any(start <= chunk["end"] < end for start, end in pauses)
+
+
+def test_short_audio_is_a_single_chunk():
+    audio = DecodedAudio(np.zeros(10 * TARGET_SAMPLE_RATE, dtype=np.float32))
+
+    assert pause_clip_timestamps(audio) == [{"start": 0, "end": audio.num_samples}]
+    assert pause_clip_timestamps(DecodedAudio(np.zeros(0, dtype=np.float32))) == []
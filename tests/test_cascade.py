@@ -0,0 +1,47 @@
+import numpy as np
+from faster_whisper.transcribe import Segment, TranscriptionInfo, Word  # type: ignore
+
+from app.whisper.audio import TARGET_SAMPLE_RATE, DecodedAudio
+from app.whisper.cascade import transcribe_cascade
+from app.whisper.whisper_pool import WhisperReplicaPool
+
+
+def _segment(start: float, end: float, text: str, probability: float) -> Segment:
+    words = [Word(start=start, end=end, word=" " + text, probability=probability)]
+    return Segment(id=0, seek=0, start=start, end=end, text=" " + text, tokens=[], avg_logprob=-0.1, compression_ratio=1.0, no_speech_prob=0.0, words=words, temperature=0.0)
+
+
+class _Model:
+    """Stands in for a WhisperModel, returning the same segments for any audio."""
+
+    def __init__(self, segments: list[Segment]):
+        self.segments = segments
+
+    def transcribe(self, audio: np.ndarray, **options) -> tuple:
+        info = TranscriptionInfo(language="de", language_probability=1.0, duration=len(audio) / TARGET_SAMPLE_RATE, duration_after_vad=0.0, all_language_probs=None, transcription_options=None, vad_options=None)
+        return iter(self.segments), info
+
+
+def _cascade(large_segments: list[Segment]) -> list[Segment]:
+    fast = [_segment(0.0, 1.0, "eins", 0.9), _segment(1.0, 2.0, "zwei", 0.1), _segment(2.0, 3.0, "drei", 0.9)]
+    audio = DecodedAudio(np.zeros(3 * TARGET_SAMPLE_RATE, dtype=np.float32))
+
+    segments, info = transcribe_cascade(WhisperReplicaPool(_Model(fast), 1, 1), WhisperReplicaPool(_Model(large_segments), 1, 1), audio, -0.6, 0.3, 2.0)
+
+    assert info.escalated_fraction == round(1 / 3, 4)
+    return list(segments)
+
+
+def test_unsure_segments_are_replaced_by_the_large_model():
+    # The large model decodes 0-3 s around the escalated second, and keeps the words within it
+    segments = _cascade([_segment(0.0, 0.9, "ein", 0.9), _segment(1.1, 1.9, "zwo", 0.9), _segment(2.1, 2.9, "drei", 0.9)])
+
+    assert [segment.text for segment in segments] == [" eins", " zwo", " drei"]
+    assert [segment.id for segment in segments] == [1, 2, 3]
+
+
+def test_fast_segments_are_kept_when_the_large_model_finds_no_words():
+    segments = _cascade([])
+
+    assert [segment.text for segment in segments] == [" eins", " zwei", " drei"]
+    assert [segment.id for segment in segments] == [1, 2, 3]
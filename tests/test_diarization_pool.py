@@ -0,0 +1,59 @@
+import threading
+import time
+
+from app.whisper.diarization_pool import DiarizationPipelinePool
+
+
+class _Pipeline:
+    """Stands in for a pyannote pipeline: copied per parameter set, with no models to share."""
+
+    _models: dict = {}
+    _inferences: dict = {}
+    copies = 0
+
+    def __deepcopy__(self, memo) -> "_Pipeline":
+        _Pipeline.copies += 1
+        return _Pipeline()
+
+    def instantiate(self, params: dict) -> None:
+        self.params = params
+
+
+def test_checkouts_beyond_the_pool_size_wait_for_a_copy():
+    _Pipeline.copies = 0
+    pool = DiarizationPipelinePool(_Pipeline(), max_size=2)
+    in_use = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def job(threshold: float) -> None:
+        nonlocal in_use, peak
+        with pool.checkout(0.1, threshold, 12):
+            with lock:
+                in_use += 1
+                peak = max(peak, in_use)
+            time.sleep(0.02)
+            with lock:
+                in_use -= 1
+
+    # Every job asks for different parameters, so none can reuse another's copy
+    threads = [threading.Thread(target=job, args=(0.5 + i / 100,)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert peak == 2
+    assert _Pipeline.copies == 12
+    assert pool._idle_count() == 2
+
+
+def test_idle_copies_are_reused():
+    _Pipeline.copies = 0
+    pool = DiarizationPipelinePool(_Pipeline(), max_size=2)
+
+    for _ in range(5):
+        with pool.checkout(0.1, 0.65, 12) as pipeline:
+            assert pipeline.params["clustering"]["threshold"] == 0.65
+
+    assert _Pipeline.copies == 1
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import io
+import math
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterator
+
+import numpy as np
+import pytest
+
+from app.file.service import FileService, close_http_client
+from app.whisper.audio import PCM_SUFFIX, TARGET_SAMPLE_RATE
+from settings.config import get_settings
+
+LARGE_BODY_BYTES = 320 * 1024 ** 2
+_BLOCK = np.random.default_rng(0).integers(0, 256, 1024 ** 2, dtype=np.uint8).tobytes()
+
+
+def _body_blocks(size: int) -> Iterator[bytes]:
+    """``size`` bytes, generated a block at a time so neither side holds the whole body."""
+    index = 0
+    while size > 0:
+        # Vary every block so a dropped or repeated block changes the hash
+        block = struct.pack(">Q", index) + _BLOCK[8:]
+        yield block[:size]
+        size -= len(block)
+        index += 1
+
+
+def _body_sha256(size: int) -> str:
+    digest = hashlib.sha256()
+    for block in _body_blocks(size):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _tone_wav(seconds: float, sample_rate: int = 44100) -> bytes:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    samples = (0.3 * np.sin(2 * math.pi * 440 * t) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class _Server:
+    """A local HTTP/1.1 server with keep-alive, serving generated bodies by path."""
+
+    def __init__(self, routes: dict[str, tuple[str, int, Callable[[], Iterator[bytes]]]]):
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                server.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                content_type, size, blocks = routes[self.path]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(size))
+                self.end_headers()
+                try:
+                    for block in blocks():
+                        self.wfile.write(block)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self) -> "_Server":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _file_service(**overrides) -> FileService:
+    return FileService(get_settings().model_copy(update=overrides))  # type: ignore
+
+
+def _download_all(service: FileService, urls: list[str], directory) -> list:
+    async def run():
+        try:
+            return [await asyncio.wait_for(service.download_file(url, directory), timeout=120) for url in urls]
+        finally:
+            await close_http_client()
+
+    return asyncio.run(run())
+
+
+def test_large_download_streams_to_disk_over_a_pooled_connection(tmp_path):
+    small_size = 1024 ** 2
+    routes = {
+        "/small.mp3": ("audio/mpeg", small_size, lambda: _body_blocks(small_size)),
+        "/large.mp3": ("audio/mpeg", LARGE_BODY_BYTES, lambda: _body_blocks(LARGE_BODY_BYTES)),
+    }
+    service = _file_service(SCRATCH_IN_MEMORY_MAX_BYTES=16 * 1024 ** 2, DOWNLOAD_DECODE_WHILE_STREAMING=False)
+
+    with _Server(routes) as server:
+        small, large = _download_all(service, [f"{server.url}/small.mp3", f"{server.url}/large.mp3"], tmp_path)
+
+    # Both downloads reused one keep-alive connection of the shared client
+    assert server.connections == 1
+
+    # Small bodies stay in memory and never touch disk
+    assert small.size == small_size
+    assert small.sha256 == _body_sha256(small_size)
+    assert small.data is not None and len(small.data) == small_size
+    assert not (tmp_path / small.name).exists()
+
+    # Large bodies are written out as they arrive, hashed on the way
+    assert large.data is None
+    assert large.size == LARGE_BODY_BYTES
+    assert large.sha256 == _body_sha256(LARGE_BODY_BYTES)
+    with open(large.path, "rb") as f:
+        on_disk = hashlib.sha256()
+        for block in iter(lambda: f.read(1024 ** 2), b""):
+            on_disk.update(block)
+    assert on_disk.hexdigest() == large.sha256
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_download_decodes_while_streaming(tmp_path):
+    seconds = 30
+    wav = _tone_wav(seconds)
+    routes = {"/tone.wav": ("audio/wav", len(wav), lambda: iter([wav]))}
+    service = _file_service(SCRATCH_IN_MEMORY_MAX_BYTES=0, DOWNLOAD_DECODE_WHILE_STREAMING=True)
+
+    with _Server(routes) as server:
+        (decoded,) = _download_all(service, [f"{server.url}/tone.wav"], tmp_path)
+
+    assert decoded.path.endswith(PCM_SUFFIX)
+    assert decoded.sha256 == hashlib.sha256(wav).hexdigest()
+    samples = np.fromfile(decoded.path, dtype=np.float32)
+    assert abs(len(samples) - seconds * TARGET_SAMPLE_RATE) <= TARGET_SAMPLE_RATE // 100
+    assert 0.25 < float(np.abs(samples).max()) < 0.35
+
+    # Only the decoded PCM is left in the scratch dir: the download and the decoder's log are removed
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(decoded.path)]
+
+
+def _damaged_mp2(seconds: int) -> bytes:
+    """An MP2 stream whose frames are damaged after an intact start, so ffmpeg opens it and then logs an error per bad frame."""
+    encoded = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi", "-i", f"sine=f=440:d={seconds}",
+         "-ac", "1", "-ar", str(TARGET_SAMPLE_RATE), "-c:a", "mp2", "-b:a", "32k", "-f", "mp2", "pipe:1"],
+        check=True, capture_output=True,
+    ).stdout
+    damaged = np.frombuffer(encoded, dtype=np.uint8).copy()
+    positions = np.random.default_rng(1).integers(64 * 1024, len(damaged), len(damaged) // 50)
+    damaged[positions] ^= 0xFF
+    return damaged.tobytes()
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+def test_damaged_download_does_not_stall_on_decoder_errors(tmp_path):
+    # An hour of damaged frames makes ffmpeg log far more than a pipe buffer holds while it is still being fed
+    body = _damaged_mp2(3600)
+    routes = {"/damaged.mp2": ("audio/mpeg", len(body), lambda: iter([body[i:i + 1024 ** 2] for i in range(0, len(body), 1024 ** 2)]))}
+    service = _file_service(SCRATCH_IN_MEMORY_MAX_BYTES=0, DOWNLOAD_DECODE_WHILE_STREAMING=True)
+
+    with _Server(routes) as server:
+        (decoded,) = _download_all(service, [f"{server.url}/damaged.mp2"], tmp_path)
+
+    assert decoded.sha256 == hashlib.sha256(body).hexdigest()
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(decoded.path)]
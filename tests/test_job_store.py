@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import sqlite3
+
+from app.jobs.store import JobStore
+from app.jobs.schemas.job_schema import JobStatus
+
+
+def _exited_pid() -> int:
+    process = multiprocessing.get_context("fork").Process(target=os._exit, args=(0,))
+    process.start()
+    process.join()
+    return process.pid
+
+
+def _set_owner(store: JobStore, job_id: str, status: JobStatus, owner_pid) -> None:
+    with sqlite3.connect(store.path) as conn:
+        conn.execute("UPDATE jobs SET status = ?, owner_pid = ? WHERE id = ?", (status.value, owner_pid, job_id))
+
+
+def test_only_jobs_of_stopped_owners_are_requeued(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    for job_id in ("crashed-running", "crashed-queued", "live-running", "done"):
+        store.create(job_id, "{}")
+
+    dead = _exited_pid()
+    _set_owner(store, "crashed-running", JobStatus.RUNNING, dead)
+    _set_owner(store, "crashed-queued", JobStatus.QUEUED, dead)
+    # Owned by another process that is still running (the test runner's parent)
+    _set_owner(store, "live-running", JobStatus.RUNNING, os.getppid())
+    _set_owner(store, "done", JobStatus.COMPLETED, dead)
+
+    assert store.requeue_orphaned() == ["crashed-running", "crashed-queued"]
+    assert store.get("crashed-running").status == JobStatus.QUEUED
+    assert store.get("live-running").status == JobStatus.RUNNING
+
+    # Taken over by this process, so another worker starting now leaves them alone
+    with sqlite3.connect(store.path) as conn:
+        owners = dict(conn.execute("SELECT id, owner_pid FROM jobs"))
+    assert owners["crashed-running"] == owners["crashed-queued"] == os.getpid()
+    assert _requeue_in_worker(store.path) == []
+
+
+def _requeue_in_worker(path) -> list[str]:
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    worker = context.Process(target=lambda: results.put(JobStore(path).requeue_orphaned()))
+    worker.start()
+    claimed = results.get(timeout=60)
+    worker.join()
+    return claimed
+
+
+def _claim(path, results, barrier) -> None:
+    results.put(JobStore(path).requeue_orphaned())
+    # Stay alive until every worker has claimed, as running workers would
+    barrier.wait(timeout=60)
+
+
+def test_workers_starting_together_resume_each_job_once(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    store = JobStore(path)
+    dead = _exited_pid()
+    job_ids = [f"job-{i}" for i in range(50)]
+    for job_id in job_ids:
+        store.create(job_id, "{}")
+        _set_owner(store, job_id, JobStatus.RUNNING, dead)
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    barrier = context.Barrier(4)
+    workers = [context.Process(target=_claim, args=(path, results, barrier)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    resumed = [job_id for ids in claimed for job_id in ids]
+    assert sorted(resumed) == sorted(job_ids)
+
+
+def test_stores_from_before_job_owners_are_migrated(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, request TEXT NOT NULL, result TEXT, "
+            "error TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL, expires_at TEXT)"
+        )
+        conn.execute(
+            "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES ('old', 'running', '{}', "
+            "'2024-01-01T00:00:00+00:00', '2024-01-01T00:00:00+00:00')"
+        )
+
+    store = JobStore(path)
+
+    # Without a recorded owner the job cannot belong to a live worker
+    assert store.requeue_orphaned() == ["old"]
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+
+import pytest
+
+from app.whisper.result_cache import DiskCache, get_result_cache
+
+ENTRY_BYTES = 10_000
+
+
+def _put_entries(directory, max_bytes: int, keys: list[str]) -> None:
+    # As transcribe_audio opens the stage cache in a worker
+    cache = get_result_cache(str(directory), max_bytes)
+    for key in keys:
+        cache.put("result", key, os.urandom(ENTRY_BYTES))
+
+
+# Forked like app.serve's workers, spawned like the process pool's
+START_METHODS = pytest.mark.parametrize("start_method", ["fork", "spawn"])
+
+
+def _in_worker(start_method: str, target, *args) -> None:
+    process = multiprocessing.get_context(start_method).Process(target=target, args=args)
+    process.start()
+    process.join(timeout=120)
+    assert process.exitcode == 0
+
+
+@START_METHODS
+def test_entries_written_by_another_process_are_hits(tmp_path, start_method):
+    cache = DiskCache(tmp_path, 10 * ENTRY_BYTES)
+    assert cache.get("result", "a") is None
+
+    _in_worker(start_method, _put_entries, tmp_path, 10 * ENTRY_BYTES, ["a"])
+
+    assert cache.get("result", "a") is not None
+    assert cache.status()["hits"] == {"result": 1}
+    assert cache.status()["misses"] == {"result": 1}
+
+
+@START_METHODS
+def test_budget_holds_across_processes(tmp_path, start_method):
+    max_bytes = 5 * (ENTRY_BYTES + 100)
+    cache = DiskCache(tmp_path, max_bytes)
+    cache.put("result", "oldest", os.urandom(ENTRY_BYTES))
+
+    _in_worker(start_method, _put_entries, tmp_path, max_bytes, [f"first-{i}" for i in range(4)])
+    _in_worker(start_method, _put_entries, tmp_path, max_bytes, [f"second-{i}" for i in range(4)])
+
+    status = cache.status()
+    on_disk = [path for path in tmp_path.glob("*.pkl")]
+    assert status["entries"] == len(on_disk) == 5
+    assert status["size_bytes"] == sum(path.stat().st_size for path in on_disk) <= max_bytes
+    # The least recently used entries went first, whichever process wrote them
+    assert sorted(path.name for path in on_disk) == sorted(
+        ["result-first-3.pkl"] + [f"result-second-{i}.pkl" for i in range(4)]
+    )
+
+
+def test_existing_files_are_indexed_and_missing_ones_dropped(tmp_path):
+    cache = DiskCache(tmp_path, 10 * ENTRY_BYTES)
+    cache.put("result", "kept", b"x")
+    cache.put("result", "gone", b"y")
+    os.remove(tmp_path / "result-gone.pkl")
+    (tmp_path / "index.sqlite3").unlink()
+
+    reopened = DiskCache(tmp_path, 10 * ENTRY_BYTES)
+
+    assert reopened.status()["entries"] == 1
+    assert reopened.get("result", "kept") == b"x"
+    assert reopened.get("result", "gone") is None
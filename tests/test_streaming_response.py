@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.common.response import CleanupStreamingResponse
+
+
+def _scope(spec_version: str) -> dict:
+    return {"type": "http", "asgi": {"spec_version": spec_version}}
+
+
+async def _no_disconnect() -> dict:
+    await asyncio.sleep(3600)
+    return {"type": "http.disconnect"}
+
+
+def _stream(started: list) -> CleanupStreamingResponse:
+    async def events():
+        started.append(True)
+        yield "event\n"
+
+    closed = []
+    response = CleanupStreamingResponse(events(), on_close=lambda: closed.append(bool(started)))
+    response.closed = closed  # type: ignore
+    return response
+
+
+@pytest.mark.parametrize("spec_version", ["2.4", "2.3"])
+def test_on_close_runs_after_the_body_is_sent(spec_version):
+    started: list = []
+    response = _stream(started)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(response(_scope(spec_version), _no_disconnect, send))
+
+    assert [m.get("body") for m in sent if m["type"] == "http.response.body"][0] == b"event\n"
+    assert response.closed == [True]  # type: ignore
+
+
+def test_on_close_runs_when_the_client_is_gone_before_the_body_starts():
+    started: list = []
+    response = _stream(started)
+
+    async def send(message):
+        # The connection dropped while the download ran; sending the headers fails
+        raise OSError("connection reset")
+
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(response(_scope("2.4"), _no_disconnect, send))
+
+    # The body iterator never ran, so only on_close can clean up after it
+    assert started == []
+    assert response.closed == [False]  # type: ignore
@@ -0,0 +1,125 @@
+import json
+import random
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pytest
+
+from app.whisper.service import _BOUNDARY_ZONE_S
+from app.whisper.track_index import SpeakerTrackIndex
+
+FIXTURES = Path(__file__).parent / "fixtures" / "diarized_words.json"
+
+
+class Turn(NamedTuple):
+    start: float
+    end: float
+
+
+class Word(NamedTuple):
+    start: float
+    end: float
+
+
+# The per-word linear scans SpeakerTrackIndex replaced, kept verbatim as the reference
+
+
+def _nearest_speaker_by_midpoint(start: float, end: float, tracks: list) -> Optional[str]:
+    mid = (start + end) / 2
+    best_speaker, best_dist = None, float('inf')
+    for turn, _, speaker in tracks:
+        dist = abs(mid - (turn.start + turn.end) / 2)
+        if dist < best_dist:
+            best_dist = dist
+            best_speaker = speaker
+    return best_speaker
+
+
+def _assign_word_speaker_by_overlap(word, tracks: list) -> Optional[str]:
+    best_speaker, best_overlap = None, 0.0
+    for turn, _, speaker in tracks:
+        overlap = max(0.0, min(word.end, turn.end) - max(word.start, turn.start))
+        if overlap > best_overlap:
+            best_overlap = overlap
+            best_speaker = speaker
+    if best_speaker is None:
+        best_speaker = _nearest_speaker_by_midpoint(word.start, word.end, tracks)
+    return best_speaker
+
+
+def _assign_word_speaker_by_midpoint(word, tracks: list) -> Optional[str]:
+    mid = (word.start + word.end) / 2
+
+    for turn, _, speaker in tracks:
+        if turn.start <= mid <= turn.end:
+            near_boundary = (mid - turn.start) < _BOUNDARY_ZONE_S or (turn.end - mid) < _BOUNDARY_ZONE_S
+            if near_boundary:
+                return _assign_word_speaker_by_overlap(word, tracks)
+            return speaker
+
+    return _nearest_speaker_by_midpoint(word.start, word.end, tracks)
+
+
+def _assert_parity(tracks: list, words: list) -> None:
+    index = SpeakerTrackIndex(tracks, _BOUNDARY_ZONE_S)
+    assigned = index.assign(np.array([w.start for w in words], dtype=np.float64), np.array([w.end for w in words], dtype=np.float64))
+
+    expected = [_assign_word_speaker_by_midpoint(word, tracks) for word in words]
+    mismatches = [(word, got, want) for word, got, want in zip(words, assigned, expected) if got != want]
+    assert not mismatches
+
+
+def _load_cases() -> list[dict]:
+    with open(FIXTURES) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("case", _load_cases(), ids=lambda case: case["name"])
+def test_matches_linear_scan_on_fixtures(case):
+    tracks = [(Turn(start, end), f"T{i}", speaker) for i, (start, end, speaker) in enumerate(case["tracks"])]
+    words = [Word(start, end) for start, end in case["words"]]
+
+    _assert_parity(tracks, words)
+
+
+def test_matches_linear_scan_on_random_tracks():
+    rng = random.Random(0)
+
+    for _ in range(3000):
+        tracks = []
+        for i in range(rng.randint(0, 12)):
+            start = round(rng.uniform(0, 20), rng.choice([1, 2, 3]))
+            end = round(start + rng.uniform(0.05, 4), rng.choice([1, 2, 3]))
+            tracks.append((Turn(start, end), f"T{i}", f"SPEAKER_{i:02d}"))
+        tracks.sort(key=lambda track: track[0].start)
+
+        words = []
+        for _ in range(rng.randint(1, 30)):
+            start = round(rng.uniform(0, 25), 2)
+            words.append(Word(start, round(start + rng.uniform(0.01, 0.8), 2)))
+
+        _assert_parity(tracks, words)
+
+
+@pytest.mark.parametrize("earlier, later", [
+    # Midpoints 0.15 and 0.15000000000000002
+    ((0.0, 0.3), (0.1, 0.2)),
+    # Midpoints 1.7999999999999998 and 1.8
+    ((0.3, 3.3), (0.6, 3.0)),
+])
+def test_rounding_tie_goes_to_earlier_track(earlier, later):
+    # The later track's midpoint is nearer, but the distances to a word at 4.44 s
+    # round to the same value, so the scan kept the earlier track
+    tracks = [(Turn(*earlier), "T0", "SPEAKER_00"), (Turn(*later), "T1", "SPEAKER_01")]
+    word = Word(4.4, 4.48)
+
+    assert _assign_word_speaker_by_midpoint(word, tracks) == "SPEAKER_00"
+    _assert_parity(tracks, [word])
+
+
+def test_no_tracks():
+    index = SpeakerTrackIndex([], _BOUNDARY_ZONE_S)
+
+    assert index.assign(np.array([1.0]), np.array([1.5])) == [None]
+    assert index.assign(np.array([]), np.array([])) == []
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.common.exceptions import BadRequestException
+from app.file.service import FileService
+from settings.config import get_settings
+
+BOUNDARY = "test-boundary"
+AUDIO_CHUNK = b"\0" * 64 * 1024
+
+
+def _field(name: str, value: str) -> bytes:
+    return f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+
+
+def _file_header() -> bytes:
+    return f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="audio_file"; filename="a.wav"\r\nContent-Type: audio/wav\r\n\r\n'.encode()
+
+
+def _request(chunks: list[bytes], received: list[bytes]) -> Request:
+    async def receive() -> dict:
+        chunk = chunks.pop(0)
+        received.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+def _receive(tmp_path, chunks: list[bytes], received: list[bytes]):
+    def check_field(name: str, value: str) -> None:
+        if name == "model" and value != "small":
+            raise BadRequestException(message=f"Unknown model '{value}'")
+
+    service = FileService(get_settings().model_copy(update={"SCRATCH_IN_MEMORY_MAX_BYTES": 0, "DOWNLOAD_DECODE_WHILE_STREAMING": False}))  # type: ignore
+    return asyncio.run(service.receive_upload(_request(chunks, received), "audio_file", tmp_path, check_field))
+
+
+def test_a_field_before_the_file_rejects_the_upload_before_it_is_stored(tmp_path):
+    chunks = [_field("model", "huge") + _file_header()] + [AUDIO_CHUNK] * 100 + [f"\r\n--{BOUNDARY}--\r\n".encode()]
+    received: list[bytes] = []
+
+    with pytest.raises(BadRequestException):
+        _receive(tmp_path, chunks, received)
+
+    assert len(received) == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fields_are_checked_and_returned_wherever_they_are_sent(tmp_path):
+    chunks = [_field("language", "de") + _file_header(), AUDIO_CHUNK, b"\r\n" + _field("model", "small") + f"--{BOUNDARY}--\r\n".encode()]
+
+    file, fields = _receive(tmp_path, chunks, [])
+
+    assert fields == {"language": "de", "model": "small"}
+    assert file.size == len(AUDIO_CHUNK)